@@ -0,0 +1,75 @@
+"""Convert content embeddings to pgvector (optional storage mode).
+
+Revision ID: 004_pgvector_embeddings
+Revises: 003_enhanced_weekly_summary
+Create Date: 2026-10-16
+
+Only takes effect with EMBEDDING_STORAGE=pgvector: converts the float[]
+embedding column to vector(EMBEDDING_DIMENSIONS) and adds an HNSW (or
+IVFFlat) cosine index. In array mode this migration is a no-op.
+
+Rows whose dimension doesn't match EMBEDDING_DIMENSIONS (left over from
+an older embedding model) cannot be cast and are deleted; regenerate
+them with POST /admin/embeddings/generate-all.
+
+To switch modes on an existing database, downgrade to
+003_enhanced_weekly_summary and upgrade again with the new setting.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from app.config import settings
+
+# revision identifiers, used by Alembic.
+revision: str = "004_pgvector_embeddings"
+down_revision: Union[str, None] = "003_enhanced_weekly_summary"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = f"ix_content_embeddings_embedding_{settings.pgvector_index_type}"
+
+
+def _embedding_column_type() -> str:
+    """Return the underlying Postgres type name of content_embeddings.embedding."""
+    return op.get_bind().scalar(
+        sa.text(
+            "SELECT udt_name FROM information_schema.columns "
+            "WHERE table_name = 'content_embeddings' AND column_name = 'embedding'"
+        )
+    )
+
+
+def upgrade() -> None:
+    if settings.embedding_storage != "pgvector" or _embedding_column_type() == "vector":
+        return
+
+    dims = settings.embedding_dimensions
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    op.execute(
+        f"DELETE FROM content_embeddings WHERE array_length(embedding, 1) IS DISTINCT FROM {dims}"
+    )
+    op.execute(
+        f"ALTER TABLE content_embeddings "
+        f"ALTER COLUMN embedding TYPE vector({dims}) USING embedding::vector({dims})"
+    )
+
+    index_options = "WITH (lists = 100)" if settings.pgvector_index_type == "ivfflat" else ""
+    op.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON content_embeddings "
+        f"USING {settings.pgvector_index_type} (embedding vector_cosine_ops) {index_options}"
+    )
+
+
+def downgrade() -> None:
+    if _embedding_column_type() != "vector":
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_content_embeddings_embedding_hnsw")
+    op.execute("DROP INDEX IF EXISTS ix_content_embeddings_embedding_ivfflat")
+    op.execute(
+        "ALTER TABLE content_embeddings "
+        "ALTER COLUMN embedding TYPE double precision[] USING embedding::real[]::double precision[]"
+    )
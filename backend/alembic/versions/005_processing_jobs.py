@@ -0,0 +1,69 @@
+"""Add processing_jobs table for the durable background job queue.
+
+Revision ID: 005_processing_jobs
+Revises: 004_pgvector_embeddings
+Create Date: 2026-10-16
+
+Items left PENDING by the old fire-and-forget processing (e.g. lost in a
+restart) are queued so they get processed after the upgrade.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "005_processing_jobs"
+down_revision: Union[str, None] = "004_pgvector_embeddings"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    job_status = postgresql.ENUM(
+        "QUEUED", "RUNNING", "COMPLETED", "FAILED", name="jobstatus", create_type=False
+    )
+    job_status.create(op.get_bind(), checkfirst=True)
+
+    op.create_table(
+        "processing_jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(50), nullable=False),
+        sa.Column("content_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("status", job_status, nullable=False, server_default="QUEUED"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("max_attempts", sa.Integer(), nullable=False, server_default="3"),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("run_after", sa.DateTime(), nullable=False, server_default=sa.text("NOW()")),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("NOW()")),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.ForeignKeyConstraint(["content_id"], ["content_items.id"], ondelete="CASCADE"),
+    )
+    op.create_index("ix_processing_jobs_kind", "processing_jobs", ["kind"])
+    op.create_index("ix_processing_jobs_content_id", "processing_jobs", ["content_id"])
+    op.create_index(
+        "ix_processing_jobs_status_run_after", "processing_jobs", ["status", "run_after"]
+    )
+
+    # Re-queue items whose in-memory processing task was lost
+    op.execute(
+        """
+        INSERT INTO processing_jobs (kind, content_id)
+        SELECT 'process_item', id FROM content_items
+        WHERE upper(status::text) IN ('PENDING', 'PROCESSING') AND raw_text IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_processing_jobs_status_run_after", table_name="processing_jobs")
+    op.drop_index("ix_processing_jobs_content_id", table_name="processing_jobs")
+    op.drop_index("ix_processing_jobs_kind", table_name="processing_jobs")
+    op.drop_table("processing_jobs")
+    op.execute("DROP TYPE IF EXISTS jobstatus")
@@ -0,0 +1,40 @@
+"""Add llm_cache table for cached summaries and topics.
+
+Revision ID: 006_llm_cache
+Revises: 005_processing_jobs
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "006_llm_cache"
+down_revision: Union[str, None] = "005_processing_jobs"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "llm_cache",
+        sa.Column("key", sa.String(64), nullable=False),
+        sa.Column("kind", sa.String(50), nullable=False),
+        sa.Column("model", sa.String(100), nullable=False),
+        sa.Column("value", sa.Text(), nullable=False),
+        sa.Column("hits", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("NOW()")),
+        sa.Column("last_used_at", sa.DateTime(), nullable=False, server_default=sa.text("NOW()")),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    op.create_index("ix_llm_cache_created_at", "llm_cache", ["created_at"])
+    op.create_index("ix_llm_cache_last_used_at", "llm_cache", ["last_used_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_llm_cache_last_used_at", table_name="llm_cache")
+    op.drop_index("ix_llm_cache_created_at", table_name="llm_cache")
+    op.drop_table("llm_cache")
@@ -0,0 +1,35 @@
+"""Add url_fetch_state table for conditional re-fetching.
+
+Revision ID: 007_url_fetch_state
+Revises: 006_llm_cache
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "007_url_fetch_state"
+down_revision: Union[str, None] = "006_llm_cache"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "url_fetch_state",
+        sa.Column("url_hash", sa.String(64), nullable=False),
+        sa.Column("etag", sa.String(500), nullable=True),
+        sa.Column("last_modified", sa.String(100), nullable=True),
+        sa.Column("content_hash", sa.String(64), nullable=True),
+        sa.Column("fetched_at", sa.DateTime(), nullable=False, server_default=sa.text("NOW()")),
+        sa.Column("checked_at", sa.DateTime(), nullable=False, server_default=sa.text("NOW()")),
+        sa.PrimaryKeyConstraint("url_hash"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("url_fetch_state")
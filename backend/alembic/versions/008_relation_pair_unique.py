@@ -0,0 +1,47 @@
+"""Add unique index on the unordered item_relations pair.
+
+Revision ID: 008_relation_pair_unique
+Revises: 007_url_fetch_state
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "008_relation_pair_unique"
+down_revision: Union[str, None] = "007_url_fetch_state"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep one relation per unordered pair: typed (EXTENDS, CONTRADICTS,
+    # REFERENCES) relations first, as only users create them, then
+    # full-confidence ones (manual RELATED/SIMILAR links), then the oldest
+    op.execute(
+        """
+        DELETE FROM item_relations
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY LEAST(source_id, target_id), GREATEST(source_id, target_id)
+                    ORDER BY relation_type NOT IN ('RELATED', 'SIMILAR') DESC,
+                             confidence >= 1.0 DESC,
+                             id
+                ) AS rank
+                FROM item_relations
+            ) ranked
+            WHERE rank > 1
+        )
+        """
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX uq_item_relations_pair "
+        "ON item_relations (LEAST(source_id, target_id), GREATEST(source_id, target_id))"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_item_relations_pair", table_name="item_relations")
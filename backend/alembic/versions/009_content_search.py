@@ -0,0 +1,50 @@
+"""Add generated full-text search vector to content_items.
+
+Revision ID: 009_content_search
+Revises: 008_relation_pair_unique
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "009_content_search"
+down_revision: Union[str, None] = "008_relation_pair_unique"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Title (weight A) and summary (weight B), German and English stemming
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('german'::regconfig, coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('german'::regconfig, coalesce(summary, '')), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(summary, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    op.add_column(
+        "content_items",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR_SQL, persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_content_items_search_vector",
+        "content_items",
+        ["search_vector"],
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_content_items_search_vector", table_name="content_items")
+    op.drop_column("content_items", "search_vector")
@@ -0,0 +1,39 @@
+"""Add pg_trgm trigram indexes on content_items title and source.
+
+Revision ID: 010_trigram_search
+Revises: 009_content_search
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "010_trigram_search"
+down_revision: Union[str, None] = "009_content_search"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_content_items_title_trgm",
+        "content_items",
+        ["title"],
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_content_items_source_trgm",
+        "content_items",
+        ["source"],
+        postgresql_using="gin",
+        postgresql_ops={"source": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_content_items_source_trgm", table_name="content_items")
+    op.drop_index("ix_content_items_title_trgm", table_name="content_items")
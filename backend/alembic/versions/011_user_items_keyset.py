@@ -0,0 +1,24 @@
+"""Add a (user_id, created_at, id) index for keyset pagination of user items.
+
+Revision ID: 011_user_items_keyset
+Revises: 010_trigram_search
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "011_user_items_keyset"
+down_revision: Union[str, None] = "010_trigram_search"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_user_items_user_created", "user_items", ["user_id", "created_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_items_user_created", table_name="user_items")
@@ -0,0 +1,37 @@
+"""Mark automatically derived item relations.
+
+Revision ID: 012_relation_auto_flag
+Revises: 011_user_items_keyset
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "012_relation_auto_flag"
+down_revision: Union[str, None] = "011_user_items_keyset"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "item_relations",
+        sa.Column("auto_generated", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+    # Existing rows carry no origin: the pipeline only writes RELATED and
+    # SIMILAR with a computed confidence, manual links default to 1.0
+    op.execute(
+        """
+        UPDATE item_relations SET auto_generated = true
+        WHERE relation_type IN ('RELATED', 'SIMILAR') AND confidence < 1.0
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("item_relations", "auto_generated")
@@ -0,0 +1,26 @@
+"""Add an index on lower(topics.name) for case-insensitive topic lookups.
+
+Revision ID: 013_topic_name_lower
+Revises: 012_relation_auto_flag
+Create Date: 2026-10-16
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "013_topic_name_lower"
+down_revision: Union[str, None] = "012_relation_auto_flag"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_topics_name_lower", "topics", [sa.text("lower(name)")])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_topics_name_lower", table_name="topics")
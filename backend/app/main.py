@@ -1,19 +1,50 @@
+import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.database import init_db
+from app.database import async_session_maker, engine, init_db
 from app.routers import admin, auth, ingest, items, topics, user_items, vault, weekly
+from app.services import fetcher, html_extraction, llm_client
+from app.services.topic_index import warm_topic_index
+from app.services.vector_index import save_vector_index, warm_vector_index
+from app.worker import Worker
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await init_db()
+    llm_client.start()
+    fetcher.start()
+    html_extraction.start(settings.extraction_workers)
+    try:
+        async with async_session_maker() as db:
+            await warm_vector_index(db)
+    except Exception as e:
+        logger.error(f"Failed to warm vector index: {e}")
+    try:
+        async with async_session_maker() as db:
+            await warm_topic_index(db)
+    except Exception as e:
+        logger.error(f"Failed to warm topic index: {e}")
+
+    worker = Worker() if settings.worker_in_process else None
+    if worker:
+        worker.start()
     yield
     # Shutdown
+    if worker:
+        await worker.stop()
+    save_vector_index(force=True)
+    await llm_client.close()
+    await fetcher.close()
+    html_extraction.shutdown()
+    await engine.dispose()
 
 
 app = FastAPI(
@@ -7,6 +7,9 @@ from app.models.content import (
     Topic,
     WeeklySummary,
 )
+from app.models.fetch_state import UrlFetchState
+from app.models.job import JobStatus, ProcessingJob
+from app.models.llm_cache import LLMCacheEntry
 from app.models.user import RefreshToken, User, UserItem, UserVaultEntry
 
 __all__ = [
@@ -17,6 +20,10 @@ __all__ = [
     "RelationType",
     "Topic",
     "WeeklySummary",
+    "JobStatus",
+    "ProcessingJob",
+    "LLMCacheEntry",
+    "UrlFetchState",
     "User",
     "UserItem",
     "UserVaultEntry",
@@ -12,12 +12,47 @@ import enum
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Enum, Float, ForeignKey, Integer, String, Table, Text
-from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Computed,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Table,
+    Text,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.config import settings
 from app.database import Base
 
+USE_PGVECTOR = settings.embedding_storage == "pgvector"
+
+# Full-text search: title (weight A) and summary (weight B), indexed with
+# both the German and the English configuration so either language stems
+SEARCH_CONFIGS = ("german", "english")
+SEARCH_VECTOR_SQL = " || ".join(
+    f"setweight(to_tsvector('{config}'::regconfig, coalesce({column}, '')), '{weight}')"
+    for column, weight in (("title", "A"), ("summary", "B"))
+    for config in SEARCH_CONFIGS
+)
+
+if USE_PGVECTOR:
+    try:
+        from pgvector.sqlalchemy import Vector
+    except ImportError as e:
+        raise ImportError(
+            "EMBEDDING_STORAGE=pgvector requires the pgvector package: "
+            "pip install 'vibedinsight-backend[pgvector]'"
+        ) from e
+
 
 class ContentType(str, enum.Enum):
     LINK = "link"
@@ -64,6 +99,8 @@ class Topic(Base):
     """Global topics shared across all users."""
 
     __tablename__ = "topics"
+    # Topic lookups match names case-insensitively
+    __table_args__ = (Index("ix_topics_name_lower", text("lower(name)")),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100), unique=True, index=True)
@@ -107,6 +144,11 @@ class ContentItem(Base):
     raw_text: Mapped[str | None] = mapped_column(Text, nullable=True)
     summary: Mapped[str | None] = mapped_column(Text, nullable=True)
 
+    # Full-text search document, generated by Postgres from title + summary
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True), nullable=True, deferred=True
+    )
+
     # Reference counting for garbage collection
     ref_count: Mapped[int] = mapped_column(Integer, default=1, index=True)
 
@@ -133,6 +175,23 @@ class ContentItem(Base):
         cascade="all, delete-orphan",
     )
 
+    __table_args__ = (
+        Index("ix_content_items_search_vector", "search_vector", postgresql_using="gin"),
+        # Trigram indexes for fuzzy search (pg_trgm)
+        Index(
+            "ix_content_items_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_content_items_source_trgm",
+            "source",
+            postgresql_using="gin",
+            postgresql_ops={"source": "gin_trgm_ops"},
+        ),
+    )
+
 
 class WeeklySummary(Base):
     """
@@ -170,6 +229,16 @@ class ItemRelation(Base):
     """Pseudo-Graph: Relations between content items."""
 
     __tablename__ = "item_relations"
+    __table_args__ = (
+        # At most one relation per unordered pair, so inserts can skip
+        # existing pairs (in either direction) with ON CONFLICT DO NOTHING
+        Index(
+            "uq_item_relations_pair",
+            text("LEAST(source_id, target_id)"),
+            text("GREATEST(source_id, target_id)"),
+            unique=True,
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     source_id: Mapped[uuid.UUID] = mapped_column(
@@ -186,6 +255,11 @@ class ItemRelation(Base):
         Enum(RelationType), default=RelationType.RELATED
     )
     confidence: Mapped[float] = mapped_column(Float, default=1.0)
+    # Derived by the pipeline (topic overlap, embedding similarity) rather
+    # than created by a user; only these are refreshed, rebuilt or replaced
+    auto_generated: Mapped[bool] = mapped_column(
+        Boolean, default=False, server_default=text("false")
+    )
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     # Relationships
@@ -206,6 +280,18 @@ class ContentEmbedding(Base):
     """
 
     __tablename__ = "content_embeddings"
+    __table_args__ = (
+        (
+            Index(
+                f"ix_content_embeddings_embedding_{settings.pgvector_index_type}",
+                "embedding",
+                postgresql_using=settings.pgvector_index_type,
+                postgresql_ops={"embedding": "vector_cosine_ops"},
+            ),
+        )
+        if USE_PGVECTOR
+        else ()
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     content_id: Mapped[uuid.UUID] = mapped_column(
@@ -216,8 +302,11 @@ class ContentEmbedding(Base):
     )
 
     # Embedding vector (768 dimensions for nomic-embed-text)
-    # Stored as array of floats
-    embedding: Mapped[list[float]] = mapped_column(ARRAY(Float), nullable=False)
+    # Stored as array of floats, or as a pgvector vector(n) in pgvector mode
+    embedding: Mapped[list[float]] = mapped_column(
+        Vector(settings.embedding_dimensions) if USE_PGVECTOR else ARRAY(Float),
+        nullable=False,
+    )
 
     # Model used to generate embedding (for versioning)
     model: Mapped[str] = mapped_column(String(100), default="nomic-embed-text")
@@ -0,0 +1,31 @@
+"""
+HTTP validators of the last fetch of each URL.
+
+Lets the extractor send conditional requests (If-None-Match /
+If-Modified-Since) and detect byte-identical bodies, so re-fetching an
+unchanged page skips extraction and LLM processing.
+
+Privacy Design:
+- Keyed by url_hash like content_items, no user reference
+"""
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class UrlFetchState(Base):
+    """ETag, Last-Modified and body hash from the last successful fetch of a URL."""
+
+    __tablename__ = "url_fetch_state"
+
+    url_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    etag: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    last_modified: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+
+    fetched_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    checked_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,35 @@
+"""
+Persistent cache of LLM outputs (summaries, topics).
+
+Keyed by a hash of (normalized input text, prompt template, model), so
+reprocessing byte-identical content with the same prompt and model never
+calls Ollama again, while any change to the text, template or model
+misses the cache.
+
+Privacy Design:
+- Only a hash of the input text is stored, never the text itself
+- Outputs are the same anonymous summaries/topics stored on content items
+"""
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class LLMCacheEntry(Base):
+    """One cached LLM output."""
+
+    __tablename__ = "llm_cache"
+
+    # sha256 over (kind, text hash, template hash, model)
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(50))
+    model: Mapped[str] = mapped_column(String(100))
+    value: Mapped[str] = mapped_column(Text)
+
+    hits: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    last_used_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
@@ -26,6 +26,7 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -201,7 +202,11 @@ class UserItem(Base):
     content: Mapped[ContentItem] = relationship("ContentItem")
 
     # Unique constraint: one entry per content per user
-    __table_args__ = (UniqueConstraint("user_id", "content_id", name="uq_user_item_content"),)
+    # The index serves keyset pagination of a user's items by date
+    __table_args__ = (
+        UniqueConstraint("user_id", "content_id", name="uq_user_item_content"),
+        Index("ix_user_items_user_created", "user_id", "created_at", "id"),
+    )
 
 
 if TYPE_CHECKING:
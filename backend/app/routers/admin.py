@@ -12,13 +12,13 @@ import traceback
 import uuid
 from datetime import datetime
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy import func, select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.database import get_db
+from app.database import async_session_maker, get_db
 from app.dependencies import get_dev_or_current_user
 from app.models.content import (
     ContentEmbedding,
@@ -26,17 +26,28 @@ from app.models.content import (
     ItemRelation,
     ProcessingStatus,
     RelationType,
-    Topic,
-    content_topics,
 )
+from app.models.job import JobStatus, ProcessingJob
+from app.models.llm_cache import LLMCacheEntry
 from app.models.user import User
+from app.services import graph, llm_cache, similarity
 from app.services.embeddings import (
     check_embedding_model_available,
-    cosine_similarity,
+    content_embedding_text,
     generate_embedding_for_content,
+    generate_embeddings,
+    store_embeddings,
 )
-from app.services.extractor import extract_from_url
-from app.services.summarizer import extract_topics, generate_summary
+from app.services.extractor import extract_from_url, save_fetch_state
+from app.services.jobs import get_job_counts
+from app.services.relations import (
+    SIMILARITY_THRESHOLD,
+    rebuild_topic_relations,
+    refresh_topic_relations,
+)
+from app.services.summarizer import generate_summary_and_topics
+from app.services.topic_index import get_topic_index
+from app.services.topics import add_item_topics
 
 # Configure logging
 logging.basicConfig(
@@ -69,68 +80,17 @@ class ReprocessStatus(BaseModel):
 # Track batch processing status
 _batch_status: dict[str, list[ReprocessStatus]] = {}
 
+# Rows per multi-row relation INSERT (5 parameters each, below asyncpg's 32767 limit)
+RELATION_INSERT_CHUNK_SIZE = 5000
 
-async def _calculate_relations_for_item(item: ContentItem, db: AsyncSession):
-    """Calculate relations to other items based on shared topics."""
-    if not item.topics:
-        return 0
-
-    item_topic_ids = {t.id for t in item.topics}
-    if not item_topic_ids:
-        return 0
-
-    from sqlalchemy import and_
-
-    # Query for items sharing topics (excluding self)
-    shared_items_query = (
-        select(
-            content_topics.c.content_id, func.count(content_topics.c.topic_id).label("shared_count")
-        )
-        .where(
-            and_(
-                content_topics.c.topic_id.in_(item_topic_ids),
-                content_topics.c.content_id != item.id,
-            )
-        )
-        .group_by(content_topics.c.content_id)
-        .having(func.count(content_topics.c.topic_id) >= 2)
-    )
-
-    result = await db.execute(shared_items_query)
-    shared_items = result.all()
-
-    relations_created = 0
-    for related_id, shared_count in shared_items:
-        # Check if relation already exists
-        existing = await db.execute(
-            select(ItemRelation).where(
-                ((ItemRelation.source_id == item.id) & (ItemRelation.target_id == related_id))
-                | ((ItemRelation.source_id == related_id) & (ItemRelation.target_id == item.id))
-            )
-        )
-        if existing.scalar_one_or_none():
-            continue
-
-        # Calculate confidence based on topic overlap
-        confidence = min(shared_count / len(item_topic_ids), 1.0)
-
-        relation = ItemRelation(
-            source_id=item.id,
-            target_id=related_id,
-            relation_type=RelationType.RELATED,
-            confidence=confidence,
-        )
-        db.add(relation)
-        relations_created += 1
-
-    return relations_created
 
+async def _reprocess_single_item(item_id: uuid.UUID, batch_id: str, force: bool = False):
+    """
+    Reprocess a single content item: re-fetch URL, regenerate topics.
 
-async def _reprocess_single_item(item_id: uuid.UUID, db_url: str, batch_id: str):
-    """Reprocess a single content item: re-fetch URL, regenerate topics."""
-    engine = create_async_engine(db_url)
-    async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-
+    Unless force is set, the URL is fetched conditionally and a completed
+    item whose page hasn't changed is left as is (status "unchanged").
+    """
     status = ReprocessStatus(
         item_id=str(item_id),
         status="processing",
@@ -138,7 +98,7 @@ async def _reprocess_single_item(item_id: uuid.UUID, db_url: str, batch_id: str)
     )
 
     try:
-        async with async_session() as db:
+        async with async_session_maker() as db:
             # Get item
             query = (
                 select(ContentItem)
@@ -166,7 +126,18 @@ async def _reprocess_single_item(item_id: uuid.UUID, db_url: str, batch_id: str)
             try:
                 # Re-fetch content from URL
                 logger.info(f"Reprocessing item {item_id}: fetching {item.url}")
-                extracted = await extract_from_url(item.url)
+                extracted = await extract_from_url(
+                    item.url,
+                    url_hash=item.url_hash,
+                    conditional=not force and item.status == ProcessingStatus.COMPLETED,
+                )
+
+                if extracted["unchanged"]:
+                    await save_fetch_state(db, extracted["fetch_state"])
+                    await db.commit()
+                    status.status = "unchanged"
+                    logger.info(f"Item {item_id}: content unchanged, skipping")
+                    return
 
                 if not extracted["text"]:
                     status.status = "failed"
@@ -182,53 +153,26 @@ async def _reprocess_single_item(item_id: uuid.UUID, db_url: str, batch_id: str)
                 item.topics.clear()
                 await db.flush()
 
-                # Generate new summary
-                logger.info(f"Item {item_id}: generating summary...")
-                summary = await generate_summary(extracted["text"])
+                # Generate new summary and topics
+                logger.info(f"Item {item_id}: generating summary and topics...")
+                summary, topic_names = await generate_summary_and_topics(extracted["text"])
                 item.summary = summary
-
-                # Extract new topics
-                logger.info(f"Item {item_id}: extracting topics...")
-                existing_query = select(Topic.name)
-                existing_result = await db.execute(existing_query)
-                existing_topics = [t[0] for t in existing_result.all()]
-
-                topic_names = await extract_topics(extracted["text"], existing_topics)
                 logger.info(f"Item {item_id}: extracted topics: {topic_names}")
 
-                # Add topics
-                for topic_name in topic_names:
-                    topic_query = select(Topic).where(Topic.name == topic_name)
-                    topic_result = await db.execute(topic_query)
-                    topic = topic_result.scalar_one_or_none()
-
-                    if not topic:
-                        topic = Topic(name=topic_name)
-                        db.add(topic)
-                        await db.flush()
-
-                    if topic not in item.topics:
-                        item.topics.append(topic)
+                # Add topics (bulk)
+                topic_ids = await add_item_topics(db, item_id, topic_names)
 
                 item.status = ProcessingStatus.COMPLETED
                 item.processed_at = datetime.utcnow()
 
-                await db.commit()
+                # Recompute relations for the new topic set
+                await refresh_topic_relations([item_id], db)
 
-                # Calculate relations
-                async with async_session() as db2:
-                    query2 = (
-                        select(ContentItem)
-                        .options(selectinload(ContentItem.topics))
-                        .where(ContentItem.id == item_id)
-                    )
-                    result2 = await db2.execute(query2)
-                    item2 = result2.scalar_one_or_none()
-
-                    if item2:
-                        relations = await _calculate_relations_for_item(item2, db2)
-                        await db2.commit()
-                        logger.info(f"Item {item_id}: created {relations} relations")
+                # Validators only count once the new content was processed
+                await save_fetch_state(db, extracted["fetch_state"])
+                await db.commit()
+                graph.invalidate()
+                get_topic_index().set_topics(item_id, topic_ids)
 
                 status.status = "completed"
                 logger.info(f"Item {item_id}: reprocessing COMPLETED")
@@ -245,16 +189,17 @@ async def _reprocess_single_item(item_id: uuid.UUID, db_url: str, batch_id: str)
         status.status = "failed"
         status.error = str(e)[:200]
     finally:
-        await engine.dispose()
         _batch_status[batch_id].append(status)
 
 
-async def _run_batch_reprocess(item_ids: list[uuid.UUID], db_url: str, batch_id: str):
+async def _run_batch_reprocess(item_ids: list[uuid.UUID], batch_id: str, force: bool = False):
     """Run batch reprocess for multiple items."""
     logger.info(f"Starting batch reprocess {batch_id} for {len(item_ids)} items")
 
     for item_id in item_ids:
-        await _reprocess_single_item(item_id, db_url, batch_id)
+        await _reprocess_single_item(item_id, batch_id, force)
+        if _batch_status[batch_id] and _batch_status[batch_id][-1].status == "unchanged":
+            continue
         # Small delay to avoid overwhelming the LLM service
         await asyncio.sleep(2)
 
@@ -264,6 +209,7 @@ async def _run_batch_reprocess(item_ids: list[uuid.UUID], db_url: str, batch_id:
 @router.post("/reprocess-all", response_model=BatchReprocessResponse)
 async def reprocess_all_items(
     background_tasks: BackgroundTasks,
+    force: bool = Query(False, description="Reprocess even if the page is unchanged"),
     user: User = Depends(get_dev_or_current_user),
     db: AsyncSession = Depends(get_db),
 ):
@@ -271,7 +217,8 @@ async def reprocess_all_items(
     Reprocess all content items with URLs.
 
     This will:
-    1. Re-fetch content from stored URLs
+    1. Re-fetch content from stored URLs (conditionally, unchanged pages
+       of completed items are skipped unless force=true)
     2. Regenerate summaries
     3. Re-extract topics
     4. Recalculate relations
@@ -292,14 +239,9 @@ async def reprocess_all_items(
     batch_id = str(uuid.uuid4())
     _batch_status[batch_id] = []
 
-    # Get database URL
-    from app.config import settings
-
-    db_url = settings.database_url
-
     # Queue background task
     item_ids = [item.id for item in items]
-    background_tasks.add_task(_run_batch_reprocess, item_ids, db_url, batch_id)
+    background_tasks.add_task(_run_batch_reprocess, item_ids, batch_id, force)
 
     return BatchReprocessResponse(
         message=f"Batch reprocess started. Batch ID: {batch_id}",
@@ -312,6 +254,7 @@ async def reprocess_all_items(
 async def reprocess_single(
     content_id: uuid.UUID,
     background_tasks: BackgroundTasks,
+    force: bool = Query(False, description="Reprocess even if the page is unchanged"),
     user: User = Depends(get_dev_or_current_user),
     db: AsyncSession = Depends(get_db),
 ):
@@ -331,9 +274,7 @@ async def reprocess_single(
     batch_id = str(uuid.uuid4())
     _batch_status[batch_id] = []
 
-    from app.config import settings
-
-    background_tasks.add_task(_reprocess_single_item, content_id, settings.database_url, batch_id)
+    background_tasks.add_task(_reprocess_single_item, content_id, batch_id, force)
 
     return {
         "message": f"Reprocessing started for {content_id}",
@@ -354,6 +295,7 @@ async def get_reprocess_status(
     completed = sum(1 for s in statuses if s.status == "completed")
     failed = sum(1 for s in statuses if s.status == "failed")
     skipped = sum(1 for s in statuses if s.status == "skipped")
+    unchanged = sum(1 for s in statuses if s.status == "unchanged")
 
     return {
         "batch_id": batch_id,
@@ -361,10 +303,92 @@ async def get_reprocess_status(
         "completed": completed,
         "failed": failed,
         "skipped": skipped,
+        "unchanged": unchanged,
         "items": [s.model_dump() for s in statuses],
     }
 
 
+@router.get("/jobs")
+async def list_jobs(
+    status: JobStatus | None = Query(None, description="Only jobs with this status"),
+    limit: int = Query(50, ge=1, le=500),
+    user: User = Depends(get_dev_or_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Show the background job queue.
+
+    Returns job counts per kind and status, plus the most recent jobs
+    (queued and running ones by default).
+    """
+    query = select(ProcessingJob).order_by(ProcessingJob.id.desc()).limit(limit)
+    if status is not None:
+        query = query.where(ProcessingJob.status == status)
+    else:
+        query = query.where(ProcessingJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]))
+    result = await db.execute(query)
+    jobs = result.scalars().all()
+
+    return {
+        "counts": await get_job_counts(db),
+        "jobs": [
+            {
+                "id": job.id,
+                "kind": job.kind,
+                "content_id": str(job.content_id) if job.content_id else None,
+                "status": job.status.value,
+                "attempts": job.attempts,
+                "max_attempts": job.max_attempts,
+                "run_after": job.run_after,
+                "locked_until": job.locked_until,
+                "last_error": job.last_error,
+                "created_at": job.created_at,
+            }
+            for job in jobs
+        ],
+    }
+
+
+@router.get("/llm-cache")
+async def get_llm_cache_stats(
+    user: User = Depends(get_dev_or_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Show the LLM result cache.
+
+    Returns entry counts per kind and hit/miss counters of this process
+    since startup.
+    """
+    from app.config import settings
+
+    result = await db.execute(
+        select(LLMCacheEntry.kind, func.count(), func.sum(LLMCacheEntry.hits)).group_by(
+            LLMCacheEntry.kind
+        )
+    )
+    entries = {kind: {"entries": count, "hits": hits or 0} for kind, count, hits in result.all()}
+
+    return {
+        "enabled": settings.llm_cache_enabled,
+        "model": settings.ollama_model,
+        "entries": entries,
+        "process": llm_cache.get_stats(),
+    }
+
+
+@router.post("/llm-cache/prune")
+async def prune_llm_cache(
+    max_entries: int | None = Query(None, ge=0, description="Default: LLM_CACHE_MAX_ENTRIES"),
+    max_age_days: int | None = Query(None, ge=0, description="Default: LLM_CACHE_MAX_AGE_DAYS"),
+    user: User = Depends(get_dev_or_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Evict old and least recently used LLM cache entries (max_entries=0 clears it)."""
+    evicted = await llm_cache.prune(db, max_entries=max_entries, max_age_days=max_age_days)
+    return {"message": f"Evicted {evicted} cache entries", "evicted": evicted}
+
+
 @router.delete("/relations")
 async def clear_all_relations(
     user: User = Depends(get_dev_or_current_user),
@@ -375,6 +399,7 @@ async def clear_all_relations(
 
     result = await db.execute(delete(ItemRelation))
     await db.commit()
+    graph.invalidate()
 
     return {"message": f"Deleted {result.rowcount} relations"}
 
@@ -385,31 +410,22 @@ async def rebuild_all_relations(
     user: User = Depends(get_dev_or_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Rebuild all relations based on shared topics."""
-    # Clear existing relations
-    from sqlalchemy import delete
-
-    await db.execute(delete(ItemRelation))
-    await db.commit()
-
-    # Get all items with topics
-    query = (
-        select(ContentItem)
-        .options(selectinload(ContentItem.topics))
-        .where(ContentItem.status == ProcessingStatus.COMPLETED)
-    )
-    result = await db.execute(query)
-    items = result.scalars().all()
+    """
+    Rebuild all relations based on shared topics.
 
-    total_relations = 0
-    for item in items:
-        relations = await _calculate_relations_for_item(item, db)
-        total_relations += relations
+    Existing automatic relations are replaced in one transaction; the
+    topic-overlap relations are computed by a single set-based
+    INSERT ... SELECT. Relations created by users are kept.
+    """
+    from sqlalchemy import delete
 
+    await db.execute(delete(ItemRelation).where(ItemRelation.auto_generated))
+    total_relations = await rebuild_topic_relations(db)
     await db.commit()
+    graph.invalidate()
 
     return {
-        "message": f"Rebuilt relations for {len(items)} items",
+        "message": f"Rebuilt {total_relations} topic relations",
         "relations_created": total_relations,
     }
 
@@ -418,8 +434,6 @@ async def rebuild_all_relations(
 # Embedding Endpoints
 # ============================================================================
 
-SIMILARITY_THRESHOLD = 0.7  # Minimum similarity to create a relation
-
 
 async def _generate_embedding_for_item(
     item_id: uuid.UUID,
@@ -446,84 +460,11 @@ async def _generate_embedding_for_item(
         logger.error(f"Failed to generate embedding for item {item_id}")
         return False
 
-    # Store or update embedding
-    existing_query = select(ContentEmbedding).where(ContentEmbedding.content_id == item_id)
-    existing_result = await db.execute(existing_query)
-    existing = existing_result.scalar_one_or_none()
-
-    from app.config import settings
-
-    if existing:
-        existing.embedding = embedding
-        existing.model = settings.ollama_embedding_model
-        existing.updated_at = datetime.utcnow()
-    else:
-        new_embedding = ContentEmbedding(
-            content_id=item_id,
-            embedding=embedding,
-            model=settings.ollama_embedding_model,
-        )
-        db.add(new_embedding)
-
-    await db.commit()
+    await store_embeddings(db, {item_id: embedding})
     logger.info(f"Embedding generated for item {item_id}")
     return True
 
 
-async def _calculate_similarity_relations(
-    item_id: uuid.UUID,
-    db: AsyncSession,
-    threshold: float = SIMILARITY_THRESHOLD,
-) -> int:
-    """Calculate relations based on embedding similarity."""
-    # Get item's embedding
-    query = select(ContentEmbedding).where(ContentEmbedding.content_id == item_id)
-    result = await db.execute(query)
-    item_embedding = result.scalar_one_or_none()
-
-    if not item_embedding:
-        return 0
-
-    # Get all other embeddings
-    others_query = select(ContentEmbedding).where(ContentEmbedding.content_id != item_id)
-    others_result = await db.execute(others_query)
-    other_embeddings = others_result.scalars().all()
-
-    relations_created = 0
-    for other in other_embeddings:
-        # Calculate cosine similarity
-        similarity = cosine_similarity(item_embedding.embedding, other.embedding)
-
-        if similarity < threshold:
-            continue
-
-        # Check if relation already exists
-        src_to_tgt = (ItemRelation.source_id == item_id) & (
-            ItemRelation.target_id == other.content_id
-        )
-        tgt_to_src = (ItemRelation.source_id == other.content_id) & (
-            ItemRelation.target_id == item_id
-        )
-        existing = await db.execute(select(ItemRelation).where(src_to_tgt | tgt_to_src))
-        if existing.scalar_one_or_none():
-            continue
-
-        # Create relation with SIMILAR type
-        relation = ItemRelation(
-            source_id=item_id,
-            target_id=other.content_id,
-            relation_type=RelationType.SIMILAR,
-            confidence=similarity,
-        )
-        db.add(relation)
-        relations_created += 1
-        logger.info(
-            f"Created SIMILAR relation: {item_id} <-> {other.content_id} (score: {similarity:.3f})"
-        )
-
-    return relations_created
-
-
 @router.get("/embeddings/check")
 async def check_embeddings_ready(
     user: User = Depends(get_dev_or_current_user),
@@ -559,28 +500,37 @@ async def generate_all_embeddings(
             detail=f"Embedding model not available. Pull with: ollama pull {model}",
         )
 
-    # Get all completed items
-    query = select(ContentItem).where(ContentItem.status == ProcessingStatus.COMPLETED)
+    # Get all completed items (only the columns needed for the embedding text)
+    query = select(ContentItem.id, ContentItem.title, ContentItem.summary).where(
+        ContentItem.status == ProcessingStatus.COMPLETED
+    )
     result = await db.execute(query)
-    items = result.scalars().all()
+    items = result.all()
 
     if not items:
         return {"message": "No completed items found", "total": 0}
 
-    # Generate embeddings synchronously (to track progress)
+    from app.config import settings
+
+    embeddable = [item for item in items if item.title or item.summary]
+    failed = len(items) - len(embeddable)
     success = 0
-    failed = 0
-    for item in items:
-        try:
-            if await _generate_embedding_for_item(item.id, db):
-                success += 1
-            else:
-                failed += 1
-        except Exception as e:
-            logger.error(f"Embedding failed for {item.id}: {e}")
-            failed += 1
-        # Small delay to avoid overwhelming Ollama
-        await asyncio.sleep(0.5)
+
+    # Embed in chunks so only one chunk of vectors is held in memory at a time;
+    # each chunk is split into concurrent multi-input embed requests
+    chunk_size = settings.embedding_batch_size * settings.embedding_concurrency * 4
+    for start in range(0, len(embeddable), chunk_size):
+        chunk = embeddable[start : start + chunk_size]
+        vectors = await generate_embeddings(
+            [content_embedding_text(item.title, item.summary) for item in chunk]
+        )
+
+        embeddings = {item.id: vec for item, vec in zip(chunk, vectors) if vec}
+        await store_embeddings(db, embeddings)
+
+        success += len(embeddings)
+        failed += len(chunk) - len(embeddings)
+        logger.info(f"Embeddings: {success + failed}/{len(items)} done ({failed} failed)")
 
     return {
         "message": f"Generated embeddings for {success} items ({failed} failed)",
@@ -608,6 +558,7 @@ async def generate_single_embedding(
 @router.post("/relations/rebuild-from-embeddings")
 async def rebuild_relations_from_embeddings(
     threshold: float = SIMILARITY_THRESHOLD,
+    top_k: int | None = Query(None, ge=1, description="Max similar items per item"),
     user: User = Depends(get_dev_or_current_user),
     db: AsyncSession = Depends(get_db),
 ):
@@ -615,34 +566,60 @@ async def rebuild_relations_from_embeddings(
     Rebuild relations based on embedding similarity.
 
     This creates SIMILAR-type relations between items with
-    high semantic similarity.
+    high semantic similarity. All embeddings are loaded once and
+    compared with blocked matrix multiplies.
     """
-    # Clear existing SIMILAR relations
+    # Clear existing automatic SIMILAR relations
     from sqlalchemy import delete
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
 
-    await db.execute(delete(ItemRelation).where(ItemRelation.relation_type == RelationType.SIMILAR))
+    await db.execute(
+        delete(ItemRelation).where(
+            ItemRelation.relation_type == RelationType.SIMILAR,
+            ItemRelation.auto_generated,
+        )
+    )
     await db.commit()
 
     # Get all embeddings
-    query = select(ContentEmbedding)
+    query = select(ContentEmbedding.content_id, ContentEmbedding.embedding)
     result = await db.execute(query)
-    embeddings = result.scalars().all()
+    embeddings = result.all()
 
     if not embeddings:
         return {"message": "No embeddings found. Generate them first.", "relations": 0}
 
+    matrix, kept = similarity.build_matrix([row.embedding for row in embeddings])
+    content_ids = [embeddings[i].content_id for i in kept]
+    pairs = similarity.similar_pairs(matrix, threshold, k=top_k)
+
+    new_relations = [
+        {
+            "source_id": content_ids[i],
+            "target_id": content_ids[j],
+            "relation_type": RelationType.SIMILAR,
+            "confidence": score,
+            "auto_generated": True,
+        }
+        for i, j, score in pairs
+    ]
+
+    # Pairs that already have a (non-SIMILAR) relation are skipped by the unique pair index
     total_relations = 0
-    for emb in embeddings:
-        relations = await _calculate_similarity_relations(emb.content_id, db, threshold)
-        total_relations += relations
-
+    for start in range(0, len(new_relations), RELATION_INSERT_CHUNK_SIZE):
+        chunk = new_relations[start : start + RELATION_INSERT_CHUNK_SIZE]
+        result = await db.execute(pg_insert(ItemRelation).values(chunk).on_conflict_do_nothing())
+        total_relations += result.rowcount
     await db.commit()
+    graph.invalidate()
+
+    logger.info(f"Created {total_relations} SIMILAR relations from {len(kept)} embeddings")
 
     return {
         "message": f"Created {total_relations} similarity-based relations",
         "relations": total_relations,
         "threshold": threshold,
-        "items_processed": len(embeddings),
+        "items_processed": len(kept),
     }
 
 
@@ -8,39 +8,41 @@ Privacy Design:
 - User-content mapping is handled by the vault (encrypted)
 """
 
-import asyncio
 import hashlib
 import logging
 import sys
-import traceback
 import uuid
-from datetime import datetime
 from urllib.parse import urlparse
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.database import get_db
 from app.dependencies import get_dev_or_current_user
-from app.models.content import (
-    ContentItem,
-    ContentType,
-    ItemRelation,
-    ProcessingStatus,
-    RelationType,
-    Topic,
-)
+from app.models.content import ContentItem, ContentType, ProcessingStatus
 from app.models.user import User, UserItem
 from app.schemas import (
     ContentItemResponse,
+    IngestBatchItem,
+    IngestBatchResponse,
     IngestContentResponse,
     IngestTextRequest,
     IngestURLRequest,
+    IngestURLsRequest,
+)
+from app.services.extractor import extract_from_url, save_fetch_state
+from app.services.fetcher import ResponseTooLargeError, UnsupportedContentTypeError
+from app.services.jobs import (
+    JOB_FETCH_ITEM,
+    JOB_PROCESS_ITEM,
+    enqueue_job,
+    enqueue_jobs,
+    notify_workers,
 )
-from app.services.extractor import extract_from_url
-from app.services.summarizer import extract_topics, generate_summary
+from app.services.url_import import parse_url_list
 
 # Configure logging
 logging.basicConfig(
@@ -75,173 +77,15 @@ def hash_url(url: str) -> str:
     return hashlib.sha256(normalized.encode()).hexdigest()
 
 
-async def _calculate_relations(item: ContentItem, db: AsyncSession):
-    """Calculate relations to other items based on shared topics."""
-    if not item.topics:
-        return
-
-    item_topic_ids = {t.id for t in item.topics}
-    if not item_topic_ids:
-        return
-
-    # Find other items that share at least 2 topics
-    from sqlalchemy import and_, func
-
-    from app.models.content import content_topics
-
-    # Query for items sharing topics (excluding self)
-    shared_items_query = (
-        select(
-            content_topics.c.content_id, func.count(content_topics.c.topic_id).label("shared_count")
-        )
-        .where(
-            and_(
-                content_topics.c.topic_id.in_(item_topic_ids),
-                content_topics.c.content_id != item.id,
-            )
-        )
-        .group_by(content_topics.c.content_id)
-        .having(func.count(content_topics.c.topic_id) >= 2)  # At least 2 shared topics
-    )
-
-    result = await db.execute(shared_items_query)
-    shared_items = result.all()
-
-    for related_id, shared_count in shared_items:
-        # Check if relation already exists
-        existing = await db.execute(
-            select(ItemRelation).where(
-                ((ItemRelation.source_id == item.id) & (ItemRelation.target_id == related_id))
-                | ((ItemRelation.source_id == related_id) & (ItemRelation.target_id == item.id))
-            )
-        )
-        if existing.scalar_one_or_none():
-            continue
-
-        # Calculate confidence based on topic overlap
-        confidence = min(shared_count / len(item_topic_ids), 1.0)
-
-        relation = ItemRelation(
-            source_id=item.id,
-            target_id=related_id,
-            relation_type=RelationType.RELATED,
-            confidence=confidence,
-        )
-        db.add(relation)
-
-    logger.info(f"Item {item.id}: created {len(shared_items)} relations")
-
-
-async def _process_item_async(item_id: uuid.UUID, db_url: str):
-    """Async background task to process a content item."""
-    logger.info(f"Starting processing for item {item_id}")
-    engine = create_async_engine(db_url)
-    async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-
-    try:
-        async with async_session() as db:
-            # Get item with topics eagerly loaded
-            query = (
-                select(ContentItem)
-                .options(selectinload(ContentItem.topics))
-                .where(ContentItem.id == item_id)
-            )
-            result = await db.execute(query)
-            item = result.scalar_one_or_none()
-
-            if not item or not item.raw_text:
-                logger.warning(f"Item {item_id} not found or has no text")
-                return
-
-            try:
-                item.status = ProcessingStatus.PROCESSING
-                await db.commit()
-                logger.info(f"Item {item_id}: status set to PROCESSING")
-
-                # Generate summary
-                logger.info(f"Item {item_id}: generating summary...")
-                summary = await generate_summary(item.raw_text)
-                item.summary = summary
-                logger.info(f"Item {item_id}: summary generated")
-
-                # Extract topics
-                logger.info(f"Item {item_id}: extracting topics...")
-                existing_query = select(Topic.name)
-                existing_result = await db.execute(existing_query)
-                existing_topics = [t[0] for t in existing_result.all()]
-
-                topic_names = await extract_topics(item.raw_text, existing_topics)
-                logger.info(f"Item {item_id}: extracted topics: {topic_names}")
-
-                # Get or create topics and add to item
-                current_topic_ids = {t.id for t in item.topics}
-                for topic_name in topic_names:
-                    topic_query = select(Topic).where(Topic.name == topic_name)
-                    topic_result = await db.execute(topic_query)
-                    topic = topic_result.scalar_one_or_none()
-
-                    if not topic:
-                        topic = Topic(name=topic_name)
-                        db.add(topic)
-                        await db.flush()
-
-                    if topic.id not in current_topic_ids:
-                        item.topics.append(topic)
-                        current_topic_ids.add(topic.id)
-
-                item.status = ProcessingStatus.COMPLETED
-                item.processed_at = datetime.utcnow()
-
-                # Delete raw_text after processing (privacy: minimal data retention)
-                item.raw_text = None
-
-                await db.commit()
-
-                # Calculate relations to other items based on shared topics
-                await _calculate_relations(item, db)
-                await db.commit()
-
-                logger.info(f"Item {item_id}: processing COMPLETED successfully")
-
-            except Exception as e:
-                logger.error(f"Error processing item {item_id}: {e}")
-                logger.error(traceback.format_exc())
-                try:
-                    await db.rollback()
-                    result = await db.execute(select(ContentItem).where(ContentItem.id == item_id))
-                    item = result.scalar_one_or_none()
-                    if item:
-                        item.status = ProcessingStatus.FAILED
-                        await db.commit()
-                        logger.info(f"Item {item_id}: status set to FAILED")
-                except Exception as inner_e:
-                    logger.error(f"Failed to update item {item_id} status: {inner_e}")
-
-    except Exception as e:
-        logger.error(f"Fatal error in background task for item {item_id}: {e}")
-        logger.error(traceback.format_exc())
-    finally:
-        await engine.dispose()
-        logger.info(f"Item {item_id}: engine disposed")
-
-
-def _handle_task_result(task: asyncio.Task, item_id: uuid.UUID):
-    """Callback to handle task completion and log any exceptions."""
-    try:
-        exc = task.exception()
-        if exc:
-            logger.error(f"Task for item {item_id} failed: {exc}")
-    except asyncio.CancelledError:
-        logger.warning(f"Task for item {item_id} was cancelled")
-    except asyncio.InvalidStateError:
-        pass
-
+async def schedule_processing(item_id: uuid.UUID, db: AsyncSession):
+    """
+    Queue durable background processing for an item.
 
-async def schedule_processing(item_id: uuid.UUID, db_url: str):
-    """Schedule async processing in background."""
-    task = asyncio.create_task(_process_item_async(item_id, db_url))
-    task.add_done_callback(lambda t: _handle_task_result(t, item_id))
-    logger.info(f"Scheduled background processing for item {item_id}")
+    The job is part of the caller's transaction: call notify_workers()
+    after committing so in-process workers pick it up immediately.
+    """
+    await enqueue_job(db, JOB_PROCESS_ITEM, item_id)
+    logger.info(f"Queued background processing for item {item_id}")
 
 
 @router.post("/url", response_model=IngestContentResponse)
@@ -301,7 +145,11 @@ async def ingest_url(
 
     # Extract content from URL
     try:
-        extracted = await extract_from_url(url)
+        extracted = await extract_from_url(url, url_hash=url_hash)
+    except ResponseTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedContentTypeError as e:
+        raise HTTPException(status_code=415, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to extract content: {e}")
 
@@ -326,14 +174,14 @@ async def ingest_url(
     # Create user_item entry
     user_item = UserItem(user_id=user.id, content_id=item.id)
     db.add(user_item)
+    await save_fetch_state(db, extracted["fetch_state"])
+
+    # Schedule background processing (committed together with the item)
+    await schedule_processing(item.id, db)
 
     await db.commit()
     await db.refresh(item)
-
-    # Schedule background processing
-    from app.config import settings
-
-    await schedule_processing(item.id, settings.database_url)
+    notify_workers()
 
     return IngestContentResponse(
         content_id=item.id,
@@ -343,6 +191,156 @@ async def ingest_url(
     )
 
 
+# url_hash values per IN query (asyncpg allows at most 32767 parameters)
+DEDUP_CHUNK_SIZE = 5000
+
+
+async def ingest_url_batch(urls: list[str], user: User, db: AsyncSession) -> IngestBatchResponse:
+    """
+    Ingest many URLs at once without fetching them in the request.
+
+    Existing content is looked up with one IN query per chunk of url_hashes
+    and linked to the user; new URLs become PENDING items whose fetch jobs
+    are queued in the same transaction. The worker pipeline then fetches
+    (bounded, per-host limited), processes, embeds and relates them.
+    """
+    from app.config import settings
+
+    if len(urls) > settings.ingest_batch_max_urls:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many URLs ({len(urls)}, limit {settings.ingest_batch_max_urls})",
+        )
+
+    results: list[IngestBatchItem] = []
+    by_hash: dict[str, list[IngestBatchItem]] = {}
+    for raw_url in urls:
+        url = raw_url.strip()
+        parsed = urlparse(url)
+        entry = IngestBatchItem(url=url)
+        results.append(entry)
+        if parsed.scheme not in ("http", "https") or not parsed.netloc or len(url) > 2048:
+            entry.error = "Invalid URL"
+            continue
+        by_hash.setdefault(hash_url(url), []).append(entry)
+
+    # Global deduplication: one query per chunk of hashes
+    hashes = list(by_hash)
+    existing: dict[str, ContentItem] = {}
+    for start in range(0, len(hashes), DEDUP_CHUNK_SIZE):
+        result = await db.execute(
+            select(ContentItem).where(
+                ContentItem.url_hash.in_(hashes[start : start + DEDUP_CHUNK_SIZE])
+            )
+        )
+        existing.update({item.url_hash: item for item in result.scalars()})
+
+    existing_ids = [item.id for item in existing.values()]
+    owned: set[uuid.UUID] = set()
+    for start in range(0, len(existing_ids), DEDUP_CHUNK_SIZE):
+        result = await db.execute(
+            select(UserItem.content_id).where(
+                UserItem.user_id == user.id,
+                UserItem.content_id.in_(existing_ids[start : start + DEDUP_CHUNK_SIZE]),
+            )
+        )
+        owned.update(result.scalars())
+
+    # Existing content the user doesn't have yet: reference it
+    linked = [item for item in existing.values() if item.id not in owned]
+    for item in linked:
+        item.ref_count += 1
+
+    # New content: anonymous PENDING items, fetched by the worker
+    new_items = [
+        ContentItem(
+            content_type=ContentType.LINK,
+            status=ProcessingStatus.PENDING,
+            url=entries[0].url,
+            url_hash=url_hash,
+            source=urlparse(entries[0].url).netloc.replace("www.", ""),
+            ref_count=1,
+        )
+        for url_hash, entries in by_hash.items()
+        if url_hash not in existing
+    ]
+    db.add_all(new_items)
+    await db.flush()  # Get the item ids
+
+    db.add_all(UserItem(user_id=user.id, content_id=item.id) for item in linked + new_items)
+    await enqueue_jobs(db, JOB_FETCH_ITEM, [item.id for item in new_items])
+
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Another request created some of the same URLs concurrently
+        await db.rollback()
+        raise HTTPException(
+            status_code=409, detail="Some URLs were ingested concurrently, please retry"
+        )
+    notify_workers()
+
+    created = {item.url_hash: item for item in new_items}
+    for url_hash, entries in by_hash.items():
+        item = created.get(url_hash) or existing[url_hash]
+        for index, entry in enumerate(entries):
+            entry.content_id = item.id
+            entry.status = item.status
+            # Repeats within the batch are duplicates too
+            entry.is_duplicate = url_hash not in created or index > 0
+
+    logger.info(
+        f"Batch ingest: {len(new_items)} new, {len(linked)} linked, "
+        f"{sum(1 for r in results if r.error)} invalid of {len(urls)} URLs"
+    )
+    return IngestBatchResponse(
+        total=len(results),
+        created=len(new_items),
+        duplicates=sum(1 for r in results if r.is_duplicate),
+        invalid=sum(1 for r in results if r.error),
+        items=results,
+    )
+
+
+@router.post("/urls", response_model=IngestBatchResponse)
+async def ingest_urls(
+    request: IngestURLsRequest,
+    user: User = Depends(get_dev_or_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Ingest a batch of URLs.
+
+    Unlike POST /ingest/url, pages are not fetched in the request: new
+    items are returned with status "pending" and processed by the
+    background pipeline (fetch -> summary/topics -> embedding -> relations).
+    """
+    return await ingest_url_batch(request.urls, user, db)
+
+
+@router.post("/import", response_model=IngestBatchResponse)
+async def ingest_import_file(
+    file: UploadFile = File(..., description="JSONL, OPML or bookmarks HTML export"),
+    user: User = Depends(get_dev_or_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Import URLs from an uploaded file (e.g. a Pocket or browser bookmark
+    export, an OPML list or JSONL) and ingest them like POST /ingest/urls.
+    """
+    from app.config import settings
+
+    content = await file.read(settings.ingest_import_max_bytes + 1)
+    if len(content) > settings.ingest_import_max_bytes:
+        raise HTTPException(status_code=413, detail="Import file too large")
+
+    urls = parse_url_list(file.filename, content)
+    if not urls:
+        raise HTTPException(status_code=400, detail="No URLs found in file")
+
+    return await ingest_url_batch(urls, user, db)
+
+
 @router.post("/text", response_model=IngestContentResponse)
 async def ingest_text(
     request: IngestTextRequest,
@@ -372,13 +370,12 @@ async def ingest_text(
     user_item = UserItem(user_id=user.id, content_id=item.id)
     db.add(user_item)
 
+    # Schedule background processing (committed together with the item)
+    await schedule_processing(item.id, db)
+
     await db.commit()
     await db.refresh(item)
-
-    # Schedule background processing
-    from app.config import settings
-
-    await schedule_processing(item.id, settings.database_url)
+    notify_workers()
 
     return IngestContentResponse(
         content_id=item.id,
@@ -437,17 +434,22 @@ async def reprocess_content(
         raise HTTPException(status_code=404, detail="Content not found")
 
     if not item.raw_text:
+        # Bulk-imported items whose fetch failed can simply be fetched again
+        if item.url and item.status != ProcessingStatus.COMPLETED:
+            item.status = ProcessingStatus.PENDING
+            await enqueue_job(db, JOB_FETCH_ITEM, item.id)
+            await db.commit()
+            notify_workers()
+            return item
         raise HTTPException(
             status_code=400,
             detail="Cannot reprocess: raw text was deleted after processing",
         )
 
     item.status = ProcessingStatus.PENDING
+    await schedule_processing(item.id, db)
     await db.commit()
-
-    from app.config import settings
-
-    await schedule_processing(item.id, settings.database_url)
+    notify_workers()
 
     return item
 
@@ -12,14 +12,14 @@ This router handles content updates and relations.
 
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import or_, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import Row, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.database import get_db
 from app.dependencies import get_current_active_user
-from app.models.content import ContentItem, ItemRelation, RelationType, Topic
+from app.models.content import ContentItem, ItemRelation, RelationType, Topic, content_topics
 from app.models.user import User
 from app.schemas import (
     ContentItemResponse,
@@ -29,66 +29,96 @@ from app.schemas import (
     RelatedItemResponse,
     TopicResponse,
 )
+from app.services import graph
+from app.services.relations import refresh_topic_relations
+from app.services.topic_index import get_topic_index, refresh_topic_index, sync_topic_index
+from app.services.vector_index import get_vector_index, sync_vector_index
 
 router = APIRouter()
 
+# Implicit (shared-topic) relations shown per item
+SHARED_TOPIC_ITEMS_LIMIT = 10
+
+# Index candidates checked against content_topics per query
+SHARED_TOPIC_CHECK_BATCH = 50
+
+
+async def _shared_topic_items(
+    db: AsyncSession, item: ContentItem, exclude: set[uuid.UUID]
+) -> list[tuple[Row, int]]:
+    """
+    Items sharing topics with item, most shared topics first.
+
+    Candidates come from the topic index and are checked against
+    content_topics in batches until SHARED_TOPIC_ITEMS_LIMIT live ones
+    are found, so items deleted or relinked by another process neither
+    show up nor crowd out valid matches. Stale index entries are
+    refreshed on the way. Returns (row with id/title/source, shared
+    topic count) pairs.
+    """
+    index = get_topic_index()
+    await sync_topic_index(db)
+    topic_ids = [t.id for t in item.topics]
+    index.set_topics(item.id, topic_ids)
+
+    candidates = [
+        (content_id, count)
+        for content_id, count in index.shared_counts(item.id)
+        if content_id not in exclude
+    ]
+    shared = []
+    for start in range(0, len(candidates), SHARED_TOPIC_CHECK_BATCH):
+        batch = candidates[start : start + SHARED_TOPIC_CHECK_BATCH]
+        result = await db.execute(
+            select(
+                ContentItem.id, ContentItem.title, ContentItem.source, func.count().label("shared")
+            )
+            .join(content_topics, content_topics.c.content_id == ContentItem.id)
+            .where(
+                ContentItem.id.in_([content_id for content_id, _ in batch]),
+                content_topics.c.topic_id.in_(topic_ids),
+            )
+            .group_by(ContentItem.id)
+        )
+        live = {row.id: row for row in result.all()}
+
+        stale = [
+            content_id
+            for content_id, count in batch
+            if content_id not in live or live[content_id].shared != count
+        ]
+        await refresh_topic_index(db, stale)
+
+        shared.extend(
+            (live[content_id], live[content_id].shared)
+            for content_id, _ in batch
+            if content_id in live
+        )
+        if len(shared) >= SHARED_TOPIC_ITEMS_LIMIT:
+            break
+
+    # Stable sort: corrected counts may move an item, ties keep index order
+    shared.sort(key=lambda pair: pair[1], reverse=True)
+    return shared[:SHARED_TOPIC_ITEMS_LIMIT]
+
 
 @router.get("/graph/data")
 async def get_graph_data(
+    request: Request,
+    params: graph.GraphParams = Depends(),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Get all content items and their relations as graph data.
 
-    Returns nodes (items) and edges (relations) for visualization.
+    Returns nodes (items) and edges (relations) for visualization,
+    served from the cached graph snapshot with an ETag (send
+    If-None-Match to get a 304 when nothing changed). The view can be
+    narrowed to the neighbourhood of a seed item, to edges above
+    min_weight and to the max_nodes best-connected nodes, and paged
+    with limit/cursor.
     """
-    from app.models.content import ProcessingStatus
-
-    # Get all completed items with their topics
-    items_query = (
-        select(ContentItem)
-        .options(selectinload(ContentItem.topics))
-        .where(ContentItem.status == ProcessingStatus.COMPLETED)
-    )
-    items_result = await db.execute(items_query)
-    items = items_result.scalars().all()
-
-    # Get all relations
-    relations_query = select(ItemRelation)
-    relations_result = await db.execute(relations_query)
-    relations = relations_result.scalars().all()
-
-    # Build nodes list
-    nodes = []
-    for item in items:
-        # Determine primary topic for coloring
-        primary_topic = item.topics[0].name if item.topics else None
-
-        nodes.append({
-            "id": str(item.id),
-            "title": item.title or "Untitled",
-            "source": item.source,
-            "topic_count": len(item.topics),
-            "primary_topic": primary_topic,
-            "topics": [t.name for t in item.topics],
-        })
-
-    # Build edges list
-    edges = []
-    for rel in relations:
-        edges.append({
-            "source": str(rel.source_id),
-            "target": str(rel.target_id),
-            "weight": rel.confidence,
-            "type": rel.relation_type.value,
-        })
-
-    return {
-        "nodes": nodes,
-        "edges": edges,
-        "node_count": len(nodes),
-        "edge_count": len(edges),
-    }
+    return await graph.graph_response(request, db, params)
 
 
 @router.get("/{item_id}", response_model=ContentItemResponse)
@@ -156,10 +186,16 @@ async def update_item(
         if len(topics) != len(update_data.topic_ids):
             raise HTTPException(status_code=400, detail="One or more topic IDs not found")
 
-        item.topics = list(topics)
+        if {t.id for t in item.topics} != {t.id for t in topics}:
+            item.topics = list(topics)
+            await db.flush()
+            # Recompute this item's topic relations in the same transaction
+            await refresh_topic_relations([item.id], db)
 
     await db.commit()
+    graph.invalidate()
     await db.refresh(item)
+    get_topic_index().set_topics(item.id, [t.id for t in item.topics])
 
     return item
 
@@ -232,36 +268,20 @@ async def get_item_with_relations(
             )
         )
 
-    # Find items with shared topics (implicit relations)
-    if item.topics:
-        topic_ids = [t.id for t in item.topics]
-        shared_topic_query = (
-            select(ContentItem)
-            .options(selectinload(ContentItem.topics))
-            .where(ContentItem.id != item_id)
-            .where(or_(*[ContentItem.topics.any(id=tid) for tid in topic_ids]))
-            .limit(10)
-        )
-
-        shared_result = await db.execute(shared_topic_query)
-        shared_items = shared_result.scalars().unique().all()
-
+    # Find items with shared topics (implicit relations), most shared topics first
+    existing_ids = {r.id for r in related_items}
+    for shared_item, shared_topic_count in await _shared_topic_items(db, item, existing_ids):
         # Add as implicit relations (lower confidence)
-        existing_ids = {r.id for r in related_items}
-        for shared_item in shared_items:
-            if shared_item.id not in existing_ids:
-                shared_topic_count = len(set(t.id for t in shared_item.topics) & set(topic_ids))
-                confidence = min(0.3 + (shared_topic_count * 0.2), 0.9)
-
-                related_items.append(
-                    RelatedItemResponse(
-                        id=shared_item.id,
-                        title=shared_item.title,
-                        source=shared_item.source,
-                        relation_type=RelationType.RELATED,
-                        confidence=confidence,
-                    )
-                )
+        confidence = min(0.3 + (shared_topic_count * 0.2), 0.9)
+        related_items.append(
+            RelatedItemResponse(
+                id=shared_item.id,
+                title=shared_item.title,
+                source=shared_item.source,
+                relation_type=RelationType.RELATED,
+                confidence=confidence,
+            )
+        )
 
     return ContentItemWithRelationsResponse(
         id=item.id,
@@ -279,6 +299,65 @@ async def get_item_with_relations(
     )
 
 
+@router.get("/{item_id}/similar", response_model=list[RelatedItemResponse])
+async def get_similar_items(
+    item_id: uuid.UUID,
+    k: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get the k most similar content items by embedding.
+
+    Answered from the in-memory vector index; only the titles of the
+    matches are loaded from the database.
+    """
+    await sync_vector_index(db)
+    index = get_vector_index()
+    vector = index.vector(item_id)
+
+    if vector is None:
+        exists = await db.scalar(select(ContentItem.id).where(ContentItem.id == item_id))
+        if not exists:
+            raise HTTPException(status_code=404, detail="Item not found")
+        raise HTTPException(status_code=404, detail="No embedding for this item")
+
+    # Over-fetch a little in case some matches were deleted since indexing
+    matches = index.search(vector, k=k + 5, exclude=item_id)
+    if not matches:
+        return []
+
+    items_query = select(ContentItem.id, ContentItem.title, ContentItem.source).where(
+        ContentItem.id.in_([content_id for content_id, _ in matches])
+    )
+    items_result = await db.execute(items_query)
+    items_by_id = {row.id: row for row in items_result.all()}
+
+    similar = []
+    for content_id, score in matches:
+        row = items_by_id.get(content_id)
+        if row is None:
+            continue
+        similar.append(
+            RelatedItemResponse(
+                id=row.id,
+                title=row.title,
+                source=row.source,
+                relation_type=RelationType.SIMILAR,
+                confidence=max(score, 0.0),
+            )
+        )
+
+    return similar[:k]
+
+
+def _pair_relation_query(item_id: uuid.UUID, target_id: uuid.UUID):
+    """The relation between two items, whichever way it points."""
+    return select(ItemRelation).where(
+        ((ItemRelation.source_id == item_id) & (ItemRelation.target_id == target_id))
+        | ((ItemRelation.source_id == target_id) & (ItemRelation.target_id == item_id))
+    )
+
+
 @router.post("/{item_id}/relations/{target_id}", response_model=ItemRelationResponse)
 async def create_relation(
     item_id: uuid.UUID,
@@ -292,6 +371,7 @@ async def create_relation(
     Create a relation between two content items.
 
     Since content is anonymous, any authenticated user can create relations.
+    A relation derived automatically for the pair is replaced.
     """
     # Verify both items exist
     source_result = await db.execute(select(ContentItem).where(ContentItem.id == item_id))
@@ -305,24 +385,23 @@ async def create_relation(
     if item_id == target_id:
         raise HTTPException(status_code=400, detail="Cannot create self-relation")
 
-    # Check if relation already exists
-    existing_query = select(ItemRelation).where(
-        ItemRelation.source_id == item_id,
-        ItemRelation.target_id == target_id,
-    )
-    existing_result = await db.execute(existing_query)
-    if existing_result.scalar_one_or_none():
+    # At most one relation per pair, in either direction. A user's relation
+    # replaces one derived by the pipeline, but never another user's
+    existing_result = await db.execute(_pair_relation_query(item_id, target_id))
+    relation = existing_result.scalar_one_or_none()
+    if relation is not None and not relation.auto_generated:
         raise HTTPException(status_code=400, detail="Relation already exists")
 
-    # Create relation
-    relation = ItemRelation(
-        source_id=item_id,
-        target_id=target_id,
-        relation_type=relation_type,
-        confidence=confidence,
-    )
-    db.add(relation)
+    if relation is None:
+        relation = ItemRelation()
+        db.add(relation)
+    relation.source_id = item_id
+    relation.target_id = target_id
+    relation.relation_type = relation_type
+    relation.confidence = confidence
+    relation.auto_generated = False
     await db.commit()
+    graph.invalidate()
     await db.refresh(relation)
 
     return relation
@@ -336,13 +415,9 @@ async def delete_relation(
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Delete a relation between two content items.
+    Delete the relation between two content items, in either direction.
     """
-    query = select(ItemRelation).where(
-        ItemRelation.source_id == item_id,
-        ItemRelation.target_id == target_id,
-    )
-    result = await db.execute(query)
+    result = await db.execute(_pair_relation_query(item_id, target_id))
     relation = result.scalar_one_or_none()
 
     if not relation:
@@ -350,5 +425,6 @@ async def delete_relation(
 
     await db.delete(relation)
     await db.commit()
+    graph.invalidate()
 
     return {"status": "deleted"}
@@ -4,9 +4,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.dependencies import get_dev_or_current_user
-from app.models.content import Topic
+from app.models.content import Topic, content_topics
 from app.models.user import User
 from app.schemas import TopicCreate, TopicResponse
+from app.services import graph
+from app.services.relations import refresh_topic_relations
+from app.services.topic_index import get_topic_index
 
 router = APIRouter()
 
@@ -59,7 +62,17 @@ async def delete_topic(
     if not topic:
         raise HTTPException(status_code=404, detail="Topic not found")
 
+    # Items losing the topic get their topic relations recomputed in the same transaction
+    items_result = await db.execute(
+        select(content_topics.c.content_id).where(content_topics.c.topic_id == topic_id)
+    )
+    affected_ids = items_result.scalars().all()
+
     await db.delete(topic)
+    await db.flush()
+    await refresh_topic_relations(affected_ids, db)
     await db.commit()
+    graph.invalidate()
+    get_topic_index().remove_topic(topic_id)
 
     return {"status": "deleted", "id": topic_id}
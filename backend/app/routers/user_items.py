@@ -11,23 +11,33 @@ encrypted vault entries. This router uses the unencrypted user_items table
 for development and transition purposes.
 """
 
+import base64
+import binascii
+import json
 import math
+import uuid
+from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel
-from sqlalchemy import func, or_, select
+from sqlalchemy import ClauseElement, Executable, Select, func, or_, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import selectinload
 
+from app.config import settings
 from app.database import get_db
 from app.dependencies import get_dev_or_current_user
-from app.models.content import ContentItem, ItemRelation, Topic
+from app.models.content import ContentItem, ItemRelation, ProcessingStatus, Topic
 from app.models.user import User, UserItem
 from app.schemas import (
     TopicResponse,
     UserItemResponse,
     UserItemsListResponse,
 )
+from app.services import graph
+from app.services import search as search_service
+from app.services.vector_index import sync_vector_index
 
 
 class BulkIdsRequest(BaseModel):
@@ -39,58 +49,112 @@ router = APIRouter()
 
 @router.get("/graph/data")
 async def get_graph_data(
+    request: Request,
+    scope: str = Query("mine", pattern="^(mine|all)$", description="Only the user's items"),
+    params: graph.GraphParams = Depends(),
+    user: User = Depends(get_dev_or_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Get all content items and their relations as graph data.
+    Get content items and their relations as graph data.
+
+    Returns nodes (items) and edges (relations) for visualization, by
+    default only the user's own items (scope=all for the whole graph).
+    The view can be narrowed to the neighbourhood of a seed item, to
+    edges above min_weight and to the max_nodes best-connected nodes,
+    and paged with limit/cursor. Responses carry an ETag (send
+    If-None-Match to get a 304 when nothing changed).
+    """
+    content_ids = None
+    if scope == "mine":
+        result = await db.execute(select(UserItem.content_id).where(UserItem.user_id == user.id))
+        content_ids = set(result.scalars().all())
+
+    return await graph.graph_response(request, db, params, content_ids=content_ids)
 
-    Returns nodes (items) and edges (relations) for visualization.
+
+@router.get("/search/semantic", response_model=UserItemsListResponse)
+async def semantic_search(
+    q: str = Query(..., min_length=1, max_length=1000, description="Search query"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    min_score: float | None = Query(
+        None, ge=-1.0, le=1.0, description="Minimum similarity (default SEMANTIC_SEARCH_MIN_SCORE)"
+    ),
+    user: User = Depends(get_dev_or_current_user),
+    db: AsyncSession = Depends(get_db),
+):
     """
-    from app.models.content import ProcessingStatus
+    Search the user's items by meaning rather than wording.
 
-    # Get all completed items with their topics
-    items_query = (
-        select(ContentItem)
-        .options(selectinload(ContentItem.topics))
-        .where(ContentItem.status == ProcessingStatus.COMPLETED)
+    The query is embedded (cached per query string) and compared with
+    the stored item embeddings in the in-memory vector index. Results
+    are ordered by similarity (score); archived items and items without
+    an embedding are not included.
+    """
+    result = await db.execute(
+        select(UserItem.content_id).where(
+            UserItem.user_id == user.id,
+            UserItem.is_archived == False,  # noqa: E712
+        )
     )
-    items_result = await db.execute(items_query)
-    items = items_result.scalars().all()
+    content_ids = list(result.scalars().all())
 
-    # Get all relations
-    relations_query = select(ItemRelation)
-    relations_result = await db.execute(relations_query)
-    relations = relations_result.scalars().all()
-
-    # Build nodes list
-    nodes = []
-    for item in items:
-        primary_topic = item.topics[0].name if item.topics else None
-        nodes.append({
-            "id": str(item.id),
-            "title": item.title or "Untitled",
-            "source": item.source,
-            "topic_count": len(item.topics),
-            "primary_topic": primary_topic,
-            "topics": [t.name for t in item.topics],
-        })
-
-    # Build edges list
-    edges = []
-    for rel in relations:
-        edges.append({
-            "source": str(rel.source_id),
-            "target": str(rel.target_id),
-            "weight": rel.confidence,
-            "type": rel.relation_type.value,
-        })
+    if min_score is None:
+        min_score = settings.semantic_search_min_score
 
-    return {
-        "nodes": nodes,
-        "edges": edges,
-        "node_count": len(nodes),
-        "edge_count": len(edges),
-    }
+    await sync_vector_index(db)
+    offset = (page - 1) * page_size
+    ranked = await search_service.semantic_search(q, content_ids, offset + page_size, min_score)
+    if ranked is None:
+        raise HTTPException(status_code=503, detail="Embedding service unavailable")
+    matches, total = ranked
+    items = await _ranked_items(db, user, matches[offset:])
+
+    return UserItemsListResponse(
+        items=items,
+        total=total,
+        page=page,
+        page_size=page_size,
+        pages=math.ceil(total / page_size) if total else 0,
+    )
+
+
+async def _ranked_items(
+    db: AsyncSession,
+    user: User,
+    ranked: list[tuple[uuid.UUID, float]],
+    highlight_terms: list[str] | None = None,
+) -> list[UserItemResponse]:
+    """
+    Load the user's items for ranked (content_id, score) pairs, keeping the
+    order, with highlight snippets for highlight_terms if given.
+    """
+    if not ranked:
+        return []
+    content_ids = [content_id for content_id, _ in ranked]
+    snippets = {}
+    if highlight_terms:
+        snippets = await search_service.highlights(db, content_ids, highlight_terms)
+    result = await db.execute(
+        select(UserItem)
+        .options(selectinload(UserItem.content).selectinload(ContentItem.topics))
+        .where(
+            UserItem.user_id == user.id,
+            UserItem.content_id.in_(content_ids),
+        )
+    )
+    by_content = {ui.content_id: ui for ui in result.scalars().all()}
+
+    items = []
+    for content_id, score in ranked:
+        user_item = by_content.get(content_id)
+        if user_item is not None:
+            item = _build_user_item_response(user_item)
+            item.score = score
+            item.highlight = snippets.get(content_id)
+            items.append(item)
+    return items
 
 
 def _build_user_item_response(user_item: UserItem) -> UserItemResponse:
@@ -120,11 +184,31 @@ async def list_items(
     page_size: int = Query(20, ge=1, le=100),
     topic_id: int | None = Query(None, description="Filter by topic"),
     search: str | None = Query(None, description="Search in title and summary"),
+    search_mode: str = Query(
+        "fulltext",
+        pattern="^(fulltext|fuzzy|hybrid)$",
+        description=(
+            "fulltext (title and summary), fuzzy (typo-tolerant, title and source) "
+            "or hybrid (full-text and semantic, fused)"
+        ),
+    ),
+    similarity_threshold: float = Query(
+        search_service.FUZZY_SIMILARITY_THRESHOLD,
+        ge=0.0,
+        le=1.0,
+        description="Minimum similarity for fuzzy search",
+    ),
     favorites_only: bool = Query(False, description="Only show favorites"),
     unread_only: bool = Query(False, description="Only show unread items"),
     archived_only: bool = Query(False, description="Only show archived items"),
-    sort_by: str = Query("date", pattern="^(date|title|status)$"),
+    sort_by: str | None = Query(
+        None,
+        pattern="^(date|title|status|relevance)$",
+        description="Defaults to relevance when searching, date otherwise",
+    ),
     sort_order: str = Query("desc", pattern="^(asc|desc)$"),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    include_total: bool = Query(True, description="Count all matches (else estimate)"),
     user: User = Depends(get_dev_or_current_user),
     db: AsyncSession = Depends(get_db),
 ):
@@ -133,13 +217,14 @@ async def list_items(
 
     This endpoint combines ContentItem data with user-specific flags
     from the user_items junction table.
+
+    Pass the returned next_cursor to get the following page: it continues
+    after the last item's (sort value, id), so deep pages cost the same as
+    the first. With include_total=false, total is the planner's estimate
+    instead of an exact count.
     """
-    # Base query: user's items with content loaded
-    query = (
-        select(UserItem)
-        .options(selectinload(UserItem.content).selectinload(ContentItem.topics))
-        .where(UserItem.user_id == user.id)
-    )
+    # Base query: user's items (content is loaded for the page only)
+    query = select(UserItem).where(UserItem.user_id == user.id)
 
     # Apply filters
     if favorites_only:
@@ -158,51 +243,98 @@ async def list_items(
     if topic_id is not None:
         query = query.join(UserItem.content).where(ContentItem.topics.any(Topic.id == topic_id))
 
-    # Search filter
-    if search:
-        search_pattern = f"%{search}%"
+    if search and search.strip() and search_mode == "hybrid":
+        if cursor:
+            raise HTTPException(status_code=400, detail="Hybrid search is paged by page number")
+        if topic_id is None:
+            query = query.join(UserItem.content)
+        return await _list_hybrid(db, user, query, search, page, page_size)
+
+    # Search filter, served by the search_vector GIN index (fulltext)
+    # or the trigram indexes on title and source (fuzzy)
+    search_terms = []
+    search_rank = None
+    if search and search_mode == "fuzzy":
+        search_query = search.strip().lower()
+        if search_query:
+            await search_service.set_fuzzy_threshold(db, similarity_threshold)
+            search_condition = search_service.fuzzy_matches(search_query)
+            search_rank = search_service.fuzzy_rank(search_query)
+    elif search:
+        search_terms = search_service.parse_query(search)
+        if search_terms:
+            search_condition = search_service.matches(search_terms)
+            search_rank = search_service.rank(search_terms)
+
+    if search_rank is not None:
         # Need to join content if not already joined
         if topic_id is None:
             query = query.join(UserItem.content)
-        query = query.where(
-            or_(
-                ContentItem.title.ilike(search_pattern),
-                ContentItem.summary.ilike(search_pattern),
-            )
-        )
+        query = query.where(search_condition)
 
-    # Count total before pagination
-    count_query = select(func.count()).select_from(query.subquery())
-    total = await db.scalar(count_query)
+    # Count total before pagination (or let the planner estimate it)
+    if include_total:
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+    else:
+        total = await _estimate_count(db, query)
 
     # Sorting
-    if sort_by == "date":
+    if sort_by is None:
+        sort_by = "relevance" if search_rank is not None else "date"
+    if sort_by == "relevance" and search_rank is None:
+        sort_by = "date"
+    content_joined = topic_id is not None or search_rank is not None
+
+    if sort_by == "relevance":
+        order_col = search_rank
+    elif sort_by == "date":
         order_col = UserItem.created_at
     elif sort_by == "title":
-        # Need to sort by content.title
-        if topic_id is None and search is None:
+        # Need to sort by content.title (untitled items sort as "")
+        if not content_joined:
             query = query.join(UserItem.content)
-        order_col = ContentItem.title
+        order_col = func.coalesce(ContentItem.title, "")
     else:  # status
-        if topic_id is None and search is None:
+        if not content_joined:
             query = query.join(UserItem.content)
         order_col = ContentItem.status
 
     if sort_order == "desc":
-        query = query.order_by(order_col.desc())
+        query = query.order_by(order_col.desc(), UserItem.id.desc())
     else:
-        query = query.order_by(order_col.asc())
-
-    # Pagination
-    offset = (page - 1) * page_size
-    query = query.offset(offset).limit(page_size)
+        query = query.order_by(order_col.asc(), UserItem.id.asc())
+
+    # Pagination: continue after the cursor's (sort value, id), or by offset.
+    # One extra row tells whether there is a next page.
+    sort_key = f"{sort_by}:{sort_order}"
+    if cursor:
+        value, last_id = _decode_cursor(cursor, sort_key)
+        position = tuple_(order_col, UserItem.id)
+        after = (value, last_id)
+        query = query.where(position < after if sort_order == "desc" else position > after)
+    else:
+        query = query.offset((page - 1) * page_size)
+    query = query.add_columns(order_col.label("sort_value")).limit(page_size + 1)
 
     # Execute
-    result = await db.execute(query)
-    user_items = result.scalars().unique().all()
+    result = await db.execute(
+        query.options(selectinload(UserItem.content).selectinload(ContentItem.topics))
+    )
+    rows = result.unique().all()
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = _encode_cursor(sort_key, rows[-1].sort_value, rows[-1].UserItem.id)
+    user_items = [row.UserItem for row in rows]
 
     # Build response
     items = [_build_user_item_response(ui) for ui in user_items]
+    if search_terms:
+        snippets = await search_service.highlights(
+            db, [ui.content_id for ui in user_items], search_terms
+        )
+        for item, ui in zip(items, user_items, strict=True):
+            item.highlight = snippets.get(ui.content_id)
 
     return UserItemsListResponse(
         items=items,
@@ -210,6 +342,86 @@ async def list_items(
         page=page,
         page_size=page_size,
         pages=math.ceil((total or 0) / page_size) if total else 0,
+        next_cursor=next_cursor,
+        total_is_estimate=not include_total,
+    )
+
+
+def _encode_cursor(sort_key: str, value, last_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, ProcessingStatus):
+        value = value.name
+    raw = json.dumps({"s": sort_key, "v": value, "i": last_id}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort_key: str) -> tuple[object, int]:
+    """The (sort value, id) of the last item seen, for the given sort."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        value, last_id = data["v"], int(data["i"])
+        if data["s"] != sort_key:
+            raise HTTPException(status_code=400, detail="Cursor belongs to another sort order")
+        if sort_key.startswith("date:"):
+            value = datetime.fromisoformat(value)
+        elif sort_key.startswith("status:"):
+            value = ProcessingStatus[value]
+        elif sort_key.startswith("relevance:"):
+            value = float(value)
+        else:
+            value = str(value)
+        return value, last_id
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, compiled with its bound parameters."""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element: _Explain, compiler, **kw) -> str:
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kw)}"
+
+
+async def _estimate_count(db: AsyncSession, query: Select) -> int:
+    """Row count of a query as estimated by the planner (no scan)."""
+    plan = (await db.execute(_Explain(query))).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def _list_hybrid(
+    db: AsyncSession, user: User, query: Select, search: str, page: int, page_size: int
+) -> UserItemsListResponse:
+    """
+    Hybrid search page: full-text and semantic rankings of the filtered
+    items, fused. Always ordered by the fused score (the item's score).
+    """
+    scope = query.with_only_columns(UserItem.content_id)
+    await sync_vector_index(db)
+    fused = await search_service.hybrid_search(search, scope)
+
+    offset = (page - 1) * page_size
+    items = await _ranked_items(
+        db, user, fused[offset : offset + page_size], search_service.parse_query(search)
+    )
+
+    total = len(fused)
+    return UserItemsListResponse(
+        items=items,
+        total=total,
+        page=page,
+        page_size=page_size,
+        pages=math.ceil(total / page_size) if total else 0,
     )
 
 
@@ -259,7 +471,6 @@ async def get_item_with_relations(
     content = user_item.content
 
     # Get relations
-    from sqlalchemy import or_
 
     relations_query = (
         select(ItemRelation)
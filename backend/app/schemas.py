@@ -357,6 +357,37 @@ class IngestContentResponse(BaseModel):
     is_duplicate: bool = False  # True if content already existed (ref_count incremented)
 
 
+class IngestURLsRequest(BaseModel):
+    """Batch of URLs to ingest; invalid URLs are reported per item, not rejected."""
+
+    urls: list[str] = Field(..., min_length=1)
+
+
+class IngestBatchItem(BaseModel):
+    """Result for one URL of a batch ingest."""
+
+    url: str
+    content_id: uuid.UUID | None = None
+    status: ProcessingStatus | None = None
+    is_duplicate: bool = False
+    error: str | None = None
+
+
+class IngestBatchResponse(BaseModel):
+    """
+    Response after batch ingesting URLs.
+
+    New items are created with status "pending" and fetched in the
+    background; clients encrypt each content_id into their vault.
+    """
+
+    total: int
+    created: int
+    duplicates: int
+    invalid: int
+    items: list[IngestBatchItem]
+
+
 # ============================================================================
 # User Items (Backwards Compatibility)
 # ============================================================================
@@ -383,6 +414,10 @@ class UserItemResponse(BaseModel):
     updated_at: datetime | None
     processed_at: datetime | None
     topics: list[TopicResponse]
+    # Search result snippet with matches wrapped in <mark> (search results only)
+    highlight: str | None = None
+    # Similarity to the query (semantic search) or fused rank score (hybrid search)
+    score: float | None = None
 
     model_config = {"from_attributes": True}
 
@@ -395,3 +430,5 @@ class UserItemsListResponse(BaseModel):
     page: int
     page_size: int
     pages: int
+    next_cursor: str | None = None  # Continue with ?cursor= (GET /items)
+    total_is_estimate: bool = False
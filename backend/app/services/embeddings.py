@@ -8,11 +8,17 @@ to generate text embeddings for content similarity calculation.
 import asyncio
 import logging
 import math
+import uuid
+from collections import OrderedDict
+from datetime import datetime
 
-import httpx
-import ollama
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
+from app.models.content import ContentEmbedding
+from app.services import llm_client
+from app.services.vector_index import sync_vector_index, update_vector_index
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +26,28 @@ logger = logging.getLogger(__name__)
 EMBEDDING_TIMEOUT = 60.0
 
 
+# Query embeddings kept in memory (LRU), keyed by model and query string
+QUERY_CACHE_SIZE = 1024
+
+_query_cache: OrderedDict[tuple[str, str], list[float]] = OrderedDict()
+
+# Truncate text to avoid token limits (nomic-embed-text has 8192 token context)
+MAX_EMBEDDING_CHARS = 8000
+
+
+def _truncate(text: str) -> str:
+    return text[:MAX_EMBEDDING_CHARS]
+
+
+def _extract_embeddings(response) -> list[list[float]] | None:
+    """Get the embeddings list from a dict-style or object-style response."""
+    if hasattr(response, "embeddings") and response.embeddings:
+        return list(response.embeddings)
+    elif isinstance(response, dict) and response.get("embeddings"):
+        return response["embeddings"]
+    return None
+
+
 async def generate_embedding(text: str) -> list[float] | None:
     """
     Generate an embedding vector for the given text using Ollama.
@@ -30,34 +58,18 @@ async def generate_embedding(text: str) -> list[float] | None:
     Returns:
         List of floats representing the embedding vector, or None on error
     """
-    # Truncate text to avoid token limits (nomic-embed-text has 8192 token context)
-    max_chars = 8000
-    if len(text) > max_chars:
-        text = text[:max_chars]
+    text = _truncate(text)
 
     logger.info(f"Generating embedding with {settings.ollama_embedding_model}")
 
-    client = ollama.AsyncClient(
-        host=settings.ollama_base_url,
-        timeout=httpx.Timeout(EMBEDDING_TIMEOUT, connect=30.0),
-    )
-
     try:
-        response = await asyncio.wait_for(
-            client.embed(
-                model=settings.ollama_embedding_model,
-                input=text,
-            ),
-            timeout=EMBEDDING_TIMEOUT,
-        )
+        response = await llm_client.embed(text, timeout=EMBEDDING_TIMEOUT)
         logger.info("Embedding generated successfully")
 
         # Response contains 'embeddings' list with one vector
-        # Handle both dict-style and object-style responses
-        if hasattr(response, "embeddings") and response.embeddings:
-            return response.embeddings[0]
-        elif isinstance(response, dict) and response.get("embeddings"):
-            return response["embeddings"][0]
+        embeddings = _extract_embeddings(response)
+        if embeddings:
+            return embeddings[0]
 
         logger.error(f"Unexpected embedding response format: {response}")
         return None
@@ -70,6 +82,73 @@ async def generate_embedding(text: str) -> list[float] | None:
         return None
 
 
+async def embed_query(query: str) -> list[float] | None:
+    """
+    Embed a search query, cached per query string.
+
+    Repeated searches (paging, refining filters) skip the Ollama round
+    trip. Whitespace is normalized before lookup; failures are not cached.
+    """
+    query = " ".join(query.split())
+    key = (settings.ollama_embedding_model, query)
+    embedding = _query_cache.get(key)
+    if embedding is not None:
+        _query_cache.move_to_end(key)
+        return embedding
+
+    embedding = await generate_embedding(query)
+    if embedding is not None:
+        _query_cache[key] = embedding
+        if len(_query_cache) > QUERY_CACHE_SIZE:
+            _query_cache.popitem(last=False)
+    return embedding
+
+
+async def generate_embeddings(
+    texts: list[str],
+    batch_size: int | None = None,
+    concurrency: int | None = None,
+) -> list[list[float] | None]:
+    """
+    Generate embeddings for many texts using Ollama's multi-input embed API.
+
+    Texts are sent in batches of batch_size per request, with up to
+    concurrency requests in flight (and never more than the global
+    embed limit of the shared client).
+
+    Returns:
+        One entry per input text: the vector, or None if its batch failed
+    """
+    batch_size = batch_size or settings.embedding_batch_size
+    semaphore = asyncio.Semaphore(concurrency or settings.embedding_concurrency)
+    results: list[list[float] | None] = [None] * len(texts)
+
+    async def embed_batch(start: int) -> None:
+        batch = [_truncate(t) for t in texts[start : start + batch_size]]
+        async with semaphore:
+            try:
+                response = await llm_client.embed(batch, timeout=EMBEDDING_TIMEOUT)
+            except TimeoutError:
+                logger.error(f"Embedding batch at {start} timed out after {EMBEDDING_TIMEOUT}s")
+                return
+            except Exception as e:
+                logger.error(f"Embedding batch at {start} failed: {e}")
+                return
+
+        embeddings = _extract_embeddings(response)
+        if not embeddings or len(embeddings) != len(batch):
+            logger.error(f"Unexpected embedding batch response for {len(batch)} inputs")
+            return
+        results[start : start + len(batch)] = embeddings
+
+    logger.info(
+        f"Generating {len(texts)} embeddings with {settings.ollama_embedding_model} "
+        f"(batch size {batch_size})"
+    )
+    await asyncio.gather(*(embed_batch(i) for i in range(0, len(texts), batch_size)))
+    return results
+
+
 def cosine_similarity(vec1: list[float], vec2: list[float]) -> float:
     """
     Calculate cosine similarity between two vectors.
@@ -94,27 +173,55 @@ def cosine_similarity(vec1: list[float], vec2: list[float]) -> float:
     return dot_product / (norm1 * norm2)
 
 
+def content_embedding_text(title: str | None, summary: str | None) -> str:
+    """Combine title and summary for better semantic representation."""
+    return f"{title or 'Untitled'}\n\n{summary or ''}"
+
+
 async def generate_embedding_for_content(title: str, summary: str) -> list[float] | None:
-    """
-    Generate embedding for a content item using title and summary.
+    """Generate embedding for a content item using title and summary."""
+    return await generate_embedding(content_embedding_text(title, summary))
+
+
+async def store_embeddings(db: AsyncSession, embeddings: dict[uuid.UUID, list[float]]) -> None:
+    """Insert or update many embeddings with a single statement and commit."""
+    if not embeddings:
+        return
+
+    now = datetime.utcnow()
+    stmt = insert(ContentEmbedding).values(
+        [
+            {
+                "content_id": content_id,
+                "embedding": embedding,
+                "model": settings.ollama_embedding_model,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for content_id, embedding in embeddings.items()
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ContentEmbedding.content_id],
+        set_={
+            "embedding": stmt.excluded.embedding,
+            "model": stmt.excluded.model,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    await db.execute(stmt)
+    await db.commit()
 
-    Combines title and summary for better semantic representation.
-    """
-    # Combine title and summary with separator
-    combined_text = f"{title or 'Untitled'}\n\n{summary or ''}"
-    return await generate_embedding(combined_text)
+    # Keep the in-memory nearest-neighbour index in sync
+    await update_vector_index(embeddings)
+    await sync_vector_index(db)
 
 
 async def check_embedding_model_available() -> bool:
     """Check if the embedding model is available in Ollama."""
-    client = ollama.AsyncClient(
-        host=settings.ollama_base_url,
-        timeout=httpx.Timeout(10.0, connect=5.0),
-    )
-
     try:
         # List available models (ollama library returns objects, not dicts)
-        response = await client.list()
+        response = await llm_client.list_models(timeout=10.0)
         # Access .models attribute and .model on each Model object
         available = [m.model for m in response.models]
 
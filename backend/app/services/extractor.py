@@ -1,41 +1,154 @@
+import logging
+from datetime import datetime
 from urllib.parse import urlparse
 
-import httpx
-import trafilatura
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.database import async_session_maker
+from app.models.fetch_state import UrlFetchState
+from app.services import fetcher
+from app.services.html_extraction import extract_html
 
-async def extract_from_url(url: str) -> dict:
+logger = logging.getLogger(__name__)
+
+
+async def _load_fetch_state(url_hash: str) -> UrlFetchState | None:
+    """Validators from the last fetch of this URL (None if unknown or on DB errors)."""
+    try:
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(UrlFetchState).where(UrlFetchState.url_hash == url_hash)
+            )
+            return result.scalar_one_or_none()
+    except Exception as e:
+        logger.warning(f"Could not load fetch state for {url_hash}: {e}")
+        return None
+
+
+async def save_fetch_state(db: AsyncSession, fetch_state: dict | None) -> None:
     """
-    Extract article content from a URL.
-    Returns title, text, and source domain.
+    Upsert the validators returned by extract_from_url (caller commits).
+
+    Callers save them in the transaction that stores the processed result,
+    so a later conditional fetch only skips pages that were processed
+    successfully. fetched_at only moves when the body changed. Errors are
+    logged and rolled back to a savepoint, they don't fail the caller.
     """
-    async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-        response = await client.get(
-            url,
-            headers={
-                "User-Agent": "Mozilla/5.0 (compatible; VibedInsight/1.0; +https://github.com/vibedinsight)"
-            },
-        )
-        response.raise_for_status()
-        html = response.text
-
-    # Extract main content using trafilatura
-    extracted = trafilatura.extract(
-        html,
-        include_comments=False,
-        include_tables=True,
-        output_format="txt",
+    if not fetch_state:
+        return
+
+    now = datetime.utcnow()
+    values = {
+        "etag": fetch_state["etag"],
+        "last_modified": fetch_state["last_modified"],
+        "checked_at": now,
+    }
+    if fetch_state["changed"]:
+        values.update(content_hash=fetch_state["content_hash"], fetched_at=now)
+
+    stmt = insert(UrlFetchState).values(
+        url_hash=fetch_state["url_hash"],
+        etag=fetch_state["etag"],
+        last_modified=fetch_state["last_modified"],
+        content_hash=fetch_state["content_hash"],
+        fetched_at=now,
+        checked_at=now,
     )
+    stmt = stmt.on_conflict_do_update(index_elements=[UrlFetchState.url_hash], set_=values)
+    try:
+        async with db.begin_nested():
+            await db.execute(stmt)
+    except Exception as e:
+        logger.warning(f"Could not save fetch state for {fetch_state['url_hash']}: {e}")
 
-    # Get metadata
-    metadata = trafilatura.extract_metadata(html)
 
+def _fetch_state(
+    url_hash: str,
+    etag: str | None,
+    last_modified: str | None,
+    content_hash: str | None,
+    changed: bool,
+) -> dict:
+    return {
+        "url_hash": url_hash,
+        "etag": etag,
+        "last_modified": last_modified,
+        "content_hash": content_hash,
+        "changed": changed,
+    }
+
+
+async def extract_from_url(
+    url: str, url_hash: str | None = None, conditional: bool = False
+) -> dict:
+    """
+    Extract article content from a URL.
+    Returns title, text, and source domain.
+
+    With a url_hash, the response's ETag/Last-Modified and body hash are
+    returned as fetch_state, for the caller to persist with
+    save_fetch_state() once the content was processed. With
+    conditional=True, the request is sent with If-None-Match/
+    If-Modified-Since; if the server answers 304 or the body is
+    byte-identical to the last fetch, extraction is skipped and the result
+    has unchanged=True (and no title/text).
+    """
     # Parse domain
     parsed_url = urlparse(url)
     source = parsed_url.netloc.replace("www.", "")
 
+    headers = {}
+    state = await _load_fetch_state(url_hash) if url_hash and conditional else None
+    if state:
+        if state.etag:
+            headers["If-None-Match"] = state.etag
+        if state.last_modified:
+            headers["If-Modified-Since"] = state.last_modified
+
+    response = await fetcher.fetch(url, headers=headers)
+    if response["status_code"] == 304:
+        if not state:
+            raise fetcher.FetchError("Unexpected 304 response")
+        logger.info(f"Not modified (304): {url}")
+        return {
+            "title": None,
+            "text": None,
+            "source": source,
+            "unchanged": True,
+            "fetch_state": _fetch_state(url_hash, state.etag, state.last_modified, None, False),
+        }
+    html = response["text"]
+
+    fetch_state = None
+    if url_hash:
+        content_hash = response["content_hash"]
+        unchanged = bool(state and state.content_hash == content_hash)
+        fetch_state = _fetch_state(
+            url_hash,
+            response["headers"].get("etag"),
+            response["headers"].get("last-modified"),
+            content_hash,
+            not unchanged,
+        )
+        if unchanged:
+            logger.info(f"Body unchanged since last fetch: {url}")
+            return {
+                "title": None,
+                "text": None,
+                "source": source,
+                "unchanged": True,
+                "fetch_state": fetch_state,
+            }
+
+    # Extract main content and metadata using trafilatura (in the process pool)
+    extracted = await extract_html(html, url)
+
     return {
-        "title": metadata.title if metadata else None,
-        "text": extracted,
+        "title": extracted["title"],
+        "text": extracted["text"],
         "source": source,
+        "unchanged": False,
+        "fetch_state": fetch_state,
     }
@@ -0,0 +1,237 @@
+"""
+Shared HTTP client for fetching URLs to ingest.
+
+One long-lived httpx.AsyncClient per process (keep-alive connections,
+optional HTTP/2), created at startup and closed at shutdown. Requests
+are limited per host and spaced by a politeness delay, so bulk imports
+from a few domains reuse connections without hammering the sites.
+Bodies are streamed: non-HTML content types are rejected before any of
+the body is read, the download is abandoned once it exceeds a byte
+budget, and the text is decoded chunk by chunk, so only the decoded
+text is ever held in memory.
+
+Usage:
+    from app.services import fetcher
+
+    response = await fetcher.fetch(url, headers={"If-None-Match": etag})
+    response["status_code"], response["headers"], response["text"]
+"""
+
+import asyncio
+import codecs
+import hashlib
+import logging
+import re
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (compatible; VibedInsight/1.0; +https://github.com/vibedinsight)"
+
+_client: httpx.AsyncClient | None = None
+_host_semaphores: dict[str, asyncio.Semaphore] = {}
+_host_next_request: dict[str, float] = {}
+# Requests holding or waiting for each host's slots
+_host_active: dict[str, int] = {}
+
+# Hosts tracked before idle ones are evicted
+HOST_STATE_PRUNE_SIZE = 256
+
+
+class FetchError(Exception):
+    """A URL could not be fetched."""
+
+
+class ResponseTooLargeError(FetchError):
+    """The response body exceeds FETCH_MAX_BYTES."""
+
+
+class UnsupportedContentTypeError(FetchError):
+    """The response is not an HTML page (e.g. a PDF or video)."""
+
+
+# Bytes of the document head searched for a <meta> charset declaration
+SNIFF_BYTES = 4096
+
+# <meta charset="..."> or <meta http-equiv="Content-Type" content="...; charset=...">
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([a-zA-Z0-9_.:-]+)""", re.IGNORECASE)
+
+
+def _allowed_content_types() -> set[str]:
+    return {t.strip().lower() for t in settings.fetch_allowed_content_types.split(",") if t.strip()}
+
+
+def _sniff_encoding(head: bytes) -> str | None:
+    """Charset declared in the document's first bytes, if any."""
+    match = _META_CHARSET.search(head)
+    if match:
+        return match.group(1).decode("ascii")
+    return None
+
+
+def _incremental_decoder(encoding: str | None) -> codecs.IncrementalDecoder:
+    try:
+        return codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    except LookupError:
+        logger.warning(f"Unknown charset {encoding!r}, decoding as UTF-8")
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+def start() -> httpx.AsyncClient:
+    """Create the shared fetch client (idempotent)."""
+    global _client
+
+    if _client is None:
+        http2 = settings.fetch_http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("FETCH_HTTP2 requires httpx[http2], using HTTP/1.1")
+                http2 = False
+
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.fetch_timeout, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=settings.fetch_max_connections,
+                max_keepalive_connections=settings.fetch_max_connections,
+                keepalive_expiry=30.0,
+            ),
+            follow_redirects=True,
+            http2=http2,
+            headers={"User-Agent": USER_AGENT},
+        )
+        logger.info(
+            f"Fetch client ready (http2={http2}, {settings.fetch_max_per_host} requests per host)"
+        )
+    return _client
+
+
+async def close() -> None:
+    """Close the shared client's connection pool."""
+    global _client
+
+    if _client is None:
+        return
+    await _client.aclose()
+    _client = None
+    _host_semaphores.clear()
+    _host_next_request.clear()
+    _host_active.clear()
+    logger.info("Fetch client closed")
+
+
+def get_client() -> httpx.AsyncClient:
+    """Get the shared client, creating it on first use."""
+    return _client or start()
+
+
+def _prune_idle_hosts(now: float) -> None:
+    """Forget hosts with no requests in flight whose politeness delay has passed."""
+    for host in [host for host in _host_semaphores if host not in _host_active]:
+        if _host_next_request.get(host, now) <= now:
+            del _host_semaphores[host]
+            _host_next_request.pop(host, None)
+
+
+@asynccontextmanager
+async def _host_slot(host: str) -> AsyncIterator[None]:
+    """Hold one of the host's request slots, respecting the politeness delay."""
+    loop = asyncio.get_running_loop()
+    semaphore = _host_semaphores.get(host)
+    if semaphore is None:
+        # Bulk imports touch many hosts once; don't keep their state forever
+        if len(_host_semaphores) >= HOST_STATE_PRUNE_SIZE:
+            _prune_idle_hosts(loop.time())
+        semaphore = _host_semaphores[host] = asyncio.Semaphore(settings.fetch_max_per_host)
+
+    _host_active[host] = _host_active.get(host, 0) + 1
+    try:
+        async with semaphore:
+            # Reserve the next start time for this host before sleeping, so
+            # concurrent requests to the same host are spaced out, not bunched
+            now = loop.time()
+            start_at = max(now, _host_next_request.get(host, now))
+            _host_next_request[host] = start_at + settings.fetch_host_delay
+            if start_at > now:
+                await asyncio.sleep(start_at - now)
+            yield
+    finally:
+        _host_active[host] -= 1
+        if not _host_active[host]:
+            del _host_active[host]
+
+
+async def fetch(url: str, headers: dict[str, str] | None = None) -> dict:
+    """
+    GET an HTML page through the shared client.
+
+    Returns status_code, headers, text (decoded), content_hash (sha256 of
+    the raw body) and the final url after redirects. 304 responses are
+    returned as is with empty text; other non-2xx responses raise
+    httpx.HTTPStatusError.
+
+    Raises UnsupportedContentTypeError for non-HTML responses (checked
+    before the body is read) and ResponseTooLargeError as soon as the
+    body (announced or streamed) exceeds FETCH_MAX_BYTES.
+    """
+    max_bytes = settings.fetch_max_bytes
+    host = urlparse(url).netloc.lower()
+
+    async with _host_slot(host):
+        async with get_client().stream("GET", url, headers=headers) as response:
+            result = {
+                "status_code": response.status_code,
+                "headers": response.headers,
+                "text": "",
+                "content_hash": None,
+                "url": str(response.url),
+            }
+            if response.status_code == 304:
+                return result
+            response.raise_for_status()
+
+            # A missing Content-Type is allowed; trafilatura copes with non-HTML text
+            content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+            if content_type and content_type not in _allowed_content_types():
+                raise UnsupportedContentTypeError(f"Unsupported content type: {content_type}")
+
+            content_length = response.headers.get("content-length")
+            if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+                raise ResponseTooLargeError(
+                    f"Response too large ({content_length} bytes, limit {max_bytes})"
+                )
+
+            digest = hashlib.sha256()
+            decoder = _incremental_decoder(response.charset_encoding)
+            # Without a header charset, hold back the document head until
+            # its <meta charset> (if any) can be sniffed
+            head = None if response.charset_encoding else bytearray()
+            parts = []
+            size = 0
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ResponseTooLargeError(f"Response exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                if head is not None:
+                    head += chunk
+                    if len(head) < SNIFF_BYTES:
+                        continue
+                    decoder = _incremental_decoder(_sniff_encoding(head[:SNIFF_BYTES]))
+                    chunk, head = bytes(head), None
+                parts.append(decoder.decode(chunk))
+            if head is not None:
+                decoder = _incremental_decoder(_sniff_encoding(head))
+                parts.append(decoder.decode(bytes(head)))
+            parts.append(decoder.decode(b"", final=True))
+
+            result["text"] = "".join(parts)
+            result["content_hash"] = digest.hexdigest()
+            return result
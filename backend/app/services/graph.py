@@ -0,0 +1,382 @@
+"""
+Cached knowledge-graph snapshot for the graph endpoints.
+
+The nodes (completed items with their topics) and edges (item relations)
+are materialized once into plain dicts and serialized once; requests are
+served from the cached bytes with an ETag, so clients polling the graph
+get a 304 until something changes.
+
+The snapshot is rebuilt when it is stale:
+- invalidate() is called after commits in this process that change
+  titles, topics or relations
+- a cheap fingerprint query (completed item count and latest
+  processed_at, relation count and highest relation id) catches items
+  and relations written by other processes, e.g. the worker
+
+Requests can narrow the graph (GraphParams): to a set of items (e.g.
+the user's own), to the k-hop neighbourhood of a seed item, to edges
+above a weight, and to the max_nodes best-connected nodes. Nodes are
+returned best-connected first and can be paged with an opaque cursor;
+each page carries the edges whose later endpoint is on that page, so a
+client that accumulates pages gets every edge exactly once.
+
+Serialization uses orjson when installed (pip install .[speedups]) and
+falls back to the standard library json module.
+
+Privacy Design:
+- The graph only contains anonymous content items and their relations
+
+Usage:
+    from app.services import graph
+
+    snapshot = await graph.get_snapshot(db)
+    return graph.etag_response(request, snapshot.body, snapshot.etag)
+
+    # Or a filtered view
+    return await graph.graph_response(request, db, params, content_ids=user_content_ids)
+"""
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
+import logging
+import uuid
+from collections import Counter, defaultdict
+
+from fastapi import HTTPException, Query, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.content import (
+    ContentItem,
+    ItemRelation,
+    ProcessingStatus,
+    Topic,
+    content_topics,
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Largest page a client can ask for
+MAX_PAGE_NODES = 5000
+
+# Largest neighbourhood radius around a seed item
+MAX_HOPS = 3
+
+
+def dumps(obj) -> bytes:
+    """Serialize to JSON bytes (orjson if available)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def etag_response(request: Request, body: bytes, etag: str) -> Response:
+    """JSON response with an ETag, or 304 if the client already has it."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class GraphSnapshot:
+    """Materialized graph: node and edge dicts plus their serialized form."""
+
+    def __init__(self, nodes: list[dict], edges: list[dict], fingerprint: tuple, generation: int):
+        self.nodes = nodes
+        self.edges = edges
+        self.fingerprint = fingerprint
+        self.generation = generation
+        self.body = dumps(
+            {
+                "nodes": nodes,
+                "edges": edges,
+                "node_count": len(nodes),
+                "edge_count": len(edges),
+            }
+        )
+        self.etag = _etag(self.body)
+        self._nodes_by_id: dict[str, dict] | None = None
+
+    def nodes_by_id(self) -> dict[str, dict]:
+        if self._nodes_by_id is None:
+            self._nodes_by_id = {node["id"]: node for node in self.nodes}
+        return self._nodes_by_id
+
+    def subgraph(
+        self,
+        allowed: set[str] | None = None,
+        seed: str | None = None,
+        hops: int = 1,
+        min_weight: float = 0.0,
+        max_nodes: int | None = None,
+    ) -> tuple[list[dict], list[dict]]:
+        """
+        Nodes and edges of a filtered view, best-connected nodes first.
+
+        allowed restricts the nodes, min_weight the edges; with a seed only
+        nodes within hops edges of it are kept. max_nodes prunes to the
+        nodes with the highest degree in the view (the seed is always kept).
+        """
+        nodes_by_id = self.nodes_by_id()
+        node_ids = nodes_by_id.keys() if allowed is None else allowed & nodes_by_id.keys()
+        edges = [
+            edge
+            for edge in self.edges
+            if edge["weight"] >= min_weight
+            and edge["source"] in node_ids
+            and edge["target"] in node_ids
+        ]
+
+        if seed is not None:
+            adjacency: dict[str, list[str]] = defaultdict(list)
+            for edge in edges:
+                adjacency[edge["source"]].append(edge["target"])
+                adjacency[edge["target"]].append(edge["source"])
+            reached = {seed}
+            frontier = [seed]
+            for _ in range(hops):
+                next_frontier = []
+                for node_id in frontier:
+                    for neighbour in adjacency[node_id]:
+                        if neighbour not in reached:
+                            reached.add(neighbour)
+                            next_frontier.append(neighbour)
+                frontier = next_frontier
+            node_ids = reached
+            edges = [e for e in edges if e["source"] in reached and e["target"] in reached]
+
+        degree: Counter[str] = Counter()
+        for edge in edges:
+            degree[edge["source"]] += 1
+            degree[edge["target"]] += 1
+        order = sorted(node_ids, key=lambda node_id: (node_id != seed, -degree[node_id], node_id))
+
+        if max_nodes is not None and len(order) > max_nodes:
+            order = order[:max_nodes]
+            kept = set(order)
+            edges = [e for e in edges if e["source"] in kept and e["target"] in kept]
+
+        return [nodes_by_id[node_id] for node_id in order], edges
+
+
+class GraphParams:
+    """Query parameters narrowing a graph request."""
+
+    def __init__(
+        self,
+        seed: uuid.UUID | None = Query(None, description="Only the neighbourhood of this item"),
+        hops: int = Query(1, ge=1, le=MAX_HOPS, description="Neighbourhood radius around seed"),
+        min_weight: float = Query(0.0, ge=0.0, le=1.0, description="Minimum edge weight"),
+        max_nodes: int | None = Query(None, ge=1, description="Keep only the best-connected nodes"),
+        limit: int | None = Query(None, ge=1, le=MAX_PAGE_NODES, description="Nodes per page"),
+        cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    ):
+        self.seed = seed
+        self.hops = hops
+        self.min_weight = min_weight
+        self.max_nodes = max_nodes
+        self.limit = limit
+        self.cursor = cursor
+
+    @property
+    def is_default(self) -> bool:
+        return (
+            self.seed is None
+            and self.min_weight == 0.0
+            and self.max_nodes is None
+            and self.limit is None
+            and self.cursor is None
+        )
+
+
+def _encode_cursor(offset: int, version: str) -> str:
+    raw = json.dumps({"o": offset, "v": version}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[int, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return int(data["o"]), str(data["v"])
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+_snapshot: GraphSnapshot | None = None
+_generation = 0
+_build_lock = asyncio.Lock()
+
+
+def invalidate() -> None:
+    """Mark the cached snapshot stale (call after committing graph changes)."""
+    global _generation
+    _generation += 1
+
+
+async def _fingerprint(db: AsyncSession) -> tuple:
+    completed = ContentItem.status == ProcessingStatus.COMPLETED
+    query = select(
+        select(func.count()).select_from(ContentItem).where(completed).scalar_subquery(),
+        select(func.max(ContentItem.processed_at)).where(completed).scalar_subquery(),
+        select(func.count()).select_from(ItemRelation).scalar_subquery(),
+        select(func.max(ItemRelation.id)).scalar_subquery(),
+    )
+    return tuple((await db.execute(query)).one())
+
+
+async def _build(db: AsyncSession, fingerprint: tuple, generation: int) -> GraphSnapshot:
+    completed_ids = select(ContentItem.id).where(ContentItem.status == ProcessingStatus.COMPLETED)
+
+    # Topic names per item, in topic creation order
+    topics_result = await db.execute(
+        select(content_topics.c.content_id, Topic.name)
+        .join(Topic, Topic.id == content_topics.c.topic_id)
+        .where(content_topics.c.content_id.in_(completed_ids))
+        .order_by(content_topics.c.content_id, Topic.id)
+    )
+    topics_by_item: dict = defaultdict(list)
+    for content_id, name in topics_result.tuples():
+        topics_by_item[content_id].append(name)
+
+    items_result = await db.execute(
+        select(ContentItem.id, ContentItem.title, ContentItem.source)
+        .where(ContentItem.status == ProcessingStatus.COMPLETED)
+        .order_by(ContentItem.id)
+    )
+    nodes = []
+    for item_id, title, source in items_result.tuples():
+        topics = topics_by_item.get(item_id, [])
+        nodes.append(
+            {
+                "id": str(item_id),
+                "title": title or "Untitled",
+                "source": source,
+                "topic_count": len(topics),
+                # Primary topic for coloring
+                "primary_topic": topics[0] if topics else None,
+                "topics": topics,
+            }
+        )
+
+    relations_result = await db.execute(
+        select(
+            ItemRelation.source_id,
+            ItemRelation.target_id,
+            ItemRelation.confidence,
+            ItemRelation.relation_type,
+        ).order_by(ItemRelation.id)
+    )
+    edges = [
+        {
+            "source": str(source_id),
+            "target": str(target_id),
+            "weight": confidence,
+            "type": relation_type.value,
+        }
+        for source_id, target_id, confidence, relation_type in relations_result.tuples()
+    ]
+
+    return GraphSnapshot(nodes, edges, fingerprint, generation)
+
+
+async def get_snapshot(db: AsyncSession) -> GraphSnapshot:
+    """Get the current graph snapshot, rebuilding it if stale."""
+    global _snapshot
+
+    fingerprint = await _fingerprint(db)
+    snapshot = _snapshot
+    if snapshot and snapshot.generation == _generation and snapshot.fingerprint == fingerprint:
+        return snapshot
+
+    async with _build_lock:
+        # Another request may have rebuilt it while we waited
+        snapshot = _snapshot
+        if snapshot and snapshot.generation == _generation and snapshot.fingerprint == fingerprint:
+            return snapshot
+
+        generation = _generation
+        snapshot = await _build(db, fingerprint, generation)
+        _snapshot = snapshot
+        logger.info(
+            f"Graph snapshot rebuilt: {len(snapshot.nodes)} nodes, {len(snapshot.edges)} edges"
+        )
+        return snapshot
+
+
+async def graph_response(
+    request: Request,
+    db: AsyncSession,
+    params: GraphParams,
+    content_ids: set[uuid.UUID] | None = None,
+) -> Response:
+    """
+    Serve the graph, optionally restricted to content_ids and narrowed by params.
+
+    The unfiltered graph is served straight from the snapshot; filtered
+    views are computed from it in memory. Cursors are tied to the
+    snapshot they were issued for: once the graph changes, paging has to
+    restart (409).
+    """
+    snapshot = await get_snapshot(db)
+    if content_ids is None and params.is_default:
+        return etag_response(request, snapshot.body, snapshot.etag)
+
+    allowed = None if content_ids is None else {str(content_id) for content_id in content_ids}
+    seed = str(params.seed) if params.seed else None
+    if seed is not None and (
+        seed not in snapshot.nodes_by_id() or (allowed is not None and seed not in allowed)
+    ):
+        raise HTTPException(status_code=404, detail="Seed item not in graph")
+
+    nodes, edges = snapshot.subgraph(
+        allowed, seed, params.hops, params.min_weight, params.max_nodes
+    )
+    total_nodes, total_edges = len(nodes), len(edges)
+
+    next_cursor = None
+    if params.limit is not None or params.cursor is not None:
+        offset = 0
+        if params.cursor:
+            offset, version = _decode_cursor(params.cursor)
+            if version != snapshot.etag:
+                raise HTTPException(status_code=409, detail="Graph changed, restart paging")
+        end = offset + (params.limit or MAX_PAGE_NODES)
+
+        position = {node["id"]: i for i, node in enumerate(nodes)}
+        edges = [
+            edge
+            for edge in edges
+            if offset <= max(position[edge["source"]], position[edge["target"]]) < end
+        ]
+        nodes = nodes[offset:end]
+        if end < total_nodes:
+            next_cursor = _encode_cursor(end, snapshot.etag)
+
+    body = dumps(
+        {
+            "nodes": nodes,
+            "edges": edges,
+            "node_count": len(nodes),
+            "edge_count": len(edges),
+            "total_nodes": total_nodes,
+            "total_edges": total_edges,
+            "next_cursor": next_cursor,
+        }
+    )
+    return etag_response(request, body, _etag(body))
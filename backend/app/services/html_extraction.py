@@ -0,0 +1,107 @@
+"""
+Article extraction from HTML, run in a process pool.
+
+trafilatura is CPU-bound (lxml parsing plus heuristics) and can take
+seconds on large pages, so it runs in a bounded ProcessPoolExecutor
+instead of the event loop. The document is parsed once for both text
+and metadata (bare_extraction), and each job gets a CPU-time budget.
+
+This module is imported by the pool's worker processes, so it must stay
+free of app imports (database, settings) that would be costly to load.
+
+Usage:
+    from app.services.html_extraction import extract_html
+
+    result = await extract_html(html, url)  # {"title": ..., "text": ...}
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import trafilatura
+
+logger = logging.getLogger(__name__)
+
+_executor: ProcessPoolExecutor | None = None
+
+
+class ExtractionTimeoutError(Exception):
+    """Extraction used up its CPU-time budget."""
+
+
+def _on_cpu_timeout(signum, frame):
+    raise ExtractionTimeoutError("HTML extraction exceeded its CPU time limit")
+
+
+def extract_document(html: str, url: str | None = None, cpu_timeout: float | None = None) -> dict:
+    """
+    Extract main text and title from HTML (runs inside a pool worker).
+
+    cpu_timeout limits the CPU seconds spent on this document via a
+    virtual interval timer; it only works in a process's main thread.
+    """
+    if cpu_timeout:
+        previous = signal.signal(signal.SIGVTALRM, _on_cpu_timeout)
+        signal.setitimer(signal.ITIMER_VIRTUAL, cpu_timeout)
+    try:
+        document = trafilatura.bare_extraction(
+            html,
+            url=url,
+            include_comments=False,
+            include_tables=True,
+            with_metadata=True,
+        )
+    finally:
+        if cpu_timeout:
+            signal.setitimer(signal.ITIMER_VIRTUAL, 0)
+            signal.signal(signal.SIGVTALRM, previous)
+
+    if document is None:
+        return {"title": None, "text": None}
+    return {"title": document.title, "text": document.text}
+
+
+def start(workers: int) -> None:
+    """Create the extraction pool (idempotent); workers=0 extracts in a thread."""
+    global _executor
+
+    if _executor is None and workers > 0:
+        # spawn: forking a process with a running event loop and threads is unsafe
+        _executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        logger.info(f"HTML extraction pool started ({workers} workers)")
+
+
+def shutdown() -> None:
+    """Stop the extraction pool, cancelling queued jobs."""
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        logger.info("HTML extraction pool stopped")
+
+
+async def extract_html(html: str, url: str | None = None) -> dict:
+    """Extract title and text from HTML without blocking the event loop."""
+    from app.config import settings
+
+    start(settings.extraction_workers)
+    if _executor is None:
+        return await asyncio.to_thread(extract_document, html, url)
+
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(
+            _executor, extract_document, html, url, settings.extraction_timeout
+        )
+    except BrokenProcessPool:
+        # A worker died (e.g. crashed in lxml); replace the pool for later jobs
+        logger.error("HTML extraction pool broke, restarting it")
+        shutdown()
+        raise
@@ -0,0 +1,268 @@
+"""
+Durable job queue operations on top of the processing_jobs table.
+
+Usage:
+    # Enqueue inside the same transaction that creates the content
+    await enqueue_job(db, JOB_PROCESS_ITEM, item.id)
+    await db.commit()
+    notify_workers()
+
+Workers lease jobs with lease_jobs(), keep the lease alive with
+extend_lease() while a job runs, and report back with complete_job() or
+fail_job(); failed jobs are retried with exponential backoff until
+max_attempts is reached. A job's attempt number identifies the lease, so
+a worker whose lease expired and was taken over can no longer extend,
+complete or fail the job.
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, case, func, insert, literal, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.job import JobStatus, ProcessingJob
+
+logger = logging.getLogger(__name__)
+
+# Job kinds, one per pipeline stage: fetch -> process (summary + topics) -> embed -> relate
+JOB_FETCH_ITEM = "fetch_item"
+JOB_PROCESS_ITEM = "process_item"
+JOB_EMBED_ITEM = "embed_item"
+JOB_RELATE_ITEM = "relate_item"
+
+# Set when new jobs are committed, so in-process workers poll immediately
+_jobs_available = asyncio.Event()
+
+
+def notify_workers() -> None:
+    """Wake up in-process workers after committing new jobs."""
+    _jobs_available.set()
+
+
+async def wait_for_jobs(timeout: float) -> None:
+    """Wait until notify_workers() is called or the timeout expires."""
+    try:
+        await asyncio.wait_for(_jobs_available.wait(), timeout=timeout)
+    except TimeoutError:
+        pass
+    _jobs_available.clear()
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff in seconds after the given number of attempts."""
+    delay = settings.job_retry_base_seconds * (2 ** max(attempts - 1, 0))
+    return min(delay, settings.job_retry_max_seconds)
+
+
+async def enqueue_job(
+    db: AsyncSession,
+    kind: str,
+    content_id: uuid.UUID | None = None,
+) -> ProcessingJob:
+    """
+    Add a job to the queue (caller commits).
+
+    If the same job is already queued, that job is returned instead.
+    """
+    if content_id is not None:
+        existing_query = select(ProcessingJob).where(
+            ProcessingJob.kind == kind,
+            ProcessingJob.content_id == content_id,
+            ProcessingJob.status == JobStatus.QUEUED,
+        )
+        existing = (await db.execute(existing_query)).scalars().first()
+        if existing:
+            return existing
+
+    job = ProcessingJob(
+        kind=kind,
+        content_id=content_id,
+        status=JobStatus.QUEUED,
+        max_attempts=settings.job_max_attempts,
+        run_after=datetime.utcnow(),
+    )
+    db.add(job)
+    await db.flush()
+    return job
+
+
+async def enqueue_jobs(db: AsyncSession, kind: str, content_ids: list[uuid.UUID]) -> int:
+    """
+    Add one job per content item with a single INSERT (caller commits).
+
+    Meant for freshly created items, so no check for already queued jobs.
+    """
+    if not content_ids:
+        return 0
+
+    now = datetime.utcnow()
+    await db.execute(
+        insert(ProcessingJob),
+        [
+            {
+                "kind": kind,
+                "content_id": content_id,
+                "status": JobStatus.QUEUED,
+                "attempts": 0,
+                "max_attempts": settings.job_max_attempts,
+                "run_after": now,
+                "created_at": now,
+            }
+            for content_id in content_ids
+        ],
+    )
+    return len(content_ids)
+
+
+async def lease_jobs(
+    db: AsyncSession,
+    limit: int,
+    kinds: list[str] | None = None,
+) -> list[ProcessingJob]:
+    """
+    Lease up to limit runnable jobs and commit the lease.
+
+    Runnable jobs are queued jobs whose run_after has passed, plus running
+    jobs whose lease expired (their worker died) and that have attempts
+    left. Expired jobs without attempts left are marked FAILED, so a job
+    that keeps killing its worker is not retried forever. Rows locked by
+    other workers (leasing, sweeping or renewing a lease) are skipped
+    rather than waited for.
+    """
+    if limit <= 0:
+        return []
+
+    now = datetime.utcnow()
+    exhausted = (
+        select(ProcessingJob.id)
+        .where(
+            ProcessingJob.status == JobStatus.RUNNING,
+            ProcessingJob.locked_until < now,
+            ProcessingJob.attempts >= ProcessingJob.max_attempts,
+        )
+        .with_for_update(skip_locked=True)
+    )
+    await db.execute(
+        update(ProcessingJob)
+        .where(ProcessingJob.id.in_(exhausted.scalar_subquery()))
+        .values(
+            status=JobStatus.FAILED,
+            finished_at=now,
+            locked_until=None,
+            last_error="lease expired",
+        )
+    )
+
+    query = (
+        select(ProcessingJob)
+        .where(
+            or_(
+                and_(ProcessingJob.status == JobStatus.QUEUED, ProcessingJob.run_after <= now),
+                and_(
+                    ProcessingJob.status == JobStatus.RUNNING,
+                    ProcessingJob.locked_until < now,
+                    ProcessingJob.attempts < ProcessingJob.max_attempts,
+                ),
+            )
+        )
+        .order_by(ProcessingJob.run_after, ProcessingJob.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    if kinds is not None:
+        query = query.where(ProcessingJob.kind.in_(kinds))
+
+    jobs = list((await db.execute(query)).scalars().all())
+    for job in jobs:
+        job.status = JobStatus.RUNNING
+        job.attempts += 1
+        job.started_at = now
+        job.locked_until = now + timedelta(seconds=settings.job_lease_seconds)
+    await db.commit()
+    return jobs
+
+
+def _holds_lease(job_id: int, attempt: int):
+    return and_(
+        ProcessingJob.id == job_id,
+        ProcessingJob.status == JobStatus.RUNNING,
+        ProcessingJob.attempts == attempt,
+    )
+
+
+async def extend_lease(db: AsyncSession, job_id: int, attempt: int) -> bool:
+    """
+    Push back the lease of a running job by job_lease_seconds.
+
+    Returns False if the lease was lost (expired and taken over by another
+    worker, or the job is no longer running).
+    """
+    result = await db.execute(
+        update(ProcessingJob)
+        .where(_holds_lease(job_id, attempt))
+        .values(locked_until=datetime.utcnow() + timedelta(seconds=settings.job_lease_seconds))
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def complete_job(db: AsyncSession, job_id: int, attempt: int) -> bool:
+    """Mark a job as completed; returns False if the lease was lost meanwhile."""
+    result = await db.execute(
+        update(ProcessingJob)
+        .where(_holds_lease(job_id, attempt))
+        .values(
+            status=JobStatus.COMPLETED,
+            finished_at=datetime.utcnow(),
+            locked_until=None,
+            last_error=None,
+        )
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def fail_job(db: AsyncSession, job_id: int, attempt: int, error: str) -> JobStatus | None:
+    """
+    Record a failed attempt.
+
+    The job is re-queued with backoff, or marked FAILED once it has used
+    all its attempts. Returns the new status, or None if the lease was
+    lost meanwhile; such a job is left to its new worker.
+    """
+    now = datetime.utcnow()
+    status_type = ProcessingJob.__table__.c.status.type
+    exhausted = ProcessingJob.attempts >= ProcessingJob.max_attempts
+    result = await db.execute(
+        update(ProcessingJob)
+        .where(_holds_lease(job_id, attempt))
+        .values(
+            status=case(
+                (exhausted, literal(JobStatus.FAILED, status_type)),
+                else_=literal(JobStatus.QUEUED, status_type),
+            ),
+            finished_at=case((exhausted, literal(now)), else_=None),
+            run_after=now + timedelta(seconds=retry_delay(attempt)),
+            locked_until=None,
+            last_error=error[:2000],
+        )
+        .returning(ProcessingJob.status)
+    )
+    status = result.scalar_one_or_none()
+    await db.commit()
+    return status
+
+
+async def get_job_counts(db: AsyncSession) -> dict[str, dict[str, int]]:
+    """Count jobs per kind and status."""
+    query = select(ProcessingJob.kind, ProcessingJob.status, func.count()).group_by(
+        ProcessingJob.kind, ProcessingJob.status
+    )
+    counts: dict[str, dict[str, int]] = {}
+    for kind, status, count in (await db.execute(query)).all():
+        counts.setdefault(kind, {})[status.value] = count
+    return counts
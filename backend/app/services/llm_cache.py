@@ -0,0 +1,162 @@
+"""
+Content-hash keyed cache for LLM outputs.
+
+Summaries and topics are cached under
+sha256(kind, sha256(normalized text), sha256(prompt template), model),
+so reprocessing unchanged content is free while edits to the text,
+the prompt template or a model switch automatically miss the cache.
+
+The cache is best-effort: database errors are logged and treated as
+misses, never failing processing.
+
+Usage:
+    from app.services import llm_cache
+
+    cached = await llm_cache.get("summary", text, template)
+    if cached is None:
+        ...
+        await llm_cache.put("summary", text, template, summary)
+"""
+
+import hashlib
+import logging
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session_maker
+from app.models.llm_cache import LLMCacheEntry
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Process-local counters (reset on restart)
+_stats = {"hits": 0, "misses": 0, "writes": 0, "errors": 0, "evicted": 0}
+_writes_since_prune = 0
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so formatting-only differences hit the same entry."""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _sha256(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def cache_key(kind: str, text: str, template: str, model: str) -> str:
+    """Cache key for one LLM call (kind, input text, prompt template, model)."""
+    parts = [kind, _sha256(normalize_text(text)), _sha256(template), model]
+    return _sha256("\x1f".join(parts))
+
+
+async def get(kind: str, text: str, template: str) -> str | None:
+    """Return the cached output for this call, or None on a miss."""
+    if not settings.llm_cache_enabled:
+        return None
+
+    key = cache_key(kind, text, template, settings.ollama_model)
+    try:
+        async with async_session_maker() as db:
+            result = await db.execute(
+                update(LLMCacheEntry)
+                .where(LLMCacheEntry.key == key)
+                .values(hits=LLMCacheEntry.hits + 1, last_used_at=datetime.utcnow())
+                .returning(LLMCacheEntry.value)
+            )
+            value = result.scalar_one_or_none()
+            await db.commit()
+    except Exception as e:
+        _stats["errors"] += 1
+        logger.warning(f"LLM cache lookup failed: {e}")
+        return None
+
+    if value is None:
+        _stats["misses"] += 1
+        return None
+    _stats["hits"] += 1
+    logger.info(f"LLM cache hit ({kind})")
+    return value
+
+
+async def put(kind: str, text: str, template: str, value: str) -> None:
+    """Store an output, replacing any previous entry for the same key."""
+    global _writes_since_prune
+
+    if not settings.llm_cache_enabled:
+        return
+
+    now = datetime.utcnow()
+    stmt = insert(LLMCacheEntry).values(
+        key=cache_key(kind, text, template, settings.ollama_model),
+        kind=kind,
+        model=settings.ollama_model,
+        value=value,
+        hits=0,
+        created_at=now,
+        last_used_at=now,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[LLMCacheEntry.key],
+        set_={"value": stmt.excluded.value, "created_at": now, "last_used_at": now},
+    )
+    try:
+        async with async_session_maker() as db:
+            await db.execute(stmt)
+            await db.commit()
+    except Exception as e:
+        _stats["errors"] += 1
+        logger.warning(f"LLM cache write failed: {e}")
+        return
+
+    _stats["writes"] += 1
+    _writes_since_prune += 1
+    if _writes_since_prune < settings.llm_cache_prune_interval:
+        return
+    _writes_since_prune = 0
+    # The entry is written; a failed eviction is retried after the next interval
+    try:
+        async with async_session_maker() as db:
+            await prune(db)
+    except Exception as e:
+        logger.warning(f"LLM cache pruning failed: {e}")
+
+
+async def prune(
+    db: AsyncSession, max_entries: int | None = None, max_age_days: int | None = None
+) -> int:
+    """
+    Evict entries older than max_age_days, then the least recently used
+    entries beyond max_entries. Returns the number of evicted entries.
+    """
+    max_entries = settings.llm_cache_max_entries if max_entries is None else max_entries
+    max_age_days = settings.llm_cache_max_age_days if max_age_days is None else max_age_days
+
+    cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+    expired = await db.execute(delete(LLMCacheEntry).where(LLMCacheEntry.created_at < cutoff))
+
+    overflow_keys = (
+        select(LLMCacheEntry.key)
+        .order_by(LLMCacheEntry.last_used_at.desc())
+        .offset(max_entries)
+        .scalar_subquery()
+    )
+    overflow = await db.execute(delete(LLMCacheEntry).where(LLMCacheEntry.key.in_(overflow_keys)))
+    await db.commit()
+
+    evicted = (expired.rowcount or 0) + (overflow.rowcount or 0)
+    _stats["evicted"] += evicted
+    if evicted:
+        logger.info(f"LLM cache: evicted {evicted} entries")
+    return evicted
+
+
+def get_stats() -> dict:
+    """Hit/miss counters of this process since startup."""
+    lookups = _stats["hits"] + _stats["misses"]
+    return {**_stats, "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else None}
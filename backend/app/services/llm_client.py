@@ -0,0 +1,112 @@
+"""
+Shared Ollama client for all LLM and embedding calls.
+
+One long-lived ollama.AsyncClient per process, created at startup and
+closed at shutdown. Its keep-alive connection pool is an httpx transport
+owned by this module, so shutdown closes it without relying on the
+client's internals.
+Global semaphores cap in-flight requests so ingest bursts queue up here
+instead of overloading the Ollama host; chat and embed have separate
+limits because embeddings are much cheaper than completions.
+
+Usage:
+    from app.services import llm_client
+
+    response = await llm_client.chat([{"role": "user", "content": prompt}], timeout=300)
+    response = await llm_client.embed(["text one", "text two"], timeout=60)
+"""
+
+import asyncio
+import logging
+from typing import Any
+
+import httpx
+import ollama
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for a single HTTP request; callers apply tighter total timeouts
+CLIENT_TIMEOUT = 300.0
+
+_client: ollama.AsyncClient | None = None
+_transport: httpx.AsyncHTTPTransport | None = None
+_chat_semaphore: asyncio.Semaphore | None = None
+_embed_semaphore: asyncio.Semaphore | None = None
+
+
+def start() -> ollama.AsyncClient:
+    """Create the shared client and concurrency limiters (idempotent)."""
+    global _client, _transport, _chat_semaphore, _embed_semaphore
+
+    if _client is None:
+        _transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=settings.ollama_max_connections,
+                max_keepalive_connections=settings.ollama_max_connections,
+                keepalive_expiry=60.0,
+            ),
+        )
+        _client = ollama.AsyncClient(
+            host=settings.ollama_base_url,
+            timeout=httpx.Timeout(CLIENT_TIMEOUT, connect=30.0),
+            transport=_transport,
+        )
+        _chat_semaphore = asyncio.Semaphore(settings.ollama_max_concurrent_chat)
+        _embed_semaphore = asyncio.Semaphore(settings.ollama_max_concurrent_embed)
+        logger.info(
+            f"Ollama client ready ({settings.ollama_base_url}, "
+            f"chat limit {settings.ollama_max_concurrent_chat}, "
+            f"embed limit {settings.ollama_max_concurrent_embed})"
+        )
+    return _client
+
+
+async def close() -> None:
+    """Close the shared client's connection pool."""
+    global _client, _transport, _chat_semaphore, _embed_semaphore
+
+    if _client is None:
+        return
+    await _transport.aclose()
+    _client = _transport = _chat_semaphore = _embed_semaphore = None
+    logger.info("Ollama client closed")
+
+
+def get_client() -> ollama.AsyncClient:
+    """Get the shared client, creating it on first use."""
+    return _client or start()
+
+
+async def chat(messages: list[dict], timeout: float, **kwargs: Any):
+    """
+    Run a chat completion with the configured model.
+
+    Waiting for a free chat slot does not count against the timeout.
+    """
+    client = get_client()
+    async with _chat_semaphore:
+        return await asyncio.wait_for(
+            client.chat(model=settings.ollama_model, messages=messages, **kwargs),
+            timeout=timeout,
+        )
+
+
+async def embed(input: str | list[str], timeout: float):
+    """
+    Embed one or many texts with the configured embedding model.
+
+    Waiting for a free embed slot does not count against the timeout.
+    """
+    client = get_client()
+    async with _embed_semaphore:
+        return await asyncio.wait_for(
+            client.embed(model=settings.ollama_embedding_model, input=input),
+            timeout=timeout,
+        )
+
+
+async def list_models(timeout: float = 10.0):
+    """List the models available on the Ollama host."""
+    return await asyncio.wait_for(get_client().list(), timeout=timeout)
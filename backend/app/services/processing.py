@@ -0,0 +1,200 @@
+"""
+Content processing pipeline, one background job per stage:
+
+    fetch_item -> process_item -> embed_item -> relate_item
+    (download,    (summary +      (embedding)   (topic and
+     extract)      topics)                       similarity relations)
+
+Each stage queues the next one in the same transaction that stores its
+result, and the worker runs every stage with its own concurrency limit
+(see app.worker), so slow LLM calls never hold up fetching and vice
+versa. Stages run as background jobs (see app.services.jobs), never
+inside a request. Failures mark the item FAILED and are re-raised so
+the job queue can retry them.
+"""
+
+import logging
+import traceback
+import uuid
+from datetime import datetime
+
+import httpx
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.database import async_session_maker
+from app.models.content import ContentItem, ProcessingStatus
+from app.services.embeddings import generate_embedding_for_content, store_embeddings
+from app.services.extractor import extract_from_url, save_fetch_state
+from app.services.fetcher import FetchError
+from app.services.jobs import (
+    JOB_EMBED_ITEM,
+    JOB_PROCESS_ITEM,
+    JOB_RELATE_ITEM,
+    enqueue_job,
+    notify_workers,
+)
+from app.services.relations import calculate_relations, calculate_similarity_relations
+from app.services.summarizer import generate_summary_and_topics
+from app.services.topic_index import get_topic_index
+from app.services.topics import add_item_topics
+
+logger = logging.getLogger(__name__)
+
+
+async def _mark_failed(item_id: uuid.UUID) -> None:
+    async with async_session_maker() as db:
+        await db.execute(
+            update(ContentItem)
+            .where(ContentItem.id == item_id)
+            .values(status=ProcessingStatus.FAILED)
+        )
+        await db.commit()
+    logger.info(f"Item {item_id}: status set to FAILED")
+
+
+async def fetch_item(item_id: uuid.UUID):
+    """
+    Download and extract an item created from a bare URL (bulk import),
+    then queue it for processing.
+
+    No database connection is held while fetching. Errors that retrying
+    won't fix (client errors, oversized or non-HTML responses, pages
+    without text) fail the item without raising, so the job isn't retried.
+    """
+    async with async_session_maker() as db:
+        item = await db.get(ContentItem, item_id)
+        if not item or not item.url:
+            logger.warning(f"Item {item_id} not found or has no URL")
+            return
+        if item.raw_text or item.status == ProcessingStatus.COMPLETED:
+            logger.info(f"Item {item_id} already fetched")
+            return
+        url, url_hash = item.url, item.url_hash
+
+    logger.info(f"Item {item_id}: fetching {url}")
+    try:
+        extracted = await extract_from_url(url, url_hash=url_hash)
+    except Exception as e:
+        await _mark_failed(item_id)
+        status_code = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else 0
+        if isinstance(e, FetchError) or 400 <= status_code < 500:
+            logger.error(f"Item {item_id}: fetch failed permanently: {e}")
+            return
+        raise
+
+    if not extracted["text"]:
+        logger.error(f"Item {item_id}: could not extract text from {url}")
+        await _mark_failed(item_id)
+        return
+
+    async with async_session_maker() as db:
+        item = await db.get(ContentItem, item_id)
+        if not item:
+            return
+        if extracted["title"] and not item.title:
+            item.title = extracted["title"][:500]
+        item.source = extracted["source"]
+        item.raw_text = extracted["text"]
+        item.status = ProcessingStatus.PENDING
+        await save_fetch_state(db, extracted["fetch_state"])
+        await enqueue_job(db, JOB_PROCESS_ITEM, item_id)
+        await db.commit()
+    notify_workers()
+    logger.info(f"Item {item_id}: fetched, queued for processing")
+
+
+async def process_item(item_id: uuid.UUID):
+    """
+    Process a content item: generate summary, extract topics, relate.
+
+    Uses the shared connection pool from app.database. Raises the
+    processing error (after marking the item FAILED) so the caller
+    can retry.
+    """
+    logger.info(f"Starting processing for item {item_id}")
+
+    async with async_session_maker() as db:
+        item = await db.get(ContentItem, item_id)
+
+        if not item or not item.raw_text:
+            logger.warning(f"Item {item_id} not found or has no text")
+            return
+
+        try:
+            item.status = ProcessingStatus.PROCESSING
+            await db.commit()
+            logger.info(f"Item {item_id}: status set to PROCESSING")
+
+            # Generate summary and extract topics
+            logger.info(f"Item {item_id}: generating summary and topics...")
+            summary, topic_names = await generate_summary_and_topics(item.raw_text)
+            item.summary = summary
+            logger.info(f"Item {item_id}: summary generated, topics: {topic_names}")
+
+            # Get or create topics and add to item (bulk)
+            topic_ids = await add_item_topics(db, item_id, topic_names)
+
+            item.status = ProcessingStatus.COMPLETED
+            item.processed_at = datetime.utcnow()
+
+            # Delete raw_text after processing (privacy: minimal data retention)
+            item.raw_text = None
+
+            # Next stage: embed (if enabled), then relate
+            next_stage = JOB_EMBED_ITEM if settings.embeddings_on_ingest else JOB_RELATE_ITEM
+            await enqueue_job(db, next_stage, item_id)
+            await db.commit()
+            get_topic_index().add_topics(item_id, topic_ids)
+            notify_workers()
+
+            logger.info(f"Item {item_id}: processing COMPLETED successfully")
+
+        except Exception as e:
+            logger.error(f"Error processing item {item_id}: {e}")
+            logger.error(traceback.format_exc())
+            try:
+                await db.rollback()
+                result = await db.execute(select(ContentItem).where(ContentItem.id == item_id))
+                item = result.scalar_one_or_none()
+                if item:
+                    item.status = ProcessingStatus.FAILED
+                    await db.commit()
+                    logger.info(f"Item {item_id}: status set to FAILED")
+            except Exception as inner_e:
+                logger.error(f"Failed to update item {item_id} status: {inner_e}")
+            raise
+
+
+async def embed_item(item_id: uuid.UUID):
+    """Generate and store the embedding of a processed item, then queue relating."""
+    async with async_session_maker() as db:
+        result = await db.execute(
+            select(ContentItem.title, ContentItem.summary).where(ContentItem.id == item_id)
+        )
+        row = result.one_or_none()
+    if row is None:
+        logger.warning(f"Item {item_id} not found for embedding")
+        return
+
+    if row.title or row.summary:
+        embedding = await generate_embedding_for_content(row.title, row.summary)
+        if not embedding:
+            raise RuntimeError(f"Failed to generate embedding for item {item_id}")
+        async with async_session_maker() as db:
+            await store_embeddings(db, {item_id: embedding})
+        logger.info(f"Item {item_id}: embedding stored")
+
+    async with async_session_maker() as db:
+        await enqueue_job(db, JOB_RELATE_ITEM, item_id)
+        await db.commit()
+    notify_workers()
+
+
+async def relate_item(item_id: uuid.UUID):
+    """Create topic-overlap and embedding-similarity relations for an item."""
+    async with async_session_maker() as db:
+        await calculate_relations(item_id, db)
+        similar = await calculate_similarity_relations(item_id, db)
+        await db.commit()
+        logger.info(f"Item {item_id}: {similar} similarity relations created")
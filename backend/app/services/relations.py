@@ -0,0 +1,320 @@
+"""
+Relations between content items.
+
+Two kinds of relations are derived automatically:
+- RELATED: items sharing at least two topics
+- SIMILAR: items whose embeddings are close (cosine similarity)
+
+Privacy Design:
+- Relations connect anonymous content items, never users
+"""
+
+import logging
+import uuid
+from collections.abc import Iterable
+
+from sqlalchemy import (
+    Float,
+    Insert,
+    Select,
+    and_,
+    cast,
+    delete,
+    func,
+    literal,
+    or_,
+    select,
+    text,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.content import (
+    USE_PGVECTOR,
+    ContentEmbedding,
+    ContentItem,
+    ItemRelation,
+    ProcessingStatus,
+    RelationType,
+    content_topics,
+)
+from app.services import similarity
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_THRESHOLD = 0.7  # Minimum similarity to create a relation
+SIMILARITY_TOP_K = 20  # Maximum similarity relations per item
+MIN_SHARED_TOPICS = 2  # Minimum shared topics for a RELATED relation
+
+# Conflict target matching the unique unordered-pair index on item_relations
+_PAIR_INDEX_ELEMENTS = [text("LEAST(source_id, target_id)"), text("GREATEST(source_id, target_id)")]
+
+
+# Columns of the INSERT ... SELECT rows built below
+_RELATION_COLUMNS = [
+    "source_id",
+    "target_id",
+    "relation_type",
+    "confidence",
+    "auto_generated",
+    "created_at",
+]
+
+
+def _utc_now():
+    return func.timezone("utc", func.now())
+
+
+def _insert_relations_from(pairs: Select) -> Insert:
+    """
+    INSERT ... SELECT of (source_id, target_id, relation_type, confidence,
+    auto_generated, created_at).
+
+    Pairs that already have a relation of any type, in either direction,
+    are skipped by the unique pair index.
+    """
+    return (
+        insert(ItemRelation)
+        .from_select(
+            _RELATION_COLUMNS,
+            pairs,
+        )
+        .on_conflict_do_nothing()
+    )
+
+
+def _topic_pairs(item_ids: list[uuid.UUID]) -> Select:
+    """
+    The items' topic-overlap relations as INSERT ... SELECT rows.
+
+    Every item sharing at least MIN_SHARED_TOPICS topics with one of the
+    items; confidence is the shared fraction of that item's topics. A
+    pair of two given items appears once, from the lower id.
+    """
+    mine = content_topics.alias("mine")
+    other = content_topics.alias("other")
+    topic_counts = (
+        select(content_topics.c.content_id, func.count().label("n"))
+        .where(content_topics.c.content_id.in_(item_ids))
+        .group_by(content_topics.c.content_id)
+        .subquery("topic_counts")
+    )
+    shared = func.count()
+
+    return (
+        select(
+            mine.c.content_id.label("source_id"),
+            other.c.content_id.label("target_id"),
+            literal(RelationType.RELATED, ItemRelation.relation_type.type).label("relation_type"),
+            func.least(cast(shared, Float) / cast(topic_counts.c.n, Float), 1.0).label(
+                "confidence"
+            ),
+            literal(True).label("auto_generated"),
+            _utc_now().label("created_at"),
+        )
+        .select_from(
+            mine.join(
+                other,
+                and_(
+                    other.c.topic_id == mine.c.topic_id,
+                    other.c.content_id != mine.c.content_id,
+                ),
+            ).join(topic_counts, topic_counts.c.content_id == mine.c.content_id)
+        )
+        .where(
+            mine.c.content_id.in_(item_ids),
+            or_(other.c.content_id.not_in(item_ids), mine.c.content_id < other.c.content_id),
+        )
+        .group_by(mine.c.content_id, other.c.content_id, topic_counts.c.n)
+        .having(shared >= MIN_SHARED_TOPICS)
+    )
+
+
+def _pair_key(source_id, target_id):
+    return tuple_(func.least(source_id, target_id), func.greatest(source_id, target_id))
+
+
+async def calculate_relations(item_id: uuid.UUID, db: AsyncSession) -> int:
+    """
+    Relate an item to every item sharing at least MIN_SHARED_TOPICS topics.
+
+    One INSERT ... SELECT; existing relations are left alone. Returns the
+    number of relations created.
+    """
+    result = await db.execute(_insert_relations_from(_topic_pairs([item_id])))
+    logger.info(f"Item {item_id}: created {result.rowcount} relations")
+    return result.rowcount
+
+
+async def refresh_topic_relations(content_ids: Iterable[uuid.UUID], db: AsyncSession) -> None:
+    """
+    Recompute the topic-overlap relations of items whose topics changed.
+
+    Automatic RELATED relations of the items (in either direction) to
+    items that no longer share enough topics are deleted, and the current
+    overlaps are upserted with a fresh confidence: two statements for any
+    number of items. Relations created by users and relations of other
+    types are never touched. Runs in the caller's transaction, after the
+    topic change is flushed, so no full rebuild is needed.
+    """
+    item_ids = list(content_ids)
+    if not item_ids:
+        return
+
+    pairs = _topic_pairs(item_ids).subquery()
+    deleted = await db.execute(
+        delete(ItemRelation).where(
+            ItemRelation.auto_generated,
+            ItemRelation.relation_type == RelationType.RELATED,
+            or_(ItemRelation.source_id.in_(item_ids), ItemRelation.target_id.in_(item_ids)),
+            _pair_key(ItemRelation.source_id, ItemRelation.target_id).not_in(
+                select(
+                    func.least(pairs.c.source_id, pairs.c.target_id),
+                    func.greatest(pairs.c.source_id, pairs.c.target_id),
+                )
+            ),
+        )
+    )
+
+    stmt = insert(ItemRelation).from_select(_RELATION_COLUMNS, _topic_pairs(item_ids))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=_PAIR_INDEX_ELEMENTS,
+        set_={"confidence": stmt.excluded.confidence},
+        where=ItemRelation.auto_generated & (ItemRelation.relation_type == RelationType.RELATED),
+    )
+    upserted = await db.execute(stmt)
+    logger.info(
+        f"Topic relations of {len(item_ids)} items refreshed "
+        f"({deleted.rowcount} removed, {upserted.rowcount} upserted)"
+    )
+
+
+async def rebuild_topic_relations(db: AsyncSession) -> int:
+    """
+    Create RELATED relations between all completed items sharing topics.
+
+    A single set-based INSERT ... SELECT: content_topics is self-joined on
+    topic_id, grouped by (lower id, higher id) pair and kept if the pair
+    shares at least MIN_SHARED_TOPICS topics. The relation points from the
+    lower id; confidence is the shared fraction of that item's topics.
+    Returns the number of relations created.
+    """
+    a = content_topics.alias("a")
+    b = content_topics.alias("b")
+    completed = (
+        select(ContentItem.id)
+        .where(ContentItem.status == ProcessingStatus.COMPLETED)
+        .scalar_subquery()
+    )
+    topic_counts = (
+        select(content_topics.c.content_id, func.count().label("n"))
+        .group_by(content_topics.c.content_id)
+        .subquery("topic_counts")
+    )
+    shared = func.count()
+
+    pairs = (
+        select(
+            a.c.content_id,
+            b.c.content_id,
+            literal(RelationType.RELATED, ItemRelation.relation_type.type),
+            func.least(cast(shared, Float) / cast(topic_counts.c.n, Float), 1.0),
+            literal(True),
+            _utc_now(),
+        )
+        .select_from(
+            a.join(b, and_(b.c.topic_id == a.c.topic_id, a.c.content_id < b.c.content_id)).join(
+                topic_counts, topic_counts.c.content_id == a.c.content_id
+            )
+        )
+        .where(a.c.content_id.in_(completed), b.c.content_id.in_(completed))
+        .group_by(a.c.content_id, b.c.content_id, topic_counts.c.n)
+        .having(shared >= MIN_SHARED_TOPICS)
+    )
+
+    result = await db.execute(_insert_relations_from(pairs))
+    logger.info(f"Rebuilt topic relations: {result.rowcount} created")
+    return result.rowcount
+
+
+async def find_similar_items(
+    item_id: uuid.UUID,
+    embedding: list[float],
+    db: AsyncSession,
+    threshold: float,
+    k: int,
+) -> list[tuple[uuid.UUID, float]]:
+    """Find the k most similar other items above the threshold."""
+    if USE_PGVECTOR:
+        # Server-side nearest-neighbour search, served by the HNSW/IVFFlat index
+        distance = ContentEmbedding.embedding.cosine_distance(embedding)
+        query = (
+            select(ContentEmbedding.content_id, (1 - distance).label("similarity"))
+            .where(ContentEmbedding.content_id != item_id)
+            .order_by(distance)
+            .limit(k)
+        )
+        result = await db.execute(query)
+        return [
+            (row.content_id, row.similarity) for row in result.all() if row.similarity >= threshold
+        ]
+
+    # Array storage: load all other embeddings once and score them with a single matmul
+    others_query = select(ContentEmbedding.content_id, ContentEmbedding.embedding).where(
+        ContentEmbedding.content_id != item_id
+    )
+    others_result = await db.execute(others_query)
+    others = others_result.all()
+    if not others:
+        return []
+
+    matrix, kept = similarity.build_matrix([row.embedding for row in others])
+    if matrix.shape[1] != len(embedding):
+        return []
+
+    matches = similarity.top_k(embedding, matrix, k, threshold)
+    return [(others[kept[row]].content_id, score) for row, score in matches]
+
+
+async def calculate_similarity_relations(
+    item_id: uuid.UUID,
+    db: AsyncSession,
+    threshold: float = SIMILARITY_THRESHOLD,
+    k: int = SIMILARITY_TOP_K,
+) -> int:
+    """Calculate relations based on embedding similarity."""
+    # Get item's embedding
+    query = select(ContentEmbedding).where(ContentEmbedding.content_id == item_id)
+    result = await db.execute(query)
+    item_embedding = result.scalar_one_or_none()
+
+    if item_embedding is None:
+        return 0
+
+    matches = await find_similar_items(item_id, item_embedding.embedding, db, threshold, k)
+    if not matches:
+        return 0
+
+    # Pairs that already have a relation of any type are skipped by the unique pair index
+    stmt = (
+        insert(ItemRelation)
+        .values(
+            [
+                {
+                    "source_id": item_id,
+                    "target_id": other_id,
+                    "relation_type": RelationType.SIMILAR,
+                    "confidence": score,
+                    "auto_generated": True,
+                }
+                for other_id, score in matches
+            ]
+        )
+        .on_conflict_do_nothing()
+    )
+    result = await db.execute(stmt)
+    relations_created = result.rowcount
+    logger.info(f"Item {item_id}: created {relations_created} SIMILAR relations")
+
+    return relations_created
@@ -0,0 +1,263 @@
+"""
+Full-text search over content items.
+
+Backed by the generated content_items.search_vector column (title with
+weight A, summary with weight B, stemmed with both the German and the
+English configuration) and its GIN index:
+- Every word of the query must match; the last characters may be left
+  off (prefix matching: "algo" finds "algorithms")
+- The query is stemmed with both configurations and the results OR-ed,
+  so German and English inflections both match
+- Results are ranked with ts_rank (title hits weigh more)
+- Highlight snippets are generated only for the returned page
+
+Semantic search ranks items by cosine similarity between the query
+embedding (cached per query string) and the item embeddings held in
+the in-memory vector index, restricted to the items in scope.
+
+Hybrid search runs full-text and semantic candidate queries concurrently,
+each bounded to HYBRID_CANDIDATES items, and merges the two rankings
+with reciprocal rank fusion: an item scores sum(1 / (RRF_K + rank)) over
+the lists it appears in, so items ranked well by both float to the top.
+The semantic candidates are the nearest neighbours of the query within
+the scope: pgvector orders the scoped rows in SQL, otherwise the scoped
+ids are ranked exactly in the vector index (search_within), so filters
+never leave a small library without semantic candidates.
+
+Fuzzy search (pg_trgm) tolerates typos in titles and domains: the query
+is compared by trigram word similarity against title and source, served
+by the GIN trigram indexes on both columns.
+
+Usage:
+    from app.services import search
+
+    terms = search.parse_query(q)
+    query = query.where(search.matches(terms)).order_by(search.rank(terms).desc())
+    highlights = await search.highlights(db, [item.id for item in page], terms)
+
+    await search.set_fuzzy_threshold(db, 0.4)
+    query = query.where(search.fuzzy_matches(q)).order_by(search.fuzzy_rank(q).desc())
+
+    fused = await search.hybrid_search(q, scope)  # [(content_id, score), ...]
+"""
+
+import asyncio
+import re
+import uuid
+from collections import defaultdict
+from collections.abc import Iterable
+
+from sqlalchemy import Select, cast, func, literal, or_, select, text
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.config import settings
+from app.database import async_session_maker
+from app.models.content import SEARCH_CONFIGS, USE_PGVECTOR, ContentEmbedding, ContentItem
+from app.services.embeddings import embed_query
+from app.services.vector_index import get_vector_index
+
+# Words beyond this are ignored (keeps pathological queries cheap)
+MAX_QUERY_TERMS = 10
+
+# ts_headline options for highlight snippets
+HEADLINE_OPTIONS = (
+    "StartSel=<mark>, StopSel=</mark>, MaxWords=30, MinWords=10, "
+    'MaxFragments=2, FragmentDelimiter=" … "'
+)
+
+# Default minimum trigram word similarity for fuzzy matches (0-1)
+FUZZY_SIMILARITY_THRESHOLD = 0.4
+
+# Candidates taken from each ranking in hybrid search
+HYBRID_CANDIDATES = 100
+
+# Reciprocal rank fusion damping constant (the usual value from the literature)
+RRF_K = 60
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def parse_query(q: str) -> list[str]:
+    """Split a user query into lowercase search terms."""
+    return _WORD.findall(q.lower())[:MAX_QUERY_TERMS]
+
+
+def _prefix_query(terms: list[str]) -> str:
+    # Terms only contain word characters, so they need no tsquery escaping
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def _ts_query(terms: list[str], config: str) -> ColumnElement:
+    return func.to_tsquery(cast(literal(config), REGCONFIG), _prefix_query(terms))
+
+
+def ts_query(terms: list[str]) -> ColumnElement:
+    """The query in every search configuration, OR-ed together."""
+    queries = [_ts_query(terms, config) for config in SEARCH_CONFIGS]
+    query = queries[0]
+    for other in queries[1:]:
+        query = query.op("||")(other)
+    return query
+
+
+def matches(terms: list[str]) -> ColumnElement:
+    """Filter condition: the item's title or summary matches all terms."""
+    return ContentItem.search_vector.op("@@")(ts_query(terms))
+
+
+def rank(terms: list[str]) -> ColumnElement:
+    """Relevance of an item for the terms (higher is better)."""
+    return func.ts_rank(ContentItem.search_vector, ts_query(terms))
+
+
+async def highlights(
+    db: AsyncSession, content_ids: list[uuid.UUID], terms: list[str]
+) -> dict[uuid.UUID, str]:
+    """
+    Highlight snippets for the given items, with matches wrapped in <mark>.
+
+    The summary is preferred; items whose summary has no match fall back
+    to the title. Documents are parsed with the 'simple' configuration
+    (no stemming), so the query terms are matched as typed, by prefix.
+    """
+    if not content_ids or not terms:
+        return {}
+
+    simple = cast(literal("simple"), REGCONFIG)
+    query = func.to_tsquery(simple, _prefix_query(terms))
+
+    def headline(column):
+        return func.ts_headline(simple, func.coalesce(column, ""), query, HEADLINE_OPTIONS)
+
+    result = await db.execute(
+        select(
+            ContentItem.id,
+            headline(ContentItem.summary).label("summary"),
+            headline(ContentItem.title).label("title"),
+        ).where(ContentItem.id.in_(content_ids))
+    )
+    snippets = {}
+    for row in result.all():
+        for snippet in (row.summary, row.title):
+            if snippet and "<mark>" in snippet:
+                snippets[row.id] = snippet
+                break
+    return snippets
+
+
+async def set_fuzzy_threshold(db: AsyncSession, threshold: float) -> None:
+    """
+    Set the word similarity threshold for fuzzy_matches().
+
+    The trigram operators compare against this setting rather than an
+    argument, which is what lets them use the index. It is set for the
+    current transaction only.
+    """
+    await db.execute(
+        text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+        {"threshold": str(threshold)},
+    )
+
+
+def fuzzy_matches(q: str) -> ColumnElement:
+    """Filter condition: the query is similar to a word sequence of the title or source."""
+    return or_(
+        literal(q).op("<%")(ContentItem.title),
+        literal(q).op("<%")(ContentItem.source),
+    )
+
+
+def fuzzy_rank(q: str) -> ColumnElement:
+    """Best trigram word similarity of the query to title or source (0-1)."""
+    return func.greatest(
+        func.word_similarity(q, func.coalesce(ContentItem.title, "")),
+        func.word_similarity(q, func.coalesce(ContentItem.source, "")),
+    )
+
+
+async def semantic_search(
+    q: str, content_ids: list[uuid.UUID], k: int, min_score: float = -1.0
+) -> tuple[list[tuple[uuid.UUID, float]], int] | None:
+    """
+    Rank the given items by embedding similarity to the query.
+
+    Returns the k best (content_id, similarity) pairs and the number of
+    items scoring at least min_score, or None if the query could not be
+    embedded. Items without an embedding are not ranked.
+    """
+    embedding = await embed_query(q)
+    if embedding is None:
+        return None
+    return get_vector_index().search_within(embedding, content_ids, k, threshold=min_score)
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[list[uuid.UUID]], k: int = RRF_K
+) -> list[tuple[uuid.UUID, float]]:
+    """
+    Merge rankings (best first) into one, best first.
+
+    Each item scores sum(1 / (k + rank)) over the rankings containing it,
+    with ranks starting at 1. Ties keep first-seen order.
+    """
+    scores: dict[uuid.UUID, float] = defaultdict(float)
+    for ranking in rankings:
+        for position, content_id in enumerate(ranking, start=1):
+            scores[content_id] += 1.0 / (k + position)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+async def hybrid_search(
+    q: str, scope: Select, candidates: int = HYBRID_CANDIDATES
+) -> list[tuple[uuid.UUID, float]]:
+    """
+    Rank the items in scope by full-text and semantic relevance combined.
+
+    scope selects the content ids to search (with content_items joined),
+    so filters are applied before ranking. The full-text and the semantic
+    candidates are fetched concurrently on separate sessions, at most
+    `candidates` each, and fused with reciprocal_rank_fusion(). If the
+    query cannot be embedded, the full-text ranking is used alone.
+
+    Returns (content_id, fused score) pairs, best first.
+    """
+    terms = parse_query(q)
+    scope_id = scope.selected_columns[0]
+
+    async def lexical() -> list[uuid.UUID]:
+        if not terms:
+            return []
+        async with async_session_maker() as db:
+            result = await db.execute(
+                scope.where(matches(terms)).order_by(rank(terms).desc()).limit(candidates)
+            )
+            return list(result.scalars().all())
+
+    async def semantic() -> list[uuid.UUID]:
+        embedding = await embed_query(q)
+        if embedding is None:
+            return []
+
+        if USE_PGVECTOR:
+            # Nearest neighbours in scope, ordered by the database
+            distance = ContentEmbedding.embedding.cosine_distance(embedding)
+            query = (
+                scope.join(ContentEmbedding, ContentEmbedding.content_id == scope_id)
+                .where(ContentEmbedding.model == settings.ollama_embedding_model)
+                .order_by(distance)
+                .limit(candidates)
+            )
+            async with async_session_maker() as db:
+                return list((await db.execute(query)).scalars().all())
+
+        # Exact ranking of the items in scope (a user's library), so small
+        # scopes in a large shared corpus still get semantic candidates
+        async with async_session_maker() as db:
+            content_ids = list((await db.execute(scope)).scalars().all())
+        ranked, _ = get_vector_index().search_within(embedding, content_ids, k=candidates)
+        return [content_id for content_id, _ in ranked]
+
+    rankings = await asyncio.gather(lexical(), semantic())
+    return reciprocal_rank_fusion(rankings)
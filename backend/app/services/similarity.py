@@ -0,0 +1,141 @@
+"""
+Vectorized similarity engine for embedding vectors.
+
+Loads embeddings into a single L2-normalized NumPy matrix so cosine
+similarity becomes a plain dot product. Pairwise comparisons are done
+in row blocks to keep peak memory bounded (block_size x N floats)
+while still letting BLAS do the heavy lifting.
+"""
+
+import logging
+from collections import Counter
+from collections.abc import Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows per matrix multiply block (1024 x 10k float32 = ~40 MB)
+DEFAULT_BLOCK_SIZE = 1024
+
+
+def build_matrix(vectors: Sequence[Sequence[float]]) -> tuple[np.ndarray, list[int]]:
+    """
+    Stack vectors into an L2-normalized float32 matrix.
+
+    Vectors whose dimension differs from the most common one (e.g. left
+    over from a previous embedding model) are dropped.
+
+    Returns:
+        Tuple of (matrix with one row per kept vector, indices of kept vectors)
+    """
+    if not vectors:
+        return np.zeros((0, 0), dtype=np.float32), []
+
+    dims = Counter(len(v) for v in vectors)
+    dim = dims.most_common(1)[0][0]
+    kept = [i for i, v in enumerate(vectors) if len(v) == dim]
+
+    if len(kept) != len(vectors):
+        logger.warning(
+            f"Dropping {len(vectors) - len(kept)} vectors with dimension != {dim}"
+        )
+
+    matrix = np.asarray([vectors[i] for i in kept], dtype=np.float32)
+    return normalize_rows(matrix), kept
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row in place. Zero rows stay zero."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def top_k(
+    query: np.ndarray,
+    matrix: np.ndarray,
+    k: int,
+    threshold: float | None = None,
+) -> list[tuple[int, float]]:
+    """
+    Find the k rows of a normalized matrix most similar to a query vector.
+
+    Args:
+        query: Query vector (normalized or not)
+        matrix: L2-normalized matrix from build_matrix
+        k: Maximum number of results
+        threshold: Optional minimum similarity
+
+    Returns:
+        List of (row index, similarity) sorted by similarity descending
+    """
+    if matrix.shape[0] == 0 or k <= 0:
+        return []
+
+    q = np.asarray(query, dtype=np.float32)
+    norm = np.linalg.norm(q)
+    if norm == 0:
+        return []
+
+    scores = matrix @ (q / norm)
+    k = min(k, scores.shape[0])
+    idx = np.argpartition(-scores, k - 1)[:k]
+    idx = idx[np.argsort(-scores[idx])]
+
+    if threshold is not None:
+        idx = idx[scores[idx] >= threshold]
+
+    return [(int(i), float(scores[i])) for i in idx]
+
+
+def similar_pairs(
+    matrix: np.ndarray,
+    threshold: float,
+    k: int | None = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> list[tuple[int, int, float]]:
+    """
+    Find all unordered row pairs with similarity >= threshold.
+
+    Args:
+        matrix: L2-normalized matrix from build_matrix
+        threshold: Minimum cosine similarity for a pair
+        k: If set, only consider each row's k nearest neighbours
+        block_size: Number of rows per matrix multiply
+
+    Returns:
+        List of (i, j, similarity) with i < j, each pair once
+    """
+    n = matrix.shape[0]
+    if n < 2:
+        return []
+
+    pairs: dict[tuple[int, int], float] = {}
+
+    for start in range(0, n, block_size):
+        end = min(start + block_size, n)
+        scores = matrix[start:end] @ matrix.T
+        rows = np.arange(end - start)
+
+        if k is None:
+            # Only keep the upper triangle so each pair is emitted once
+            scores[np.arange(n)[None, :] <= (rows + start)[:, None]] = -np.inf
+            ii, jj = np.nonzero(scores >= threshold)
+            for i, j in zip(ii.tolist(), jj.tolist()):
+                pairs[(i + start, j)] = float(scores[i, j])
+            continue
+
+        # Exclude self-similarity, then take each row's top-k
+        scores[rows, rows + start] = -np.inf
+        kk = min(k, n - 1)
+        top = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        ii, cols = np.nonzero(top_scores >= threshold)
+        for i, c in zip(ii.tolist(), cols.tolist()):
+            a, b = i + start, int(top[i, c])
+            key = (a, b) if a < b else (b, a)
+            pairs[key] = float(top_scores[i, c])
+
+    return [(a, b, score) for (a, b), score in pairs.items()]
@@ -1,11 +1,9 @@
-import asyncio
+import json
 import logging
 from pathlib import Path
 
-import httpx
-import ollama
-
 from app.config import settings
+from app.services import llm_cache, llm_client
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +53,13 @@ def _parse_topics_response(content: str) -> list[str]:
         # Split by newlines for "topic1\ntopic2\ntopic3" format
         raw_topics = [line.strip() for line in text.split("\n") if line.strip()]
 
+    return _clean_topics(raw_topics)
+
+
+def _clean_topics(raw_topics: list[str]) -> list[str]:
+    """Normalize raw topic strings and drop preamble fragments."""
+    import re
+
     topics = []
     for topic in raw_topics:
         # Remove numbering (1., 2., etc.) and bullets (-, *)
@@ -105,26 +110,25 @@ async def generate_summary(text: str, language: str = "auto") -> str:
     Generate a summary of the given text using Ollama.
     """
     prompt_template = load_prompt("summary")
-    prompt = prompt_template.format(text=text[:8000])  # Limit input length
+    text = text[:8000]  # Limit input length
 
-    logger.info(f"Calling Ollama at {settings.ollama_base_url} with model {settings.ollama_model}")
+    cached = await llm_cache.get("summary", text, prompt_template)
+    if cached is not None:
+        return cached
 
-    # Create client with custom timeout
-    client = ollama.AsyncClient(
-        host=settings.ollama_base_url,
-        timeout=httpx.Timeout(OLLAMA_TIMEOUT, connect=30.0),
-    )
+    prompt = prompt_template.format(text=text)
+
+    logger.info(f"Calling Ollama at {settings.ollama_base_url} with model {settings.ollama_model}")
 
     try:
-        response = await asyncio.wait_for(
-            client.chat(
-                model=settings.ollama_model,
-                messages=[{"role": "user", "content": prompt}],
-            ),
+        response = await llm_client.chat(
+            [{"role": "user", "content": prompt}],
             timeout=OLLAMA_TIMEOUT,
         )
         logger.info("Ollama summary response received")
-        return response["message"]["content"]
+        content = response["message"]["content"]
+        await llm_cache.put("summary", text, prompt_template, content)
+        return content
     except TimeoutError:
         logger.error(f"Ollama request timed out after {OLLAMA_TIMEOUT}s")
         raise
@@ -139,28 +143,27 @@ async def extract_topics(text: str, existing_topics: list[str] | None = None) ->
     Note: existing_topics parameter is kept for backwards compatibility but ignored.
     """
     prompt_template = load_prompt("topics")
-    prompt = prompt_template.format(text=text[:4000])
+    text = text[:4000]
 
-    logger.info("Calling Ollama for topic extraction")
+    # The raw response is cached, so parser fixes apply to cached entries too
+    content = await llm_cache.get("topics", text, prompt_template)
+    if content is not None:
+        return list(set(_parse_topics_response(content)))[:10]
 
-    # Create client with custom timeout
-    client = ollama.AsyncClient(
-        host=settings.ollama_base_url,
-        timeout=httpx.Timeout(OLLAMA_TIMEOUT, connect=30.0),
-    )
+    prompt = prompt_template.format(text=text)
+
+    logger.info("Calling Ollama for topic extraction")
 
     try:
-        response = await asyncio.wait_for(
-            client.chat(
-                model=settings.ollama_model,
-                messages=[{"role": "user", "content": prompt}],
-            ),
+        response = await llm_client.chat(
+            [{"role": "user", "content": prompt}],
             timeout=OLLAMA_TIMEOUT,
         )
         logger.info("Ollama topics response received")
 
         # Parse response - handle various LLM output formats
         content = response["message"]["content"]
+        await llm_cache.put("topics", text, prompt_template, content)
         topics = _parse_topics_response(content)
 
         # Clean up and deduplicate
@@ -173,6 +176,96 @@ async def extract_topics(text: str, existing_topics: list[str] | None = None) ->
         raise
 
 
+def _parse_summary_topics_response(content: str) -> tuple[str, list[str]] | None:
+    """
+    Parse the JSON response of the combined summary/topics prompt.
+
+    Tolerates code fences and text around the JSON object, a summary given
+    as a list of bullet points, and topics given as a comma-separated
+    string. Returns None if no usable summary can be found.
+    """
+    text = content.strip()
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+
+    try:
+        data = json.loads(text[start : end + 1])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    # Models occasionally capitalize or translate the keys
+    data = {str(key).lower(): value for key, value in data.items()}
+    summary = data.get("summary") or data.get("zusammenfassung")
+    raw_topics = data.get("topics") or data.get("themen") or []
+
+    if isinstance(summary, list):
+        summary = "\n".join(
+            line if str(line).lstrip().startswith(("-", "*", "•")) else f"- {line}"
+            for line in (str(item).strip() for item in summary)
+            if line
+        )
+    if not isinstance(summary, str) or not summary.strip():
+        return None
+
+    if isinstance(raw_topics, str):
+        topics = _parse_topics_response(raw_topics)
+    elif isinstance(raw_topics, list):
+        topics = _clean_topics([str(t) for t in raw_topics if isinstance(t, str | int | float)])
+    else:
+        topics = []
+
+    return summary.strip(), list(dict.fromkeys(topics))[:10]
+
+
+async def generate_summary_and_topics(text: str) -> tuple[str, list[str]]:
+    """
+    Generate summary and topics for a text.
+
+    With OLLAMA_COMBINED_PROCESSING (default) both come from a single
+    JSON-format completion, so the text is only sent and processed once.
+    Falls back to the separate generate_summary/extract_topics calls if
+    the combined call fails or its response can't be parsed.
+    """
+    if settings.ollama_combined_processing:
+        prompt_template = load_prompt("summary_topics")
+        combined_text = text[:8000]
+
+        cached = await llm_cache.get("summary_topics", combined_text, prompt_template)
+        parsed = _parse_summary_topics_response(cached) if cached is not None else None
+        if parsed:
+            return parsed
+
+        prompt = prompt_template.format(text=combined_text)
+
+        logger.info("Calling Ollama for combined summary and topics")
+
+        try:
+            response = await llm_client.chat(
+                [{"role": "user", "content": prompt}],
+                timeout=OLLAMA_TIMEOUT,
+                format="json",
+            )
+            content = response["message"]["content"]
+            parsed = _parse_summary_topics_response(content)
+            if parsed:
+                logger.info("Ollama combined response received")
+                await llm_cache.put("summary_topics", combined_text, prompt_template, content)
+                return parsed
+            logger.warning("Could not parse combined response, falling back to two calls")
+        except TimeoutError:
+            logger.error(f"Ollama request timed out after {OLLAMA_TIMEOUT}s")
+            raise
+        except Exception as e:
+            logger.warning(f"Combined Ollama request failed, falling back to two calls: {e}")
+
+    summary = await generate_summary(text)
+    topics = await extract_topics(text)
+    return summary, topics
+
+
 def _build_topics_summary(topics_by_item: dict[str, list[str]]) -> str:
     """Build a topics overview string from topics data."""
     if not topics_by_item:
@@ -264,17 +357,9 @@ async def generate_weekly_summary(
 
     logger.info("Generating weekly summary with Ollama")
 
-    client = ollama.AsyncClient(
-        host=settings.ollama_base_url,
-        timeout=httpx.Timeout(OLLAMA_TIMEOUT, connect=30.0),
-    )
-
     try:
-        response = await asyncio.wait_for(
-            client.chat(
-                model=settings.ollama_model,
-                messages=[{"role": "user", "content": prompt}],
-            ),
+        response = await llm_client.chat(
+            [{"role": "user", "content": prompt}],
             timeout=OLLAMA_TIMEOUT,
         )
         logger.info("Weekly summary response received")
@@ -0,0 +1,240 @@
+"""
+In-process inverted index from topics to content items.
+
+- topic id -> sorted int32 array of item rows (posting list)
+- item row -> sorted int32 array of its topic ids (forward list)
+
+Shared-topic counts for an item are computed from the posting lists of
+its topics alone: they are concatenated and counted with np.unique, so
+the related-items lookup never scans content_topics. The forward lists
+are kept as small sorted arrays rather than bitsets over the whole topic
+vocabulary: items carry a handful of topics while the vocabulary grows
+into the tens of thousands, so a bitset per item would cost kilobytes.
+
+The index is warmed at startup from content_topics, updated whenever
+topics are written in this process, and caught up periodically with
+items processed elsewhere (e.g. by an out-of-process worker). Links
+removed elsewhere (items deleted, topics edited by another process)
+leave no trace to catch up on, so lookups check their candidates
+against content_topics and refresh the stale ones.
+
+Privacy Design:
+- Only anonymous content ids and topic ids are held, never users
+"""
+
+import logging
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.content import ContentItem, content_topics
+
+logger = logging.getLogger(__name__)
+
+_EMPTY = np.zeros(0, dtype=np.int32)
+
+
+class TopicIndex:
+    """Inverted topic -> items index with per-item topic lists."""
+
+    def __init__(self):
+        self.ids: list[uuid.UUID] = []
+        self._rows: dict[uuid.UUID, int] = {}
+        self._topics: list[np.ndarray] = []
+        self._postings: dict[int, np.ndarray] = {}
+        # Latest processed_at seen when loading from the database
+        self.synced_until: datetime | None = None
+
+    def __len__(self) -> int:
+        """Number of items with at least one topic."""
+        return sum(1 for topics in self._topics if len(topics))
+
+    @property
+    def topic_count(self) -> int:
+        return len(self._postings)
+
+    def __contains__(self, content_id: uuid.UUID) -> bool:
+        row = self._rows.get(content_id)
+        return row is not None and len(self._topics[row]) > 0
+
+    @classmethod
+    def build(cls, links: Iterable[tuple[uuid.UUID, int]]) -> "TopicIndex":
+        """Build the index in one pass from (content_id, topic_id) pairs."""
+        index = cls()
+        topics_by_row: dict[int, list[int]] = defaultdict(list)
+        rows_by_topic: dict[int, list[int]] = defaultdict(list)
+        for content_id, topic_id in links:
+            row = index._row(content_id)
+            topics_by_row[row].append(topic_id)
+            rows_by_topic[topic_id].append(row)
+
+        for row, topic_ids in topics_by_row.items():
+            index._topics[row] = np.unique(np.array(topic_ids, dtype=np.int32))
+        index._postings = {
+            topic_id: np.unique(np.array(rows, dtype=np.int32))
+            for topic_id, rows in rows_by_topic.items()
+        }
+        return index
+
+    def _row(self, content_id: uuid.UUID) -> int:
+        row = self._rows.get(content_id)
+        if row is None:
+            row = self._rows[content_id] = len(self.ids)
+            self.ids.append(content_id)
+            self._topics.append(_EMPTY)
+        return row
+
+    def topics(self, content_id: uuid.UUID) -> list[int]:
+        """Topic ids of an item (sorted)."""
+        row = self._rows.get(content_id)
+        return [] if row is None else self._topics[row].tolist()
+
+    def set_topics(self, content_id: uuid.UUID, topic_ids: Iterable[int]) -> None:
+        """Replace an item's topics, updating only the posting lists that change."""
+        row = self._row(content_id)
+        old = self._topics[row]
+        new = np.unique(np.fromiter(topic_ids, dtype=np.int32))
+
+        for topic_id in np.setdiff1d(old, new, assume_unique=True).tolist():
+            postings = self._postings.get(topic_id, _EMPTY)
+            pos = np.searchsorted(postings, row)
+            if pos < len(postings) and postings[pos] == row:
+                postings = np.delete(postings, pos)
+            if len(postings):
+                self._postings[topic_id] = postings
+            else:
+                self._postings.pop(topic_id, None)
+
+        for topic_id in np.setdiff1d(new, old, assume_unique=True).tolist():
+            postings = self._postings.get(topic_id, _EMPTY)
+            pos = np.searchsorted(postings, row)
+            self._postings[topic_id] = np.insert(postings, pos, row)
+
+        self._topics[row] = new
+
+    def add_topics(self, content_id: uuid.UUID, topic_ids: Iterable[int]) -> None:
+        """Add topics to an item, keeping the ones it already has."""
+        self.set_topics(content_id, [*self.topics(content_id), *topic_ids])
+
+    def remove_topic(self, topic_id: int) -> None:
+        """Drop a deleted topic from the index."""
+        for row in self._postings.pop(topic_id, _EMPTY).tolist():
+            topics = self._topics[row]
+            self._topics[row] = topics[topics != topic_id]
+
+    def shared_count(self, a: uuid.UUID, b: uuid.UUID) -> int:
+        """Number of topics two items share."""
+        row_a, row_b = self._rows.get(a), self._rows.get(b)
+        if row_a is None or row_b is None:
+            return 0
+        return len(np.intersect1d(self._topics[row_a], self._topics[row_b], assume_unique=True))
+
+    def shared_counts(
+        self, content_id: uuid.UUID, min_shared: int = 1, limit: int | None = None
+    ) -> list[tuple[uuid.UUID, int]]:
+        """
+        Items sharing topics with the given item, most shared topics first.
+
+        Returns (content_id, shared topic count) pairs with at least
+        min_shared shared topics, excluding the item itself.
+        """
+        row = self._rows.get(content_id)
+        if row is None or not len(self._topics[row]):
+            return []
+
+        candidates = np.concatenate(
+            [self._postings.get(topic_id, _EMPTY) for topic_id in self._topics[row].tolist()]
+        )
+        rows, counts = np.unique(candidates, return_counts=True)
+        keep = (rows != row) & (counts >= min_shared)
+        rows, counts = rows[keep], counts[keep]
+
+        # Stable sort: ties keep row (insertion) order
+        order = np.argsort(-counts, kind="stable")
+        if limit is not None:
+            order = order[:limit]
+        return [(self.ids[rows[i]], int(counts[i])) for i in order]
+
+
+# Global index instance (replaced on warm-up, use get_topic_index())
+_index = TopicIndex()
+_last_sync = 0.0
+
+
+def get_topic_index() -> TopicIndex:
+    """Get the process-wide topic index."""
+    return _index
+
+
+async def warm_topic_index(db: AsyncSession) -> TopicIndex:
+    """Build the index from content_topics."""
+    global _index, _last_sync
+
+    synced_until = await db.scalar(select(func.max(ContentItem.processed_at)))
+    result = await db.execute(select(content_topics.c.content_id, content_topics.c.topic_id))
+    index = TopicIndex.build(result.tuples().all())
+    index.synced_until = synced_until
+
+    logger.info(f"Topic index ready: {len(index)} items, {index.topic_count} topics")
+    _index = index
+    _last_sync = time.monotonic()
+    return index
+
+
+async def sync_topic_index(db: AsyncSession) -> None:
+    """
+    Catch up with items processed since the last sync.
+
+    Topics written in this process are applied directly; this picks up
+    items processed by other processes. Runs at most once every
+    topic_index_sync_interval seconds.
+    """
+    global _last_sync
+
+    now = time.monotonic()
+    if now - _last_sync < settings.topic_index_sync_interval:
+        return
+    _last_sync = now
+
+    query = select(ContentItem.id, ContentItem.processed_at).where(
+        ContentItem.processed_at.is_not(None)
+    )
+    if _index.synced_until is not None:
+        query = query.where(ContentItem.processed_at > _index.synced_until)
+    items = (await db.execute(query)).all()
+    if not items:
+        return
+
+    content_ids = [item.id for item in items]
+    await refresh_topic_index(db, content_ids)
+    _index.synced_until = max(item.processed_at for item in items)
+    logger.info(f"Topic index synced {len(content_ids)} items")
+
+
+async def refresh_topic_index(db: AsyncSession, content_ids: list[uuid.UUID]) -> None:
+    """
+    Reload the topics of the given items from content_topics.
+
+    Items without links (deleted, or all topics removed) are left with
+    no topics, so they drop out of every posting list.
+    """
+    if not content_ids:
+        return
+    result = await db.execute(
+        select(content_topics.c.content_id, content_topics.c.topic_id).where(
+            content_topics.c.content_id.in_(content_ids)
+        )
+    )
+    topics_by_item: dict[uuid.UUID, list[int]] = defaultdict(list)
+    for content_id, topic_id in result.tuples().all():
+        topics_by_item[content_id].append(topic_id)
+
+    for content_id in content_ids:
+        _index.set_topics(content_id, topics_by_item.get(content_id, []))
@@ -0,0 +1,98 @@
+"""
+Bulk topic resolution for processing.
+
+Topics extracted for an item are resolved to ids with one IN query
+(case-insensitive, so "Python" and "python" are the same topic; the
+first spelling seen is the one created), missing ones are created with
+a single INSERT ... ON CONFLICT DO NOTHING RETURNING (safe against
+concurrent workers creating the same topic), and the item is linked to
+all of them with one bulk insert.
+
+Privacy Design:
+- Topics are global and anonymous, shared across all users
+"""
+
+import logging
+import uuid
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.content import Topic, content_topics
+
+logger = logging.getLogger(__name__)
+
+# Topic.name column length
+MAX_TOPIC_LENGTH = 100
+
+
+def _clean_names(names: list[str]) -> list[str]:
+    cleaned = (name.strip()[:MAX_TOPIC_LENGTH] for name in names)
+    by_key: dict[str, str] = {}
+    for name in cleaned:
+        if name:
+            by_key.setdefault(name.lower(), name)
+    return list(by_key.values())
+
+
+async def _topic_ids_by_key(db: AsyncSession, names: list[str]) -> dict[str, int]:
+    """Existing topic ids by lowercased name; the oldest wins among case variants."""
+    result = await db.execute(
+        select(Topic.name, Topic.id)
+        .where(func.lower(Topic.name).in_([name.lower() for name in names]))
+        .order_by(Topic.id)
+    )
+    topic_ids: dict[str, int] = {}
+    for name, topic_id in result.tuples().all():
+        topic_ids.setdefault(name.lower(), topic_id)
+    return topic_ids
+
+
+async def get_or_create_topics(db: AsyncSession, names: list[str]) -> dict[str, int]:
+    """
+    Map topic names to ids, creating missing topics (caller commits).
+
+    Names match existing topics regardless of case.
+    """
+    names = _clean_names(names)
+    if not names:
+        return {}
+
+    topic_ids = await _topic_ids_by_key(db, names)
+
+    missing = [name for name in names if name.lower() not in topic_ids]
+    if missing:
+        now = datetime.utcnow()
+        stmt = (
+            insert(Topic)
+            .values([{"name": name, "created_at": now} for name in missing])
+            .on_conflict_do_nothing(index_elements=[Topic.name])
+            .returning(Topic.name, Topic.id)
+        )
+        result = await db.execute(stmt)
+        topic_ids.update((name.lower(), topic_id) for name, topic_id in result.tuples().all())
+
+        # Topics created concurrently by another transaction are not returned
+        raced = [name for name in missing if name.lower() not in topic_ids]
+        if raced:
+            topic_ids.update(await _topic_ids_by_key(db, raced))
+
+    return {name: topic_ids[name.lower()] for name in names if name.lower() in topic_ids}
+
+
+async def add_item_topics(db: AsyncSession, content_id: uuid.UUID, names: list[str]) -> list[int]:
+    """
+    Link an item to the named topics, creating missing ones (caller commits).
+
+    Links that already exist are kept. Returns the topic ids.
+    """
+    topic_ids = list((await get_or_create_topics(db, names)).values())
+    if topic_ids:
+        await db.execute(
+            insert(content_topics)
+            .values([{"content_id": content_id, "topic_id": topic_id} for topic_id in topic_ids])
+            .on_conflict_do_nothing()
+        )
+    return topic_ids
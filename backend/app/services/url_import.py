@@ -0,0 +1,100 @@
+"""
+Parse URL lists from import files for bulk ingestion.
+
+Supported formats:
+- JSONL: one URL string or object per line ("url", "href", "link",
+  Pocket's "resolved_url"/"given_url")
+- OPML: outline elements with htmlUrl/url/xmlUrl attributes
+- Netscape bookmark files (browser, Pocket and Pinboard HTML exports)
+- Anything else (plain text, CSV): http(s) URLs found in the text
+
+Usage:
+    urls = parse_url_list(file.filename, await file.read())
+"""
+
+import json
+import re
+import xml.etree.ElementTree as ET
+from html.parser import HTMLParser
+
+_URL_PATTERN = re.compile(r"""https?://[^\s"'<>,]+""")
+
+# JSON keys holding the URL, in order of preference
+_JSON_URL_KEYS = ("url", "href", "link", "resolved_url", "given_url")
+
+
+def _is_http_url(value: object) -> bool:
+    return isinstance(value, str) and value.startswith(("http://", "https://"))
+
+
+def _parse_jsonl(text: str) -> list[str]:
+    urls = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(entry, dict):
+            entry = next((entry[k] for k in _JSON_URL_KEYS if _is_http_url(entry.get(k))), None)
+        if _is_http_url(entry):
+            urls.append(entry)
+    return urls
+
+
+def _parse_opml(text: str) -> list[str]:
+    try:
+        root = ET.fromstring(text)
+    except ET.ParseError:
+        return []
+    urls = []
+    for outline in root.iter("outline"):
+        for attr in ("htmlUrl", "url", "xmlUrl"):
+            if _is_http_url(outline.get(attr)):
+                urls.append(outline.get(attr))
+                break
+    return urls
+
+
+class _BookmarkParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.urls: list[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            href = dict(attrs).get("href")
+            if _is_http_url(href):
+                self.urls.append(href)
+
+
+def _parse_bookmarks(text: str) -> list[str]:
+    parser = _BookmarkParser()
+    parser.feed(text)
+    parser.close()
+    return parser.urls
+
+
+def parse_url_list(filename: str | None, content: bytes) -> list[str]:
+    """
+    Extract http(s) URLs from an import file.
+
+    The format is chosen by file extension, falling back to sniffing the
+    content. Duplicates are removed, keeping the first occurrence.
+    """
+    text = content.decode("utf-8", errors="replace").lstrip("\ufeff")
+    name = (filename or "").lower()
+    head = text.lstrip()[:1000].lower()
+
+    if name.endswith((".jsonl", ".ndjson")) or head.startswith(("{", '"')):
+        urls = _parse_jsonl(text)
+    elif name.endswith(".opml") or "<opml" in head:
+        urls = _parse_opml(text)
+    elif name.endswith((".html", ".htm")) or "<!doctype netscape-bookmark" in head or "<a " in head:
+        urls = _parse_bookmarks(text)
+    else:
+        urls = _URL_PATTERN.findall(text)
+
+    return list(dict.fromkeys(url.strip() for url in urls))
@@ -0,0 +1,569 @@
+"""
+In-process approximate nearest-neighbour index over content embeddings.
+
+An IVF (inverted file) index in pure NumPy:
+- Vectors are L2-normalized and kept in one contiguous matrix
+- A k-means coarse quantizer splits the vectors into lists
+- Queries only score the vectors in the nprobe closest lists
+
+Small collections (below MIN_TRAIN_SIZE) are searched exhaustively,
+which is exact and still only a single matrix-vector product.
+
+The index is warmed at startup from a snapshot on disk (falling back to
+a full build from content_embeddings), updated whenever an embedding is
+written in this process, caught up periodically with embeddings written
+or deleted elsewhere (e.g. by an out-of-process worker, or cascaded with
+their content item), and snapshotted after enough changes and on
+shutdown. k-means training and snapshot writes run in a thread so they
+don't stall the event loop.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.content import ContentEmbedding
+from app.services.similarity import normalize_rows
+
+logger = logging.getLogger(__name__)
+
+# Below this size exhaustive search is fast enough and exact
+MIN_TRAIN_SIZE = 1024
+
+# k-means iterations for the coarse quantizer
+KMEANS_ITERATIONS = 10
+
+# Seconds to wait before writing a snapshot, so a burst of updates is saved once
+SNAPSHOT_DEBOUNCE_SECONDS = 5.0
+
+# Catch-up re-reads embeddings this far behind the watermark, since
+# updated_at is set before a concurrent writer's transaction commits
+SYNC_OVERLAP = timedelta(minutes=1)
+
+
+def _list_count(n: int) -> int:
+    """Number of IVF lists for n vectors."""
+    return max(1, int(4 * math.sqrt(n)))
+
+
+def kmeans(data: np.ndarray, nlist: int) -> np.ndarray:
+    """Spherical k-means centroids for normalized rows (pure, thread-safe)."""
+    rng = np.random.default_rng(0)
+    centroids = data[rng.choice(len(data), nlist, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assign = np.argmax(data @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, data)
+        # Empty lists keep their previous centroid
+        filled = np.bincount(assign, minlength=nlist) > 0
+        centroids[filled] = sums[filled]
+        normalize_rows(centroids)
+    return centroids
+
+
+class VectorIndex:
+    """IVF index mapping content IDs to normalized embedding vectors."""
+
+    def __init__(self, nprobe: int = 8):
+        self.nprobe = nprobe
+        self.model: str | None = None
+        self.snapshot_at: datetime | None = None
+        # Latest updated_at seen when loading from the database
+        self.synced_until: datetime | None = None
+        self._reset(0)
+
+    def _reset(self, dim: int) -> None:
+        self.dim = dim
+        self.ids: list[uuid.UUID | None] = []
+        self._rows: dict[uuid.UUID, int] = {}
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._centroids: np.ndarray | None = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._trained_size = 0
+        self._pending_changes = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, content_id: uuid.UUID) -> bool:
+        return content_id in self._rows
+
+    @property
+    def pending_changes(self) -> int:
+        """Number of updates since the last snapshot."""
+        return self._pending_changes
+
+    def vector(self, content_id: uuid.UUID) -> np.ndarray | None:
+        """Get the normalized vector for a content item."""
+        row = self._rows.get(content_id)
+        return None if row is None else self._vectors[row]
+
+    @property
+    def needs_training(self) -> bool:
+        """Whether the index has doubled in size since it was last trained."""
+        return len(self) >= max(MIN_TRAIN_SIZE, 2 * self._trained_size)
+
+    def add(self, content_id: uuid.UUID, vector: list[float] | np.ndarray) -> None:
+        """Insert or replace the vector for a content item."""
+        self.add_many([content_id], [vector])
+
+    def add_many(
+        self,
+        content_ids: list[uuid.UUID],
+        vectors: list[list[float]] | np.ndarray,
+    ) -> None:
+        """Insert or replace many vectors at once without retraining."""
+        if not content_ids:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if len(self) == 0 and matrix.shape[1] != self.dim:
+            self._reset(matrix.shape[1])
+        if matrix.shape[1] != self.dim:
+            logger.warning(f"Skipping {len(content_ids)} vectors: dimension != {self.dim}")
+            return
+        matrix = normalize_rows(matrix.copy())
+
+        for content_id, vec in zip(content_ids, matrix):
+            row = self._rows.get(content_id)
+            if row is None:
+                row = self._append_row()
+                self._rows[content_id] = row
+                self.ids[row] = content_id
+            self._vectors[row] = vec
+            self._alive[row] = True
+            if self._centroids is not None:
+                self._assignments[row] = int(np.argmax(self._centroids @ vec))
+
+        self._pending_changes += len(content_ids)
+
+    def remove(self, content_id: uuid.UUID) -> None:
+        """Remove a content item from the index."""
+        row = self._rows.pop(content_id, None)
+        if row is None:
+            return
+        self._alive[row] = False
+        self.ids[row] = None
+        self._pending_changes += 1
+
+    def _append_row(self) -> int:
+        """Reserve a row, growing the backing arrays geometrically."""
+        row = len(self.ids)
+        if row >= self._vectors.shape[0]:
+            capacity = max(64, 2 * self._vectors.shape[0])
+            vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+            vectors[:row] = self._vectors[:row]
+            alive = np.zeros(capacity, dtype=bool)
+            alive[:row] = self._alive[:row]
+            assignments = np.zeros(capacity, dtype=np.int32)
+            assignments[:row] = self._assignments[:row]
+            self._vectors, self._alive, self._assignments = vectors, alive, assignments
+        self.ids.append(None)
+        return row
+
+    def train(self) -> None:
+        """Fit the coarse quantizer with k-means over the live vectors."""
+        data, vectors = self.training_arrays()
+        if len(data) < MIN_TRAIN_SIZE:
+            self._centroids = None
+            return
+        centroids = kmeans(data, _list_count(len(data)))
+        self.set_centroids(centroids, np.argmax(vectors @ centroids.T, axis=1))
+
+    def training_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """Copies of the live vectors and of all rows, for training outside the loop."""
+        rows = len(self.ids)
+        return self._vectors[np.flatnonzero(self._alive[:rows])], self._vectors[:rows].copy()
+
+    def set_centroids(self, centroids: np.ndarray, assignments: np.ndarray) -> None:
+        """
+        Install a trained quantizer.
+
+        assignments covers the first len(assignments) rows; rows added
+        since are assigned here.
+        """
+        rows = len(self.ids)
+        done = min(len(assignments), rows)
+        self._centroids = centroids
+        self._assignments[:done] = assignments[:done]
+        if done < rows:
+            self._assignments[done:rows] = np.argmax(self._vectors[done:rows] @ centroids.T, axis=1)
+        self._trained_size = len(self)
+        logger.info(f"Vector index trained: {len(self)} vectors, {len(centroids)} lists")
+
+    def search(
+        self,
+        vector: list[float] | np.ndarray,
+        k: int = 10,
+        exclude: uuid.UUID | None = None,
+    ) -> list[tuple[uuid.UUID, float]]:
+        """
+        Find the k most similar content items.
+
+        Returns:
+            List of (content_id, cosine similarity) sorted descending
+        """
+        if len(self) == 0 or k <= 0:
+            return []
+
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if query.shape[0] != self.dim or norm == 0:
+            return []
+        query = query / norm
+
+        rows = len(self.ids)
+        candidates = self._alive[:rows].copy()
+        if self._centroids is not None:
+            nprobe = min(self.nprobe, len(self._centroids))
+            probe = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+            candidates &= np.isin(self._assignments[:rows], probe)
+        if exclude is not None and exclude in self._rows:
+            candidates[self._rows[exclude]] = False
+
+        cand_rows = np.flatnonzero(candidates)
+        if len(cand_rows) == 0:
+            return []
+
+        scores = self._vectors[cand_rows] @ query
+        k = min(k, len(cand_rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[cand_rows[i]], float(scores[i])) for i in top]
+
+    def search_within(
+        self,
+        vector: list[float] | np.ndarray,
+        content_ids: list[uuid.UUID],
+        k: int = 10,
+        threshold: float = -1.0,
+    ) -> tuple[list[tuple[uuid.UUID, float]], int]:
+        """
+        Exact search restricted to the given content items.
+
+        Scores all given items present in the index with one matrix-vector
+        product (no IVF probing, so results are exact for small subsets
+        such as a user's library).
+
+        Returns:
+            The k best (content_id, cosine similarity) pairs at or above
+            threshold, sorted descending, and the number of items at or
+            above threshold
+        """
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if len(self) == 0 or query.shape[0] != self.dim or norm == 0:
+            return [], 0
+        query = query / norm
+
+        rows = np.fromiter((self._rows[c] for c in content_ids if c in self._rows), dtype=np.int64)
+        if len(rows) == 0:
+            return [], 0
+
+        scores = self._vectors[rows] @ query
+        matching = np.flatnonzero(scores >= threshold)
+        total = len(matching)
+        k = min(k, total)
+        if k <= 0:
+            return [], total
+
+        top = matching[np.argpartition(-scores[matching], k - 1)[:k]]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.ids[rows[i]], float(scores[i])) for i in top], total
+
+    def snapshot(self) -> dict[str, np.ndarray]:
+        """Copy of the index contents, for writing outside the event loop."""
+        rows = len(self.ids)
+        live = self._alive[:rows]
+        return {
+            "ids": np.array([str(i) for i, alive in zip(self.ids, live) if alive], dtype="U36"),
+            "vectors": self._vectors[:rows][live],
+            "centroids": (
+                self._centroids.copy() if self._centroids is not None else np.zeros((0, self.dim))
+            ),
+            "model": np.array(self.model or ""),
+        }
+
+    def save(self, path: str | Path) -> None:
+        """Write the index to disk atomically."""
+        pending = self._pending_changes
+        self.mark_saved(write_snapshot(path, self.snapshot()), pending)
+
+    def mark_saved(self, saved_at: datetime, pending: int) -> None:
+        """Record a snapshot that covered the first `pending` changes."""
+        self.snapshot_at = saved_at
+        self._pending_changes = max(0, self._pending_changes - pending)
+
+    @classmethod
+    def load(cls, path: str | Path, nprobe: int = 8) -> "VectorIndex":
+        """Load an index snapshot written by save()."""
+        with np.load(path) as data:
+            index = cls(nprobe=nprobe)
+            ids = [uuid.UUID(str(content_id)) for content_id in data["ids"]]
+            index.add_many(ids, data["vectors"])
+            if len(data["centroids"]):
+                index._centroids = data["centroids"].astype(np.float32)
+                rows = len(index.ids)
+                index._assignments[:rows] = np.argmax(
+                    index._vectors[:rows] @ index._centroids.T, axis=1
+                )
+                index._trained_size = len(index)
+            index.model = str(data["model"]) or None
+            index.snapshot_at = datetime.fromisoformat(str(data["saved_at"]))
+            index._pending_changes = 0
+        return index
+
+
+def write_snapshot(path: str | Path, arrays: dict[str, np.ndarray]) -> datetime:
+    """Write snapshot() arrays to disk atomically; returns the snapshot time."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    saved_at = datetime.utcnow()
+    # Unique temp name: the API and worker processes may both be writing
+    tmp_path = path.with_name(f"{path.stem}.{uuid.uuid4().hex}.tmp.npz")
+    np.savez(tmp_path, saved_at=np.array(saved_at.isoformat()), **arrays)
+    os.replace(tmp_path, path)
+    logger.info(f"Vector index snapshot written: {len(arrays['ids'])} vectors -> {path}")
+    return saved_at
+
+
+# Global index instance (replaced on warm-up, use get_vector_index())
+_index = VectorIndex(nprobe=settings.vector_index_nprobe)
+# Snapshots are only written once the index holds every embedding
+_warmed = False
+_last_sync = 0.0
+_training = False
+_snapshot_task: asyncio.Task | None = None
+
+
+def get_vector_index() -> VectorIndex:
+    """Get the process-wide vector index."""
+    return _index
+
+
+async def warm_vector_index(db: AsyncSession) -> VectorIndex:
+    """
+    Load the index snapshot and catch up with embeddings written since.
+
+    Falls back to a full build from content_embeddings if there is no
+    usable snapshot (missing, unreadable, built with another model, or
+    out of sync because embeddings were deleted).
+    """
+    global _index, _warmed, _last_sync
+
+    model = settings.ollama_embedding_model
+    synced_until = await db.scalar(
+        select(func.max(ContentEmbedding.updated_at)).where(ContentEmbedding.model == model)
+    )
+    path = Path(settings.vector_index_path)
+    index: VectorIndex | None = None
+    if path.exists():
+        try:
+            index = VectorIndex.load(path, nprobe=settings.vector_index_nprobe)
+        except Exception as e:
+            logger.warning(f"Could not load vector index snapshot {path}: {e}")
+        else:
+            if index.model != model:
+                logger.info("Vector index snapshot was built with another model, rebuilding")
+                index = None
+
+    base_query = select(ContentEmbedding.content_id, ContentEmbedding.embedding).where(
+        ContentEmbedding.model == model
+    )
+
+    if index is not None and index.snapshot_at is not None:
+        result = await db.execute(
+            base_query.where(ContentEmbedding.updated_at >= index.snapshot_at)
+        )
+        rows = result.all()
+        index.add_many([r.content_id for r in rows], [r.embedding for r in rows])
+
+        total = await db.scalar(
+            select(func.count()).select_from(ContentEmbedding).where(
+                ContentEmbedding.model == model
+            )
+        )
+        if total != len(index):
+            logger.info(f"Vector index snapshot out of sync ({len(index)} vs {total}), rebuilding")
+            index = None
+
+    if index is None or index.snapshot_at is None:
+        index = VectorIndex(nprobe=settings.vector_index_nprobe)
+        index.model = model
+        result = await db.execute(base_query)
+        rows = result.all()
+        index.add_many([r.content_id for r in rows], [r.embedding for r in rows])
+
+    if index.pending_changes:
+        index.train()
+
+    logger.info(f"Vector index ready: {len(index)} vectors ({index.pending_changes} new)")
+    index.synced_until = synced_until
+    _index = index
+    _warmed = True
+    _last_sync = time.monotonic()
+    save_vector_index(force=True)
+    return index
+
+
+async def update_vector_index(embeddings: dict[uuid.UUID, list[float]]) -> None:
+    """
+    Apply embeddings written in this process.
+
+    Retrains the quantizer in a thread once the index has doubled, and
+    schedules a debounced snapshot once enough changes accumulated.
+    """
+    _index.add_many(list(embeddings), list(embeddings.values()))
+    await _train_if_needed()
+    _schedule_snapshot()
+
+
+async def sync_vector_index(db: AsyncSession) -> None:
+    """
+    Catch up with embeddings written since the last sync.
+
+    Embeddings written in this process are applied directly; this picks
+    up the ones written by other processes and drops deleted ones. Runs
+    at most once every vector_index_sync_interval seconds, and only on a
+    warmed index.
+    """
+    global _last_sync
+
+    now = time.monotonic()
+    if not _warmed or now - _last_sync < settings.vector_index_sync_interval:
+        return
+    _last_sync = now
+
+    index = _index
+    since = index.synced_until
+    query = select(
+        ContentEmbedding.content_id, ContentEmbedding.embedding, ContentEmbedding.updated_at
+    ).where(ContentEmbedding.model == settings.ollama_embedding_model)
+    if since is not None:
+        query = query.where(ContentEmbedding.updated_at > since - SYNC_OVERLAP)
+    rows = (await db.execute(query)).all()
+    if rows:
+        # Rows in the overlap window that are already indexed are unchanged
+        new = [
+            r for r in rows if since is None or r.updated_at > since or r.content_id not in index
+        ]
+        index.add_many([r.content_id for r in new], [r.embedding for r in new])
+        index.synced_until = max(r.updated_at for r in rows)
+        if since is not None:
+            index.synced_until = max(index.synced_until, since)
+        if new:
+            logger.info(f"Vector index synced {len(new)} embeddings")
+            await _train_if_needed()
+            _schedule_snapshot()
+
+    await _drop_deleted(db)
+
+
+async def _drop_deleted(db: AsyncSession) -> None:
+    """
+    Remove vectors whose embedding no longer exists.
+
+    Embeddings disappear with their content item (ON DELETE CASCADE),
+    which leaves no updated_at to catch up on; a count mismatch is the
+    cheap signal, and only then are the stored ids compared.
+    """
+    model = settings.ollama_embedding_model
+    total = await db.scalar(
+        select(func.count()).select_from(ContentEmbedding).where(ContentEmbedding.model == model)
+    )
+    if total is None or total >= len(_index):
+        return
+    result = await db.execute(
+        select(ContentEmbedding.content_id).where(ContentEmbedding.model == model)
+    )
+    stored = set(result.scalars().all())
+    remove_from_vector_index(
+        [content_id for content_id in _index.ids if content_id and content_id not in stored]
+    )
+
+
+def remove_from_vector_index(content_ids: list[uuid.UUID]) -> None:
+    """
+    Drop deleted items from the index.
+
+    Call after committing the deletion of content items or their
+    embeddings; the removals count towards the next snapshot.
+    """
+    removed = [content_id for content_id in content_ids if content_id in _index]
+    for content_id in removed:
+        _index.remove(content_id)
+    if removed:
+        logger.info(f"Vector index removed {len(removed)} deleted embeddings")
+        _schedule_snapshot()
+
+
+async def _train_if_needed() -> None:
+    global _training
+
+    index = _index
+    if _training or not index.needs_training:
+        return
+    _training = True
+    try:
+        data, vectors = index.training_arrays()
+
+        def fit() -> tuple[np.ndarray, np.ndarray]:
+            centroids = kmeans(data, _list_count(len(data)))
+            return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+        centroids, assignments = await asyncio.to_thread(fit)
+        index.set_centroids(centroids, assignments)
+    finally:
+        _training = False
+
+
+def _schedule_snapshot() -> None:
+    global _snapshot_task
+
+    if not _warmed or _index.pending_changes < settings.vector_index_snapshot_interval:
+        return
+    if _snapshot_task is not None and not _snapshot_task.done():
+        return
+    _snapshot_task = asyncio.create_task(_snapshot_later())
+
+
+async def _snapshot_later() -> None:
+    await asyncio.sleep(SNAPSHOT_DEBOUNCE_SECONDS)
+    index = _index
+    pending = index.pending_changes
+    try:
+        saved_at = await asyncio.to_thread(
+            write_snapshot, settings.vector_index_path, index.snapshot()
+        )
+    except OSError as e:
+        logger.error(f"Failed to write vector index snapshot: {e}")
+        return
+    index.mark_saved(saved_at, pending)
+
+
+def save_vector_index(force: bool = False) -> None:
+    """
+    Snapshot the index to disk.
+
+    Without force, only writes once vector_index_snapshot_interval
+    changes have accumulated since the last snapshot.
+    """
+    pending = _index.pending_changes
+    if not _warmed or not pending:
+        return
+    if not force and pending < settings.vector_index_snapshot_interval:
+        return
+    try:
+        _index.save(settings.vector_index_path)
+    except OSError as e:
+        logger.error(f"Failed to write vector index snapshot: {e}")
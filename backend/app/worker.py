@@ -0,0 +1,219 @@
+"""
+Background worker pool for the durable job queue.
+
+Runs inside the API process (WORKER_IN_PROCESS=true, the default) or
+standalone, so ingest bursts don't compete with API requests:
+
+    python -m app.worker
+
+Each pipeline stage (fetch, process, embed, relate) has its own
+concurrency limit per worker process (WORKER_FETCH_CONCURRENCY,
+WORKER_CONCURRENCY for the LLM stage, WORKER_EMBED_CONCURRENCY,
+WORKER_RELATE_CONCURRENCY); any number of worker processes can share
+the queue.
+"""
+
+import asyncio
+import logging
+import signal
+import sys
+import traceback
+import uuid
+from collections.abc import Awaitable, Callable
+
+from app.config import settings
+from app.database import async_session_maker, engine
+from app.models.job import JobStatus, ProcessingJob
+from app.services import fetcher, html_extraction, llm_client
+from app.services.jobs import (
+    JOB_EMBED_ITEM,
+    JOB_FETCH_ITEM,
+    JOB_PROCESS_ITEM,
+    JOB_RELATE_ITEM,
+    complete_job,
+    extend_lease,
+    fail_job,
+    lease_jobs,
+    wait_for_jobs,
+)
+from app.services.processing import embed_item, fetch_item, process_item, relate_item
+from app.services.vector_index import save_vector_index, warm_vector_index
+
+logger = logging.getLogger(__name__)
+
+
+# Leases are renewed after this fraction of job_lease_seconds
+LEASE_RENEW_FRACTION = 1 / 3
+
+# Job kind -> handler taking the job's content_id
+JOB_HANDLERS: dict[str, Callable[[uuid.UUID], Awaitable[None]]] = {
+    JOB_FETCH_ITEM: fetch_item,
+    JOB_PROCESS_ITEM: process_item,
+    JOB_EMBED_ITEM: embed_item,
+    JOB_RELATE_ITEM: relate_item,
+}
+
+
+def stage_concurrency() -> dict[str, int]:
+    """Configured number of jobs per kind that may run at once."""
+    return {
+        JOB_FETCH_ITEM: settings.worker_fetch_concurrency,
+        JOB_PROCESS_ITEM: settings.worker_concurrency,
+        JOB_EMBED_ITEM: settings.worker_embed_concurrency,
+        JOB_RELATE_ITEM: settings.worker_relate_concurrency,
+    }
+
+
+class Worker:
+    """Leases jobs from the queue and runs them with per-stage concurrency limits."""
+
+    def __init__(self, concurrency: dict[str, int] | None = None):
+        self.concurrency = concurrency or stage_concurrency()
+        self._running: dict[str, set[asyncio.Task]] = {kind: set() for kind in self.concurrency}
+        self._loop_task: asyncio.Task | None = None
+        self._stopping = False
+
+    def start(self) -> None:
+        """Start the polling loop as a background task."""
+        self._stopping = False
+        self._loop_task = asyncio.create_task(self.run())
+        logger.info(f"Worker started (concurrency {self.concurrency})")
+
+    def _all_running(self) -> set[asyncio.Task]:
+        return set().union(*self._running.values())
+
+    async def run(self) -> None:
+        """Poll for jobs until stop() is called."""
+        while not self._stopping:
+            # Lease per stage, so a backlog in one stage can't starve the others
+            saturated = False
+            try:
+                async with async_session_maker() as db:
+                    for kind, limit in self.concurrency.items():
+                        free = limit - len(self._running[kind])
+                        if free <= 0:
+                            continue
+                        jobs = await lease_jobs(db, free, kinds=[kind])
+                        for job in jobs:
+                            self._spawn(job)
+                        saturated = saturated or len(jobs) == free
+            except Exception as e:
+                logger.error(f"Failed to lease jobs: {e}")
+
+            # Poll again right away if the queue may have more work for free slots
+            if saturated:
+                continue
+            # Otherwise wait for new jobs, a finished job (freeing a slot) or the poll interval
+            waiter = asyncio.create_task(wait_for_jobs(settings.worker_poll_interval))
+            await asyncio.wait({waiter, *self._all_running()}, return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+
+    def _spawn(self, job: ProcessingJob) -> None:
+        running = self._running[job.kind]
+        task = asyncio.create_task(self._run_job(job.id, job.kind, job.content_id, job.attempts))
+        running.add(task)
+        task.add_done_callback(running.discard)
+
+    async def _run_job(
+        self, job_id: int, kind: str, content_id: uuid.UUID | None, attempt: int
+    ) -> None:
+        logger.info(f"Job {job_id} ({kind}) started for {content_id}")
+        handler = asyncio.create_task(JOB_HANDLERS[kind](content_id))
+        heartbeat = asyncio.create_task(self._keep_leased(job_id, attempt, handler))
+        try:
+            await handler
+        except asyncio.CancelledError:
+            if heartbeat.done() and not heartbeat.cancelled() and heartbeat.result():
+                # Lease lost: the worker that took it over runs the job
+                return
+            # Shutdown: the lease expires and another worker picks the job up
+            raise
+        except Exception as e:
+            logger.error(f"Job {job_id} ({kind}) failed: {e}")
+            logger.debug(traceback.format_exc())
+            async with async_session_maker() as db:
+                status = await fail_job(db, job_id, attempt, f"{type(e).__name__}: {e}")
+            if status == JobStatus.FAILED:
+                logger.error(f"Job {job_id} ({kind}) gave up after max attempts")
+            return
+        finally:
+            heartbeat.cancel()
+
+        async with async_session_maker() as db:
+            completed = await complete_job(db, job_id, attempt)
+        if completed:
+            logger.info(f"Job {job_id} ({kind}) completed")
+        else:
+            logger.warning(f"Job {job_id} ({kind}) finished after losing its lease")
+
+    async def _keep_leased(self, job_id: int, attempt: int, handler: asyncio.Task) -> bool:
+        """
+        Extend the job's lease while it runs, so slow jobs (long LLM calls,
+        big imports) aren't re-leased by another worker. If the lease was
+        lost anyway, the handler is cancelled and True returned.
+        """
+        while True:
+            await asyncio.sleep(settings.job_lease_seconds * LEASE_RENEW_FRACTION)
+            try:
+                async with async_session_maker() as db:
+                    if await extend_lease(db, job_id, attempt):
+                        continue
+            except Exception as e:
+                # Try again next time; the lease is still valid for a while
+                logger.warning(f"Could not extend lease of job {job_id}: {e}")
+                continue
+            logger.warning(f"Job {job_id} lost its lease, stopping it")
+            handler.cancel()
+            return True
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Stop polling and give running jobs a grace period to finish."""
+        self._stopping = True
+        if self._loop_task:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+        running = self._all_running()
+        if running:
+            _done, pending = await asyncio.wait(running, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        logger.info("Worker stopped")
+
+
+async def main() -> None:
+    """Run a standalone worker until SIGINT/SIGTERM."""
+    llm_client.start()
+    fetcher.start()
+    html_extraction.start(settings.extraction_workers)
+    # Embeddings written here go into the shared snapshot, which must
+    # never be written from a partial index
+    try:
+        async with async_session_maker() as db:
+            await warm_vector_index(db)
+    except Exception as e:
+        logger.error(f"Failed to warm vector index: {e}")
+    worker = Worker()
+    worker.start()
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    await stop_event.wait()
+    await worker.stop()
+    save_vector_index(force=True)
+    await llm_client.close()
+    await fetcher.close()
+    html_extraction.shutdown()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler(sys.stdout)],
+    )
+    asyncio.run(main())
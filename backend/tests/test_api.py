@@ -1,7 +1,16 @@
+from datetime import datetime
+
 import pytest
+from fastapi import HTTPException
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import asyncpg
 
 from app.main import app
+from app.models.content import ProcessingStatus
+from app.models.user import UserItem
+from app.routers.user_items import _decode_cursor, _encode_cursor, _Explain
+from app.services import search
 
 
 @pytest.fixture
@@ -35,3 +44,33 @@ async def test_list_topics_empty(client: AsyncClient):
     response = await client.get("/topics")
     assert response.status_code == 200
     assert isinstance(response.json(), list)
+
+
+def test_item_cursor_round_trip():
+    created = datetime(2026, 10, 16, 12, 30, 5, 123456)
+    cursor = _encode_cursor("date:desc", created, 42)
+    assert _decode_cursor(cursor, "date:desc") == (created, 42)
+
+    cursor = _encode_cursor("status:asc", ProcessingStatus.COMPLETED, 7)
+    assert _decode_cursor(cursor, "status:asc") == (ProcessingStatus.COMPLETED, 7)
+
+    with pytest.raises(HTTPException) as exc:
+        _decode_cursor(cursor, "title:asc")
+    assert exc.value.status_code == 400
+
+    with pytest.raises(HTTPException):
+        _decode_cursor("not-a-cursor", "date:desc")
+
+
+def test_count_estimate_binds_the_search_string():
+    query = (
+        select(UserItem)
+        .join(UserItem.content)
+        .where(UserItem.user_id == 5, search.fuzzy_matches("o'neil; --"))
+    )
+
+    compiled = _Explain(query).compile(dialect=asyncpg.dialect())
+
+    assert str(compiled).startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert "o'neil" not in str(compiled)
+    assert "o'neil; --" in compiled.params.values()
@@ -0,0 +1,66 @@
+from app.services import embeddings, llm_client
+
+
+class FakeClient:
+    """Stands in for ollama.AsyncClient; fails batches containing 'bad'."""
+
+    calls: list[list[str]] = []
+
+    def __init__(self, **kwargs):
+        pass
+
+    async def embed(self, model: str, input: list[str]):
+        FakeClient.calls.append(input)
+        if "bad" in input:
+            raise RuntimeError("model error")
+        return {"embeddings": [[float(len(text))] for text in input]}
+
+
+async def test_generate_embeddings_batches_and_keeps_order(monkeypatch):
+    FakeClient.calls = []
+    monkeypatch.setattr(llm_client.ollama, "AsyncClient", FakeClient)
+    monkeypatch.setattr(llm_client, "_client", None)
+
+    texts = ["a", "bb", "ccc", "bad", "eeeee"]
+    result = await embeddings.generate_embeddings(texts, batch_size=2, concurrency=2)
+
+    assert sorted(len(batch) for batch in FakeClient.calls) == [1, 2, 2]
+    # The batch containing "bad" failed as a whole, the others are in input order
+    assert result == [[1.0], [2.0], None, None, [5.0]]
+
+
+async def test_embed_query_is_cached_per_query(monkeypatch):
+    FakeClient.calls = []
+    monkeypatch.setattr(llm_client.ollama, "AsyncClient", FakeClient)
+    monkeypatch.setattr(llm_client, "_client", None)
+    monkeypatch.setattr(embeddings, "_query_cache", embeddings.OrderedDict())
+
+    first = await embeddings.embed_query("neural  networks")
+    second = await embeddings.embed_query(" neural networks ")
+    await embeddings.embed_query("graphs")
+    failed = await embeddings.embed_query("bad")
+    await embeddings.embed_query("bad")
+
+    assert first is not None and second == first
+    assert failed is None
+    # Whitespace variants hit the cache, failures are retried
+    assert FakeClient.calls == ["neural networks", "graphs", "bad", "bad"]
+
+
+async def test_close_shuts_down_the_owned_connection_pool(monkeypatch):
+    closed = []
+
+    class Transport(llm_client.httpx.AsyncHTTPTransport):
+        async def aclose(self):
+            closed.append(self)
+            await super().aclose()
+
+    monkeypatch.setattr(llm_client.httpx, "AsyncHTTPTransport", Transport)
+    monkeypatch.setattr(llm_client, "_client", None)
+
+    llm_client.start()
+    transport = llm_client._transport
+    await llm_client.close()
+
+    assert closed == [transport]
+    assert llm_client._client is None and llm_client._transport is None
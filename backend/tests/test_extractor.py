@@ -0,0 +1,120 @@
+import contextlib
+import hashlib
+
+import httpx
+from sqlalchemy.dialects import postgresql
+
+from app.config import settings
+from app.models.fetch_state import UrlFetchState
+from app.services import extractor, fetcher
+
+HTML = (
+    "<html><head><title>Hello</title></head>"
+    "<body><article><p>Some text.</p></article></body></html>"
+)
+
+
+def _patch_fetch(monkeypatch, handler, state=None):
+    """Serve requests from handler with the given stored fetch state."""
+
+    async def load_state(url_hash):
+        return state
+
+    monkeypatch.setattr(settings, "extraction_workers", 0)
+    monkeypatch.setattr(extractor, "_load_fetch_state", load_state)
+    monkeypatch.setattr(settings, "fetch_host_delay", 0.0)
+    monkeypatch.setattr(
+        fetcher, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+
+
+async def test_conditional_fetch_sends_validators_and_handles_304(monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(304)
+
+    state = UrlFetchState(url_hash="h", etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    _patch_fetch(monkeypatch, handler, state)
+
+    result = await extractor.extract_from_url("https://example.com/a", "h", conditional=True)
+
+    assert result["unchanged"] is True
+    assert result["text"] is None
+    assert requests[0].headers["if-none-match"] == '"v1"'
+    assert requests[0].headers["if-modified-since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+    assert result["fetch_state"]["etag"] == '"v1"'
+    assert result["fetch_state"]["changed"] is False
+
+
+async def test_conditional_fetch_detects_identical_body(monkeypatch):
+    def handler(request):
+        return httpx.Response(200, text=HTML, headers={"content-type": "text/html"})
+
+    content_hash = hashlib.sha256(HTML.encode()).hexdigest()
+    state = UrlFetchState(url_hash="h", content_hash=content_hash)
+    _patch_fetch(monkeypatch, handler, state)
+
+    result = await extractor.extract_from_url("https://example.com/a", "h", conditional=True)
+
+    assert result["unchanged"] is True
+    # Validators are refreshed, but the body counts as unchanged
+    assert result["fetch_state"]["changed"] is False
+
+
+async def test_unconditional_fetch_extracts_and_records_state(monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, text=HTML, headers={"content-type": "text/html", "etag": '"v2"'})
+
+    _patch_fetch(monkeypatch, handler)
+
+    result = await extractor.extract_from_url("https://www.example.com/a", "h")
+
+    assert result["unchanged"] is False
+    assert result["source"] == "example.com"
+    assert "if-none-match" not in requests[0].headers
+    fetch_state = result["fetch_state"]
+    assert fetch_state["url_hash"] == "h" and fetch_state["etag"] == '"v2"'
+    assert fetch_state["changed"] is True
+
+
+class FakeSession:
+    """Records executed statements; begin_nested() is a no-op savepoint."""
+
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    def begin_nested(self):
+        return contextlib.nullcontext()
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+
+    async def commit(self):
+        self.commits += 1
+
+
+async def test_save_fetch_state_leaves_commit_to_caller():
+    db = FakeSession()
+    fetch_state = {
+        "url_hash": "h",
+        "etag": '"v2"',
+        "last_modified": None,
+        "content_hash": "abc",
+        "changed": False,
+    }
+
+    await extractor.save_fetch_state(db, fetch_state)
+    await extractor.save_fetch_state(db, None)
+
+    assert db.commits == 0
+    assert len(db.statements) == 1
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (url_hash) DO UPDATE" in sql
+    # An unchanged body keeps the stored content hash
+    assert "content_hash" not in sql.split("DO UPDATE")[1]
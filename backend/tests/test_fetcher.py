@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.services import fetcher
+
+
+def _use_transport(monkeypatch, handler):
+    monkeypatch.setattr(
+        fetcher, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    monkeypatch.setattr(fetcher, "_host_semaphores", {})
+    monkeypatch.setattr(fetcher, "_host_next_request", {})
+    monkeypatch.setattr(fetcher, "_host_active", {})
+
+
+async def test_fetch_rejects_oversized_bodies(monkeypatch):
+    monkeypatch.setattr(settings, "fetch_max_bytes", 100)
+    monkeypatch.setattr(settings, "fetch_host_delay", 0.0)
+
+    def announced(request):
+        return httpx.Response(200, content=b"x" * 50, headers={"content-length": "5000"})
+
+    _use_transport(monkeypatch, announced)
+    with pytest.raises(fetcher.ResponseTooLargeError):
+        await fetcher.fetch("https://example.com/big")
+
+    async def chunks():
+        for _ in range(10):
+            yield b"x" * 20
+
+    def streamed(request):
+        return httpx.Response(200, content=chunks())
+
+    _use_transport(monkeypatch, streamed)
+    with pytest.raises(fetcher.ResponseTooLargeError):
+        await fetcher.fetch("https://example.com/stream")
+
+
+async def test_fetch_spaces_requests_to_the_same_host(monkeypatch):
+    monkeypatch.setattr(settings, "fetch_host_delay", 0.05)
+    monkeypatch.setattr(settings, "fetch_max_per_host", 2)
+    sleeps: list[float] = []
+    real_sleep = asyncio.sleep
+
+    async def recording_sleep(delay, *args, **kwargs):
+        # Record the politeness delays asked for rather than timing the
+        # handler, which depends on how busy the event loop is
+        sleeps.append(delay)
+        await real_sleep(delay, *args, **kwargs)
+
+    monkeypatch.setattr(fetcher.asyncio, "sleep", recording_sleep)
+    _use_transport(monkeypatch, lambda request: httpx.Response(200, content=b"ok"))
+    await asyncio.gather(
+        fetcher.fetch("https://a.example/1"),
+        fetcher.fetch("https://a.example/2"),
+        fetcher.fetch("https://b.example/1"),
+    )
+
+    # Only the second request to a.example waits (the delay minus the time
+    # since the first one started); other hosts are not delayed
+    assert len(sleeps) == 1
+    assert 0 < sleeps[0] <= 0.05
+
+
+async def test_fetch_forgets_idle_hosts(monkeypatch):
+    monkeypatch.setattr(settings, "fetch_host_delay", 0.05)
+    monkeypatch.setattr(fetcher, "HOST_STATE_PRUNE_SIZE", 2)
+    _use_transport(monkeypatch, lambda request: httpx.Response(200, content=b"ok"))
+
+    await fetcher.fetch("https://a.example/")
+    await fetcher.fetch("https://b.example/")
+    # b.example is still inside its politeness delay and must be kept
+    await asyncio.sleep(0.03)
+    await fetcher.fetch("https://c.example/")
+    assert set(fetcher._host_semaphores) == {"a.example", "b.example", "c.example"}
+
+    await asyncio.sleep(0.06)
+    await fetcher.fetch("https://d.example/")
+    assert set(fetcher._host_semaphores) == {"d.example"}
+    assert set(fetcher._host_next_request) == {"d.example"}
+    assert fetcher._host_active == {}
+
+
+async def test_fetch_rejects_non_html_before_reading_body(monkeypatch):
+    monkeypatch.setattr(settings, "fetch_host_delay", 0.0)
+    read = []
+
+    async def body():
+        read.append(True)
+        yield b"%PDF-1.7"
+
+    def handler(request):
+        return httpx.Response(200, content=body(), headers={"content-type": "application/pdf"})
+
+    _use_transport(monkeypatch, handler)
+    with pytest.raises(fetcher.UnsupportedContentTypeError):
+        await fetcher.fetch("https://example.com/file.pdf")
+    assert read == []
+
+
+async def test_fetch_decodes_incrementally_with_declared_charset(monkeypatch):
+    monkeypatch.setattr(settings, "fetch_host_delay", 0.0)
+    html = '<html><head><meta charset="iso-8859-1"></head><body>Grüße</body></html>'
+    raw = html.encode("iso-8859-1")
+
+    async def body():
+        # Split inside the document to exercise the incremental decoder
+        for i in range(0, len(raw), 7):
+            yield raw[i : i + 7]
+
+    def handler(request):
+        return httpx.Response(200, content=body(), headers={"content-type": "text/html"})
+
+    _use_transport(monkeypatch, handler)
+    response = await fetcher.fetch("https://example.com/de")
+
+    assert response["text"] == html
+    assert response["content_hash"] == hashlib.sha256(raw).hexdigest()
+
+
+async def test_fetch_splits_multibyte_characters_across_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "fetch_host_delay", 0.0)
+    raw = "<p>äöü €</p>".encode()
+
+    async def body():
+        for i in range(len(raw)):
+            yield raw[i : i + 1]
+
+    def handler(request):
+        return httpx.Response(
+            200, content=body(), headers={"content-type": "text/html; charset=utf-8"}
+        )
+
+    _use_transport(monkeypatch, handler)
+    response = await fetcher.fetch("https://example.com/utf8")
+
+    assert response["text"] == "<p>äöü €</p>"
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.services import graph
+
+
+def _request(headers: dict[str, str] | None = None) -> Request:
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def _snapshot() -> graph.GraphSnapshot:
+    nodes = [{"id": "a", "title": "Ä", "topics": ["x"]}, {"id": "b", "title": "B", "topics": []}]
+    edges = [{"source": "a", "target": "b", "weight": 0.5, "type": "related"}]
+    return graph.GraphSnapshot(nodes, edges, fingerprint=(2, None, 1, 1), generation=0)
+
+
+def test_snapshot_body_and_etag_are_stable():
+    snapshot = _snapshot()
+
+    assert json.loads(snapshot.body) == {
+        "nodes": snapshot.nodes,
+        "edges": snapshot.edges,
+        "node_count": 2,
+        "edge_count": 1,
+    }
+    assert snapshot.etag == _snapshot().etag
+
+
+def test_etag_response_honours_if_none_match():
+    snapshot = _snapshot()
+
+    response = graph.etag_response(_request(), snapshot.body, snapshot.etag)
+    assert response.status_code == 200
+    assert response.headers["etag"] == snapshot.etag
+    assert response.body == snapshot.body
+
+    cached = _request({"If-None-Match": f'"other", W/{snapshot.etag}'})
+    response = graph.etag_response(cached, snapshot.body, snapshot.etag)
+    assert response.status_code == 304
+    assert response.body == b""
+
+    stale = _request({"If-None-Match": '"other"'})
+    assert graph.etag_response(stale, snapshot.body, snapshot.etag).status_code == 200
+
+
+def _chain_snapshot() -> graph.GraphSnapshot:
+    # a - b - c - d, plus a weak a - c edge and an isolated e
+    nodes = [{"id": node_id} for node_id in "abcde"]
+    edges = [
+        {"source": "a", "target": "b", "weight": 0.9},
+        {"source": "b", "target": "c", "weight": 0.9},
+        {"source": "c", "target": "d", "weight": 0.9},
+        {"source": "a", "target": "c", "weight": 0.2},
+    ]
+    return graph.GraphSnapshot(nodes, edges, fingerprint=(), generation=0)
+
+
+def test_subgraph_filters_expands_and_prunes():
+    snapshot = _chain_snapshot()
+
+    nodes, edges = snapshot.subgraph()
+    assert [n["id"] for n in nodes] == ["c", "a", "b", "d", "e"]  # by degree, then id
+    assert len(edges) == 4
+
+    nodes, edges = snapshot.subgraph(min_weight=0.5, seed="a", hops=2)
+    assert [n["id"] for n in nodes] == ["a", "b", "c"]
+    assert len(edges) == 2
+
+    nodes, _ = snapshot.subgraph(allowed={"a", "b", "e", "x"})
+    assert {n["id"] for n in nodes} == {"a", "b", "e"}
+
+    nodes, edges = snapshot.subgraph(max_nodes=2)
+    assert [n["id"] for n in nodes] == ["c", "a"]
+    assert edges == [{"source": "a", "target": "c", "weight": 0.2}]
+
+
+async def test_graph_response_pages_nodes_and_edges(monkeypatch):
+    snapshot = _chain_snapshot()
+
+    async def fake_get_snapshot(db):
+        return snapshot
+
+    monkeypatch.setattr(graph, "get_snapshot", fake_get_snapshot)
+
+    def params(**kwargs):
+        defaults = dict(seed=None, hops=1, min_weight=0.0, max_nodes=None, limit=None, cursor=None)
+        return graph.GraphParams(**{**defaults, **kwargs})
+
+    pages = []
+    cursor = None
+    while True:
+        response = await graph.graph_response(_request(), None, params(limit=2, cursor=cursor))
+        page = json.loads(response.body)
+        pages.append(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert [len(p["nodes"]) for p in pages] == [2, 2, 1]
+    assert sum(p["edge_count"] for p in pages) == 4  # every edge exactly once
+    assert pages[0]["total_nodes"] == 5
+
+    snapshot.etag = '"changed"'
+    stale = params(limit=2, cursor=pages[0]["next_cursor"])
+    with pytest.raises(HTTPException) as exc:
+        await graph.graph_response(_request(), None, stale)
+    assert exc.value.status_code == 409
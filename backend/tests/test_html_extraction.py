@@ -0,0 +1,34 @@
+import pytest
+
+from app.config import settings
+from app.services import html_extraction
+
+HTML = (
+    "<html><head><title>A Title</title></head><body><nav>Menu</nav><article>"
+    + "<p>Some paragraph with enough words to count as article text.</p>" * 20
+    + "</article></body></html>"
+)
+
+
+def test_extract_document_returns_text_and_title():
+    result = html_extraction.extract_document(HTML)
+
+    assert result["title"] == "A Title"
+    assert "Some paragraph" in result["text"]
+    assert "Menu" not in result["text"]
+
+
+def test_extract_document_enforces_cpu_timeout():
+    with pytest.raises(html_extraction.ExtractionTimeoutError):
+        html_extraction.extract_document(HTML * 50, cpu_timeout=0.001)
+
+
+async def test_extract_html_runs_in_process_pool(monkeypatch):
+    monkeypatch.setattr(settings, "extraction_workers", 1)
+    try:
+        result = await html_extraction.extract_html(HTML, "https://example.com/a")
+        assert html_extraction._executor is not None
+    finally:
+        html_extraction.shutdown()
+
+    assert result["title"] == "A Title"
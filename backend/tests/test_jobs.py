@@ -0,0 +1,113 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app import worker
+from app.services import jobs
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=asyncpg.dialect()))
+
+
+class FakeSession:
+    """Records executed statements; every UPDATE affects `rowcount` rows."""
+
+    def __init__(self, rowcount: int = 1):
+        self.statements = []
+        self.rowcount = rowcount
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(
+            rowcount=self.rowcount,
+            scalar_one_or_none=lambda: None,
+            scalars=lambda: SimpleNamespace(all=lambda: []),
+        )
+
+    async def commit(self):
+        pass
+
+
+def test_retry_delay_backs_off_exponentially(monkeypatch):
+    monkeypatch.setattr(jobs.settings, "job_retry_base_seconds", 30.0)
+    monkeypatch.setattr(jobs.settings, "job_retry_max_seconds", 200.0)
+
+    assert [jobs.retry_delay(n) for n in range(5)] == [30.0, 30.0, 60.0, 120.0, 200.0]
+
+
+async def test_lease_jobs_takes_over_expired_leases():
+    db = FakeSession()
+
+    assert await jobs.lease_jobs(db, 5, kinds=[jobs.JOB_EMBED_ITEM]) == []
+
+    sql = _sql(db.statements[1])
+    assert "processing_jobs.locked_until <" in sql
+    assert "processing_jobs.attempts < processing_jobs.max_attempts" in sql
+    assert sql.endswith("FOR UPDATE SKIP LOCKED")
+
+
+async def test_lease_jobs_fails_expired_jobs_without_attempts_left():
+    db = FakeSession()
+
+    await jobs.lease_jobs(db, 5)
+
+    sweep = db.statements[0]
+    sql = _sql(sweep)
+    assert sql.startswith("UPDATE processing_jobs SET status=")
+    assert "processing_jobs.attempts >= processing_jobs.max_attempts" in sql
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert sweep.compile().params["last_error"] == "lease expired"
+
+
+@pytest.mark.parametrize(
+    "call, lost",
+    [
+        (jobs.extend_lease, False),
+        (jobs.complete_job, False),
+        (lambda db, job_id, attempt: jobs.fail_job(db, job_id, attempt, "boom"), None),
+    ],
+)
+async def test_lease_operations_require_the_current_lease(call, lost):
+    db = FakeSession(rowcount=0)
+
+    assert await call(db, 7, 2) is lost
+
+    sql = _sql(db.statements[0])
+    assert "processing_jobs.attempts = $" in sql
+    assert "processing_jobs.status = $" in sql
+
+
+async def test_worker_renews_lease_and_stops_job_when_lost(monkeypatch):
+    renewals = []
+    completed = []
+
+    async def extend_lease(db, job_id, attempt):
+        renewals.append((job_id, attempt))
+        return len(renewals) < 3
+
+    async def complete_job(db, job_id, attempt):
+        completed.append(job_id)
+        return True
+
+    async def slow_handler(content_id):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(worker.settings, "job_lease_seconds", 0.03)
+    monkeypatch.setattr(worker, "async_session_maker", FakeSession)
+    monkeypatch.setattr(worker, "extend_lease", extend_lease)
+    monkeypatch.setattr(worker, "complete_job", complete_job)
+    monkeypatch.setitem(worker.JOB_HANDLERS, "slow", slow_handler)
+
+    await asyncio.wait_for(worker.Worker({"slow": 1})._run_job(7, "slow", None, 2), timeout=5)
+
+    assert renewals == [(7, 2)] * 3
+    assert completed == []
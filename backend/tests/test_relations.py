@@ -0,0 +1,129 @@
+import importlib.util
+import sqlite3
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.services import relations
+
+MIGRATIONS = Path(__file__).parent.parent / "alembic" / "versions"
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=asyncpg.dialect()))
+
+
+class FakeSession:
+    """Records executed statements; answers queries from a list of results."""
+
+    def __init__(self, *results):
+        self.statements = []
+        self.results = list(results)
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        if self.results:
+            return self.results.pop(0)
+        return SimpleNamespace(rowcount=3)
+
+
+async def test_rebuild_topic_relations_is_one_set_based_insert():
+    db = FakeSession()
+
+    assert await relations.rebuild_topic_relations(db) == 3
+
+    [statement] = db.statements
+    sql = _sql(statement)
+    assert "INSERT INTO item_relations" in sql
+    assert "auto_generated" in sql
+    assert "a.content_id < b.content_id" in sql
+    assert "HAVING count(*) >= $" in sql
+    assert sql.endswith("ON CONFLICT DO NOTHING")
+
+
+async def test_similarity_relations_skip_existing_pairs(monkeypatch):
+    item_id, other_id = uuid.uuid4(), uuid.uuid4()
+
+    async def find_similar_items(*args):
+        return [(other_id, 0.9)]
+
+    monkeypatch.setattr(relations, "find_similar_items", find_similar_items)
+    embedding = SimpleNamespace(embedding=[1.0, 0.0])
+    db = FakeSession(SimpleNamespace(scalar_one_or_none=lambda: embedding))
+
+    assert await relations.calculate_similarity_relations(item_id, db) == 3
+
+    insert = db.statements[-1]
+    assert _sql(insert).endswith("ON CONFLICT DO NOTHING")
+    params = insert.compile(dialect=asyncpg.dialect()).params
+    assert params["auto_generated_m0"] is True
+    assert params["relation_type_m0"] == relations.RelationType.SIMILAR
+
+
+def _migration(name: str):
+    spec = importlib.util.spec_from_file_location(name, MIGRATIONS / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_pair_dedup_keeps_user_relations(monkeypatch):
+    migration = _migration("008_relation_pair_unique")
+    executed = []
+    monkeypatch.setattr(migration, "op", SimpleNamespace(execute=executed.append))
+    migration.upgrade()
+    dedup = executed[0]
+
+    conn = sqlite3.connect(":memory:")
+    conn.create_function("LEAST", 2, min)
+    conn.create_function("GREATEST", 2, max)
+    conn.execute(
+        "CREATE TABLE item_relations "
+        "(id INTEGER, source_id TEXT, target_id TEXT, relation_type TEXT, confidence REAL)"
+    )
+    conn.executemany(
+        "INSERT INTO item_relations VALUES (?, ?, ?, ?, ?)",
+        [
+            # Auto-linked first, then the user's typed relation (other direction)
+            (1, "a", "b", "RELATED", 0.5),
+            (2, "b", "a", "EXTENDS", 1.0),
+            # Auto similarity vs. a manual RELATED link
+            (3, "a", "c", "SIMILAR", 0.8),
+            (4, "c", "a", "RELATED", 1.0),
+            # Two auto relations: the oldest stays
+            (5, "b", "c", "RELATED", 0.5),
+            (6, "c", "b", "SIMILAR", 0.9),
+        ],
+    )
+    conn.execute(dedup)
+
+    kept = [row[0] for row in conn.execute("SELECT id FROM item_relations ORDER BY id")]
+    assert kept == [2, 4, 5]
+
+
+async def test_refresh_topic_relations_only_touches_auto_relations():
+    db = FakeSession()
+
+    await relations.refresh_topic_relations([uuid.uuid4() for _ in range(50)], db)
+
+    # Two statements however many items changed
+    delete, upsert = (_sql(statement) for statement in db.statements)
+    assert delete.startswith("DELETE FROM item_relations WHERE item_relations.auto_generated")
+    assert "ON CONFLICT (LEAST(source_id, target_id), GREATEST(source_id, target_id))" in upsert
+    assert upsert.endswith(
+        "DO UPDATE SET confidence = excluded.confidence "
+        "WHERE item_relations.auto_generated AND item_relations.relation_type = $6::relationtype"
+    )
+
+    db = FakeSession()
+    await relations.refresh_topic_relations([], db)
+    assert db.statements == []
+
+
+def test_topic_pairs_list_pairs_of_changed_items_once():
+    sql = _sql(relations._topic_pairs([uuid.uuid4(), uuid.uuid4()]))
+
+    assert "other.content_id NOT IN" in sql
+    assert "OR mine.content_id < other.content_id" in sql
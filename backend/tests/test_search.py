@@ -0,0 +1,92 @@
+import uuid
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.models.user import UserItem
+from app.services import search
+from app.services.vector_index import VectorIndex
+
+
+def _sql(expression) -> str:
+    return str(
+        expression.compile(dialect=asyncpg.dialect(), compile_kwargs={"literal_binds": True})
+    )
+
+
+def test_parse_query_keeps_words_only():
+    assert search.parse_query("Künstliche Intelligenz: 'LLMs' & co!") == [
+        "künstliche",
+        "intelligenz",
+        "llms",
+        "co",
+    ]
+    assert search.parse_query(" & | ! ") == []
+    assert len(search.parse_query("word " * 50)) == search.MAX_QUERY_TERMS
+
+
+def test_match_uses_prefix_query_in_every_language():
+    sql = _sql(search.matches(["neural", "netz"]))
+
+    assert "search_vector @@" in sql
+    assert sql.count("'neural:* & netz:*'") == 2
+    assert "CAST('german' AS REGCONFIG)" in sql
+    assert "CAST('english' AS REGCONFIG)" in sql
+
+
+def test_fuzzy_match_uses_index_operator():
+    sql = _sql(search.fuzzy_matches("exmaple"))
+
+    assert "'exmaple' <% content_items.title" in sql
+    assert "'exmaple' <% content_items.source" in sql
+    assert "word_similarity" in _sql(search.fuzzy_rank("exmaple"))
+
+
+def test_reciprocal_rank_fusion_prefers_items_ranked_by_both():
+    a, b, c, d = (uuid.uuid4() for _ in range(4))
+
+    fused = search.reciprocal_rank_fusion([[a, b, c], [c, d, b]], k=60)
+
+    assert [content_id for content_id, _ in fused] == [c, b, a, d]
+    assert fused[0][1] == pytest.approx(1 / 63 + 1 / 61)
+    assert search.reciprocal_rank_fusion([[], []]) == []
+
+
+async def test_hybrid_search_ranks_semantic_candidates_within_scope(monkeypatch):
+    ids = [uuid.uuid4() for _ in range(5)]
+    index = VectorIndex()
+    index.add_many(ids, np.eye(5))
+    statements = []
+
+    class FakeSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def execute(self, statement):
+            sql = _sql(statement)
+            statements.append(sql)
+            rows = [ids[2]] if "search_vector" in sql else [ids[0], ids[2], ids[4]]
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: rows))
+
+    async def embed_query(q):
+        # Nearest overall is ids[1], which is outside the scope
+        return [0.6, 1.0, 0.5, 0.0, 0.0]
+
+    monkeypatch.setattr(search, "USE_PGVECTOR", False)
+    monkeypatch.setattr(search, "async_session_maker", FakeSession)
+    monkeypatch.setattr(search, "embed_query", embed_query)
+    monkeypatch.setattr(search, "get_vector_index", lambda: index)
+    scope = select(UserItem.content_id).join(UserItem.content).where(UserItem.user_id == 1)
+
+    fused = await search.hybrid_search("neural", scope, candidates=2)
+
+    assert [content_id for content_id, _ in fused] == [ids[2], ids[0]]
+    # The semantic side loads the scope as is, without a global probe
+    [semantic_sql] = [sql for sql in statements if "search_vector" not in sql]
+    assert semantic_sql == _sql(scope)
@@ -0,0 +1,54 @@
+import numpy as np
+
+from app.services import similarity
+from app.services.embeddings import cosine_similarity
+
+
+def _brute_force_pairs(vectors, threshold):
+    pairs = {}
+    for i in range(len(vectors)):
+        for j in range(i + 1, len(vectors)):
+            score = cosine_similarity(vectors[i], vectors[j])
+            if score >= threshold:
+                pairs[(i, j)] = score
+    return pairs
+
+
+def test_build_matrix_normalizes_and_drops_mismatched_dims():
+    matrix, kept = similarity.build_matrix([[3.0, 4.0], [0.0, 0.0], [1.0, 2.0, 3.0], [1.0, 0.0]])
+    assert kept == [0, 1, 3]
+    assert np.allclose(matrix[0], [0.6, 0.8])
+    assert np.allclose(matrix[1], [0.0, 0.0])
+
+
+def test_similar_pairs_matches_brute_force_across_blocks():
+    rng = np.random.default_rng(42)
+    vectors = rng.normal(size=(50, 8)).tolist()
+    matrix, _ = similarity.build_matrix(vectors)
+
+    expected = _brute_force_pairs(vectors, 0.3)
+    pairs = similarity.similar_pairs(matrix, 0.3, block_size=7)
+
+    assert {(i, j) for i, j, _ in pairs} == set(expected)
+    for i, j, score in pairs:
+        assert abs(score - expected[(i, j)]) < 1e-5
+
+
+def test_similar_pairs_top_k_limits_neighbours():
+    rng = np.random.default_rng(7)
+    matrix, _ = similarity.build_matrix(rng.normal(size=(30, 4)).tolist())
+
+    pairs = similarity.similar_pairs(matrix, -1.0, k=2, block_size=8)
+
+    assert all(i < j for i, j, _ in pairs)
+    # Every row contributes at most k pairs
+    assert len(pairs) <= 30 * 2
+
+
+def test_top_k_orders_by_similarity_and_applies_threshold():
+    matrix, _ = similarity.build_matrix([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]])
+
+    result = similarity.top_k([1.0, 0.1], matrix, k=3, threshold=0.5)
+
+    assert [row for row, _ in result] == [0, 2]
+    assert result[0][1] > result[1][1]
@@ -0,0 +1,85 @@
+from app.config import settings
+from app.services import llm_cache, llm_client, summarizer
+from app.services.summarizer import _parse_summary_topics_response
+
+
+def test_parse_summary_topics_plain_json():
+    content = '{"summary": "- point one\\n- point two", "topics": ["Machine Learning", "python"]}'
+    summary, topics = _parse_summary_topics_response(content)
+
+    assert summary == "- point one\n- point two"
+    assert topics == ["machine learning", "python"]
+
+
+def test_parse_summary_topics_tolerates_fences_and_variants():
+    content = (
+        "Here is the result:\n```json\n"
+        '{"Summary": ["point one", "- point two"], "Topics": "rust, webassembly, rust"}\n```'
+    )
+    summary, topics = _parse_summary_topics_response(content)
+
+    assert summary == "- point one\n- point two"
+    assert topics == ["rust", "webassembly"]
+
+
+def test_parse_summary_topics_rejects_unusable_responses():
+    assert _parse_summary_topics_response("Sorry, I can't do that.") is None
+    assert _parse_summary_topics_response('{"summary": "", "topics": ["a"]}') is None
+    assert _parse_summary_topics_response('{"summary": "- point", ') is None
+
+
+async def test_generate_summary_and_topics_falls_back_to_two_calls(monkeypatch):
+    calls = []
+
+    async def fake_chat(messages, timeout, **kwargs):
+        calls.append(kwargs.get("format"))
+        if kwargs.get("format") == "json":
+            return {"message": {"content": "not json"}}
+        if "comma-separated" in messages[0]["content"]:
+            return {"message": {"content": "databases, postgres"}}
+        return {"message": {"content": "- a summary"}}
+
+    monkeypatch.setattr(llm_client, "chat", fake_chat)
+    monkeypatch.setattr(settings, "llm_cache_enabled", False)
+
+    summary, topics = await summarizer.generate_summary_and_topics("some text")
+
+    assert calls == ["json", None, None]
+    assert summary == "- a summary"
+    assert sorted(topics) == ["databases", "postgres"]
+
+
+def test_llm_cache_key_ignores_whitespace_but_not_template_or_model():
+    key = llm_cache.cache_key("summary", "Hello   world\n", "template", "llama3.2")
+
+    assert key == llm_cache.cache_key("summary", " Hello world", "template", "llama3.2")
+    assert key != llm_cache.cache_key("summary", "Hello world!", "template", "llama3.2")
+    assert key != llm_cache.cache_key("summary", "Hello world", "template v2", "llama3.2")
+    assert key != llm_cache.cache_key("summary", "Hello world", "template", "mistral")
+    assert key != llm_cache.cache_key("topics", "Hello world", "template", "llama3.2")
+
+
+async def test_llm_cache_eviction_failure_does_not_count_as_write_error(monkeypatch):
+    class FakeSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def execute(self, statement):
+            if statement.is_delete:
+                raise RuntimeError("lock timeout")
+
+        async def commit(self):
+            pass
+
+    monkeypatch.setattr(settings, "llm_cache_enabled", True)
+    monkeypatch.setattr(settings, "llm_cache_prune_interval", 1)
+    monkeypatch.setattr(llm_cache, "async_session_maker", FakeSession)
+    monkeypatch.setattr(llm_cache, "_stats", dict.fromkeys(llm_cache._stats, 0))
+
+    await llm_cache.put("summary", "Hello world", "template", "A summary")
+
+    assert llm_cache.get_stats()["writes"] == 1
+    assert llm_cache.get_stats()["errors"] == 0
@@ -0,0 +1,97 @@
+import uuid
+from types import SimpleNamespace
+
+from app.routers import items
+from app.services import topic_index
+from app.services.topic_index import TopicIndex
+
+
+def _index() -> tuple[TopicIndex, list[uuid.UUID]]:
+    ids = [uuid.uuid4() for _ in range(4)]
+    links = [
+        (ids[0], 1),
+        (ids[0], 2),
+        (ids[0], 3),
+        (ids[1], 1),
+        (ids[1], 2),
+        (ids[2], 3),
+        (ids[3], 9),
+    ]
+    return TopicIndex.build(links), ids
+
+
+def test_shared_counts_orders_by_overlap():
+    index, ids = _index()
+
+    assert index.shared_counts(ids[0]) == [(ids[1], 2), (ids[2], 1)]
+    assert index.shared_counts(ids[0], min_shared=2) == [(ids[1], 2)]
+    assert index.shared_counts(ids[0], limit=1) == [(ids[1], 2)]
+    assert index.shared_counts(ids[3]) == []
+    assert index.shared_count(ids[0], ids[1]) == 2
+
+
+def test_set_topics_updates_postings():
+    index, ids = _index()
+
+    index.set_topics(ids[2], [1, 2, 3])
+    assert index.shared_counts(ids[0]) == [(ids[2], 3), (ids[1], 2)]
+
+    index.set_topics(ids[1], [9])
+    assert index.shared_counts(ids[0]) == [(ids[2], 3)]
+    assert index.shared_counts(ids[3]) == [(ids[1], 1)]
+
+    new_id = uuid.uuid4()
+    index.add_topics(new_id, [1])
+    index.add_topics(new_id, [2])
+    assert index.topics(new_id) == [1, 2]
+    assert (new_id, 2) in index.shared_counts(ids[0])
+
+
+def test_remove_topic():
+    index, ids = _index()
+
+    index.remove_topic(1)
+
+    assert index.topics(ids[0]) == [2, 3]
+    assert index.shared_counts(ids[0]) == [(ids[1], 1), (ids[2], 1)]
+    assert index.topic_count == 3
+
+
+async def test_shared_topic_lookup_skips_and_evicts_stale_candidates(monkeypatch):
+    index, ids = _index()
+    # ids[1] was deleted by another process; ids[2] still shares topic 3
+    live_links = {ids[2]: [3]}
+
+    class FakeSession:
+        async def execute(self, statement):
+            candidates = next(
+                value
+                for value in statement.compile().params.values()
+                if isinstance(value, list) and isinstance(value[0], uuid.UUID)
+            )
+            if len(statement.selected_columns) == 4:
+                rows = [
+                    SimpleNamespace(id=c, title="t", source="s", shared=len(live_links[c]))
+                    for c in candidates
+                    if c in live_links
+                ]
+                return SimpleNamespace(all=lambda: rows)
+            links = [(c, t) for c in candidates for t in live_links.get(c, [])]
+            return SimpleNamespace(tuples=lambda: SimpleNamespace(all=lambda: links))
+
+    async def sync_topic_index(db):
+        pass
+
+    monkeypatch.setattr(topic_index, "_index", index)
+    monkeypatch.setattr(items, "get_topic_index", lambda: index)
+    monkeypatch.setattr(items, "sync_topic_index", sync_topic_index)
+    monkeypatch.setattr(items, "SHARED_TOPIC_ITEMS_LIMIT", 1)
+    monkeypatch.setattr(items, "SHARED_TOPIC_CHECK_BATCH", 1)
+    item = SimpleNamespace(id=ids[0], topics=[SimpleNamespace(id=t) for t in (1, 2, 3)])
+
+    shared = await items._shared_topic_items(FakeSession(), item, set())
+
+    # The stale top candidate neither shows up nor uses up the limit
+    assert [(row.id, count) for row, count in shared] == [(ids[2], 1)]
+    assert index.topics(ids[1]) == []
+    assert index.shared_counts(ids[0]) == [(ids[2], 1)]
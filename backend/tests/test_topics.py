@@ -0,0 +1,73 @@
+import uuid
+from types import SimpleNamespace
+
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.services import topics
+from app.services.topics import _clean_names
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=asyncpg.dialect()))
+
+
+class FakeSession:
+    """Records executed statements and answers them with the queued rows."""
+
+    def __init__(self, *results):
+        self.statements = []
+        self.results = list(results)
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        rows = self.results.pop(0) if self.results else []
+        return SimpleNamespace(tuples=lambda: SimpleNamespace(all=lambda: rows))
+
+
+def test_clean_names_dedupes_strips_and_truncates():
+    names = [" python ", "python", "Python", "", "   ", "x" * 150, "rust"]
+
+    assert _clean_names(names) == ["python", "x" * 100, "rust"]
+
+
+async def test_get_or_create_topics_matches_existing_topics_case_insensitively():
+    db = FakeSession([("Python", 1), ("python", 7), ("Rust", 2)])
+
+    assert await topics.get_or_create_topics(db, ["python", "RUST"]) == {"python": 1, "RUST": 2}
+
+    # One lookup, nothing to create; the oldest of several case variants wins
+    [lookup] = db.statements
+    sql = _sql(lookup)
+    assert "lower(topics.name) IN" in sql
+    assert sql.endswith("ORDER BY topics.id")
+    assert sorted(lookup.compile().params["lower_1"]) == ["python", "rust"]
+
+
+async def test_get_or_create_topics_picks_up_topics_created_concurrently():
+    # "b" loses the insert race: ON CONFLICT skips it, so it is selected again
+    db = FakeSession([], [("a", 1)], [("B", 2)])
+
+    assert await topics.get_or_create_topics(db, ["a", "b"]) == {"a": 1, "b": 2}
+
+    lookup, create, reselect = db.statements
+    create_sql = _sql(create)
+    assert create_sql.startswith("INSERT INTO topics")
+    assert "ON CONFLICT (name) DO NOTHING RETURNING topics.name, topics.id" in create_sql
+    assert reselect.compile().params["lower_1"] == ["b"]
+
+
+async def test_add_item_topics_links_each_topic_once():
+    content_id = uuid.uuid4()
+    db = FakeSession([("Python", 1), ("rust", 2)])
+
+    topic_ids = await topics.add_item_topics(db, content_id, ["python", "Rust", "PYTHON"])
+
+    assert topic_ids == [1, 2]
+    link = db.statements[-1]
+    sql = _sql(link)
+    assert sql.startswith("INSERT INTO content_topics")
+    # Re-running on an item keeps its existing links instead of duplicating them
+    assert sql.endswith("ON CONFLICT DO NOTHING")
+    params = link.compile().params
+    assert [params["topic_id_m0"], params["topic_id_m1"]] == [1, 2]
+    assert "topic_id_m2" not in params
@@ -0,0 +1,54 @@
+from app.services.url_import import parse_url_list
+
+
+def test_parse_jsonl_strings_and_objects():
+    content = b"\n".join(
+        [
+            b'"https://example.com/a"',
+            b'{"url": "https://example.com/b", "title": "B"}',
+            b'{"resolved_url": "https://example.com/c", "given_url": "http://ex.com/c"}',
+            b'{"url": "ftp://example.com/d"}',
+            b"not json",
+            b'"https://example.com/a"',
+        ]
+    )
+
+    assert parse_url_list("export.jsonl", content) == [
+        "https://example.com/a",
+        "https://example.com/b",
+        "https://example.com/c",
+    ]
+
+
+def test_parse_opml_outlines():
+    content = b"""<?xml version="1.0"?>
+<opml version="2.0"><body>
+  <outline text="Tech">
+    <outline text="Blog" type="rss" xmlUrl="https://blog.example/feed" htmlUrl="https://blog.example/"/>
+    <outline text="Link" url="https://example.com/page"/>
+  </outline>
+</body></opml>"""
+
+    assert parse_url_list("feeds.opml", content) == [
+        "https://blog.example/",
+        "https://example.com/page",
+    ]
+
+
+def test_parse_bookmarks_html_and_plain_text():
+    bookmarks = b"""<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<DL><p>
+  <DT><A HREF="https://example.com/one" ADD_DATE="1">One</A>
+  <DT><A HREF="javascript:void(0)">Bookmarklet</A>
+  <DT><A HREF="https://example.com/two">Two</A>
+</DL>"""
+    assert parse_url_list("bookmarks.html", bookmarks) == [
+        "https://example.com/one",
+        "https://example.com/two",
+    ]
+
+    csv = b"title,url,time_added\nOne,https://example.com/one,1\nTwo,https://example.com/two,2\n"
+    assert parse_url_list("part_000000.csv", csv) == [
+        "https://example.com/one",
+        "https://example.com/two",
+    ]
@@ -0,0 +1,165 @@
+import uuid
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services import vector_index
+from app.services.vector_index import VectorIndex
+
+
+def _random_index(n: int, dim: int = 16, seed: int = 0) -> tuple[VectorIndex, list[uuid.UUID]]:
+    rng = np.random.default_rng(seed)
+    index = VectorIndex(nprobe=8)
+    ids = [uuid.uuid4() for _ in range(n)]
+    index.add_many(ids, rng.normal(size=(n, dim)))
+    return index, ids
+
+
+def test_exact_search_on_small_index():
+    index, ids = _random_index(50)
+
+    query = index.vector(ids[3])
+    results = index.search(query, k=5)
+
+    assert results[0][0] == ids[3]
+    assert abs(results[0][1] - 1.0) < 1e-5
+    assert [score for _, score in results] == sorted((s for _, s in results), reverse=True)
+
+
+def test_search_excludes_and_skips_removed_items():
+    index, ids = _random_index(20)
+
+    index.remove(ids[1])
+    results = index.search(index.vector(ids[0]), k=20, exclude=ids[0])
+
+    found = {content_id for content_id, _ in results}
+    assert ids[0] not in found
+    assert ids[1] not in found
+    assert len(found) == 18
+
+
+def test_trained_index_finds_near_duplicates(monkeypatch):
+    monkeypatch.setattr(vector_index, "MIN_TRAIN_SIZE", 200)
+    index, ids = _random_index(400, dim=32, seed=1)
+    index.train()
+
+    rng = np.random.default_rng(2)
+    hits = 0
+    for i in range(20):
+        noisy = index.vector(ids[i]) + rng.normal(scale=0.01, size=32)
+        hits += index.search(noisy, k=1)[0][0] == ids[i]
+    assert hits >= 18
+
+
+def test_snapshot_round_trip(tmp_path):
+    index, ids = _random_index(30)
+    index.model = "test-model"
+    index.remove(ids[0])
+
+    path = tmp_path / "index.npz"
+    index.save(path)
+    loaded = VectorIndex.load(path)
+
+    assert len(loaded) == 29
+    assert loaded.model == "test-model"
+    assert ids[0] not in loaded
+    assert loaded.pending_changes == 0
+    assert np.allclose(loaded.vector(ids[5]), index.vector(ids[5]))
+
+
+def test_search_within_is_exact_and_counts_matches():
+    index, ids = _random_index(50)
+    subset = ids[10:20] + [uuid.uuid4()]  # unknown ids are ignored
+
+    results, total = index.search_within(index.vector(ids[12]), subset, k=3)
+
+    assert total == 10
+    assert results[0][0] == ids[12]
+    assert len(results) == 3
+    assert {content_id for content_id, _ in results} <= set(ids[10:20])
+
+    results, total = index.search_within(index.vector(ids[12]), subset, k=5, threshold=0.99)
+    assert total == 1
+    assert results[0][0] == ids[12]
+
+
+def test_cold_index_is_never_snapshotted(tmp_path, monkeypatch):
+    index, _ = _random_index(10)
+    path = tmp_path / "index.npz"
+    monkeypatch.setattr(vector_index, "_index", index)
+    monkeypatch.setattr(vector_index, "_warmed", False)
+    monkeypatch.setattr(vector_index.settings, "vector_index_path", str(path))
+
+    vector_index.save_vector_index(force=True)
+
+    assert not path.exists()
+
+
+async def test_update_trains_and_snapshots_off_the_event_loop(tmp_path, monkeypatch):
+    index, _ = _random_index(150, dim=8)
+    path = tmp_path / "index.npz"
+    monkeypatch.setattr(vector_index, "MIN_TRAIN_SIZE", 200)
+    monkeypatch.setattr(vector_index, "SNAPSHOT_DEBOUNCE_SECONDS", 0.0)
+    monkeypatch.setattr(vector_index, "_index", index)
+    monkeypatch.setattr(vector_index, "_warmed", True)
+    monkeypatch.setattr(vector_index.settings, "vector_index_path", str(path))
+    monkeypatch.setattr(vector_index.settings, "vector_index_snapshot_interval", 100)
+
+    rng = np.random.default_rng(3)
+    new_ids = [uuid.uuid4() for _ in range(60)]
+    await vector_index.update_vector_index(dict(zip(new_ids, rng.normal(size=(60, 8)).tolist())))
+
+    assert index._centroids is not None
+    assert not index.needs_training
+    results = index.search(index.vector(new_ids[0]), k=1)
+    assert results[0][0] == new_ids[0]
+
+    await vector_index._snapshot_task
+    assert len(VectorIndex.load(path)) == 210
+    assert index.pending_changes == 0
+
+
+def test_centroids_assign_rows_added_during_training(monkeypatch):
+    monkeypatch.setattr(vector_index, "MIN_TRAIN_SIZE", 100)
+    index, ids = _random_index(120, dim=8)
+    data, vectors = index.training_arrays()
+    centroids = vector_index.kmeans(data, 4)
+
+    late = uuid.uuid4()
+    index.add(late, index.vector(ids[0]))
+    index.set_centroids(centroids, np.argmax(vectors @ centroids.T, axis=1))
+
+    assert {content_id for content_id, _ in index.search(index.vector(ids[0]), k=2)} == {
+        ids[0],
+        late,
+    }
+
+
+async def test_sync_drops_embeddings_deleted_elsewhere(monkeypatch):
+    index, ids = _random_index(5)
+    stored = ids[:3]
+
+    class FakeSession:
+        async def scalar(self, statement):
+            return len(stored)
+
+        async def execute(self, statement):
+            rows = stored if len(statement.selected_columns) == 1 else []
+            return SimpleNamespace(
+                all=lambda: [], scalars=lambda: SimpleNamespace(all=lambda: rows)
+            )
+
+    monkeypatch.setattr(vector_index, "_index", index)
+    monkeypatch.setattr(vector_index, "_warmed", True)
+    monkeypatch.setattr(vector_index, "_last_sync", 0.0)
+    monkeypatch.setattr(vector_index.settings, "vector_index_sync_interval", 0.0)
+    monkeypatch.setattr(vector_index.settings, "vector_index_snapshot_interval", 100)
+    pending = index.pending_changes
+
+    await vector_index.sync_vector_index(FakeSession())
+
+    assert len(index) == 3
+    assert ids[3] not in index and ids[4] not in index
+    assert {content_id for content_id, _ in index.search(index.vector(ids[0]), k=5)} == set(stored)
+    # The removals are due for the next snapshot
+    assert index.pending_changes == pending + 2